@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+推理后端基准测试
+比较PyTorch(.pt)、ONNX Runtime和OpenVINO后端的逐帧推理延迟，以及检测数量与PyTorch的差异
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.engine import DEFAULT_MODEL_PATH
+from core.model_cache import ModelCache, DEFAULT_BACKEND
+from core.model_export import EXPORT_BACKENDS, is_backend_available
+
+def load_frames(video_path, frame_total):
+    """从视频中均匀读取测试帧，没有视频时生成随机帧"""
+    if video_path is None:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 256, (720, 1280, 3), dtype=np.uint8) for _ in range(frame_total)]
+    
+    capture = cv2.VideoCapture(video_path)
+    try:
+        total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        frames = []
+        for index in np.linspace(0, max(0, total - 1), frame_total).astype(int):
+            capture.set(cv2.CAP_PROP_POS_FRAMES, int(index))
+            ret, frame = capture.read()
+            if ret:
+                frames.append(frame)
+        return frames
+    finally:
+        capture.release()
+
+def run_backend(model_path, backend, frames):
+    """用指定后端逐帧推理，返回加载统计、每帧延迟（秒）和每帧检测数量"""
+    cached_model = ModelCache(warmup=True).get(model_path, backend=backend)
+    model = cached_model.model
+    
+    latencies = []
+    counts = []
+    for frame in frames:
+        start = time.perf_counter()
+        result = model.predict(frame, verbose=False)[0]
+        latencies.append(time.perf_counter() - start)
+        boxes = result.obb if getattr(result, 'obb', None) is not None else result.boxes
+        counts.append(len(boxes) if boxes is not None else 0)
+    return cached_model, np.array(latencies), np.array(counts)
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="推理后端基准测试")
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH, help=f"模型权重路径（默认 {DEFAULT_MODEL_PATH}）")
+    parser.add_argument('--video', help="测试视频路径（不指定时使用随机帧）")
+    parser.add_argument('--frames', type=int, default=50, help="测试帧数（默认50）")
+    parser.add_argument('--backends', nargs='+', default=[DEFAULT_BACKEND] + list(EXPORT_BACKENDS),
+                        choices=[DEFAULT_BACKEND] + list(EXPORT_BACKENDS), help="要测试的推理后端")
+    parser.add_argument('--threads', type=int, help="PyTorch推理线程数")
+    args = parser.parse_args()
+    
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+    
+    if not Path(args.model).exists():
+        print(f"❌ 模型文件不存在: {args.model}（可运行 download_weights.py 下载）")
+        return
+    
+    frames = load_frames(args.video, args.frames)
+    print(f"📋 模型: {args.model}, 测试帧: {len(frames)}帧 {'(随机帧)' if args.video is None else ''}")
+    
+    baseline = None
+    for backend in args.backends:
+        if backend in EXPORT_BACKENDS and not is_backend_available(backend):
+            print(f"  • {backend:8s}: 跳过，未安装 {EXPORT_BACKENDS[backend]['package']}")
+            continue
+        
+        cached_model, latencies, counts = run_backend(args.model, backend, frames)
+        mean_ms = latencies.mean() * 1000
+        line = (f"  • {backend:8s}: 平均 {mean_ms:7.1f}ms, P50 {np.percentile(latencies, 50) * 1000:7.1f}ms, "
+                f"P95 {np.percentile(latencies, 95) * 1000:7.1f}ms, 加载 {cached_model.load_time:.2f}s, "
+                f"预热 {cached_model.warmup_time:.2f}s")
+        if baseline is None:
+            baseline = (mean_ms, counts)
+        else:
+            count_diff = np.abs(counts - baseline[1]).mean()
+            line += f", 加速 {baseline[0] / mean_ms:.2f}x, 检测数量平均差 {count_diff:.2f}"
+        print(line)
+
+if __name__ == "__main__":
+    main()
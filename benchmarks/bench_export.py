@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式结果导出基准测试
+按处理过程的方式逐帧把大量检测结果（默认1000万个OBB对象）写入流式导出器，
+测量各格式的总耗时、吞吐量和峰值内存增长，并与给定的时间和内存预算比较
+"""
+
+import os
+import sys
+import time
+import argparse
+import resource
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.detection_store import make_detections
+from core.result_export import ResultExporter, STREAM_EXPORT_FORMATS, DEFAULT_CHUNK_ROWS
+
+NAMES = {i: name for i, name in enumerate(['plane', 'ship', 'storage-tank', 'vehicle', 'harbor'])}
+
+def peak_rss_mb():
+    """进程的峰值常驻内存（MB）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+def make_frame_pool(objects_per_frame, pool_size, rng):
+    """生成若干帧的检测数组，导出时循环使用（避免生成数据的耗时计入导出）"""
+    pool = []
+    for _ in range(pool_size):
+        centers = rng.uniform(0, 4000, (objects_per_frame, 2)).astype(np.float32)
+        corners = np.array([[-8, -5], [8, -5], [8, 5], [-8, 5]], dtype=np.float32)
+        pool.append(make_detections(centers[:, None, :] + corners,
+                                    rng.integers(0, len(NAMES), objects_per_frame),
+                                    rng.uniform(0.25, 1.0, objects_per_frame),
+                                    np.arange(1, objects_per_frame + 1)))
+    return pool
+
+def run_export(path, format, total, objects_per_frame, pool, chunk_rows):
+    """逐帧写入流式导出器，返回 (耗时秒, 峰值内存增长MB, 文件大小MB)"""
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    with ResultExporter(path, format, chunk_rows) as exporter:
+        for frame_id in range(total // objects_per_frame):
+            detection_info = {'frame_id': frame_id, 'bbox_type': 'obb',
+                              'detections': pool[frame_id % len(pool)], 'count': objects_per_frame}
+            exporter.add(detection_info, NAMES)
+    elapsed = time.perf_counter() - start
+    return elapsed, peak_rss_mb() - baseline, os.path.getsize(path) / 1024 / 1024
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="流式结果导出基准测试")
+    parser.add_argument('--detections', type=int, default=10_000_000, help="导出的对象总数（默认1000万）")
+    parser.add_argument('--objects-per-frame', type=int, default=100, help="每帧对象数（默认100）")
+    parser.add_argument('--formats', nargs='+', default=list(STREAM_EXPORT_FORMATS), choices=STREAM_EXPORT_FORMATS,
+                        help="要测试的导出格式")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help="每块的行数")
+    parser.add_argument('--time-budget', type=float, default=120.0, help="每种格式的时间预算（秒，默认120）")
+    parser.add_argument('--memory-budget', type=float, default=256.0, help="峰值内存增长预算（MB，默认256）")
+    parser.add_argument('--output-dir', help="导出文件目录（默认临时目录，测试后删除）")
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    pool = make_frame_pool(args.objects_per_frame, 64, rng)
+    output_dir = args.output_dir or tempfile.mkdtemp(prefix='bench_export_')
+    
+    print(f"📋 {args.detections:,}个OBB对象, 每帧{args.objects_per_frame}个, 每块{args.chunk_rows}行, "
+          f"预算 {args.time_budget:.0f}秒 / {args.memory_budget:.0f}MB\n")
+    print("| 格式 | 耗时(s) | 对象/秒 | 峰值内存增长(MB) | 文件(MB) | 预算 |")
+    print("|---|---|---|---|---|---|")
+    for format in args.formats:
+        path = os.path.join(output_dir, f"bench_results.{format}")
+        try:
+            # 预热：加载格式依赖的库，不计入峰值内存增长
+            run_export(path, format, args.objects_per_frame, args.objects_per_frame, pool, args.chunk_rows)
+            elapsed, memory_mb, size_mb = run_export(path, format, args.detections, args.objects_per_frame,
+                                                     pool, args.chunk_rows)
+        except (ImportError, RuntimeError) as e:
+            print(f"| {format} | - | - | - | - | 跳过: {e} |")
+            continue
+        finally:
+            if not args.output_dir and os.path.exists(path):
+                os.remove(path)
+        within = elapsed <= args.time_budget and memory_mb <= args.memory_budget
+        print(f"| {format} | {elapsed:.1f} | {args.detections / elapsed:,.0f} | {memory_mb:.1f} | {size_mb:.0f} | "
+              f"{'✅' if within else '❌'} |")
+    
+    if not args.output_dir:
+        os.rmdir(output_dir)
+
+if __name__ == "__main__":
+    main()
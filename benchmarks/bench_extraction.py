@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+推理结果提取基准测试
+比较逐对象构建字典（原实现）与一次生成结构化检测数组在不同对象数量下的每帧耗时，
+包括换算到原始坐标和写入检测结果存储
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.detection_store import DetectionStore, make_detections, scale_detections
+from core.renderer import class_name_for
+from core.resolution_profiles import scale_boxes
+
+NAMES = {i: name for i, name in enumerate(['plane', 'ship', 'storage-tank', 'vehicle', 'harbor'])}
+
+class Tensor:
+    """模拟ultralytics结果中的张量（.cpu().numpy()）"""
+    
+    def __init__(self, array):
+        self.array = array
+    
+    def cpu(self):
+        return self
+    
+    def numpy(self):
+        return self.array
+
+class Detections:
+    """模拟 result.obb / result.boxes"""
+    
+    def __init__(self, count, is_obb, rng):
+        centers = rng.uniform(0, 1000, (count, 2)).astype(np.float32)
+        if is_obb:
+            corners = np.array([[-8, -5], [8, -5], [8, 5], [-8, 5]], dtype=np.float32)
+            self.xyxyxyxy = Tensor(centers[:, None, :] + corners)
+        else:
+            self.xyxy = Tensor(np.concatenate([centers - 6.5, centers + 6.5], axis=1))
+        self.conf = Tensor(rng.uniform(0.25, 1.0, count).astype(np.float32))
+        self.cls = Tensor(rng.integers(0, len(NAMES), count).astype(np.float32))
+        self.id = Tensor(np.arange(1, count + 1, dtype=np.float32))
+
+def extract_per_object(detections, is_obb, scale):
+    """原实现：逐对象转换为Python数值并构建字典"""
+    boxes = (detections.xyxyxyxy if is_obb else detections.xyxy).cpu().numpy()
+    confidences = detections.conf.cpu().numpy()
+    class_ids = detections.cls.cpu().numpy().astype(int)
+    track_ids = detections.id.cpu().numpy().astype(int)
+    source_boxes = scale_boxes(boxes, scale, scale)
+    
+    objects = []
+    for i, (source_box, conf, class_id) in enumerate(zip(source_boxes, confidences, class_ids)):
+        track_id = track_ids[i] if i < len(track_ids) else None
+        objects.append({
+            'bbox': source_box.tolist() if is_obb else [int(v) for v in source_box.astype(int)],
+            'bbox_type': 'obb' if is_obb else 'xyxy',
+            'confidence': float(conf),
+            'class_id': int(class_id),
+            'class_name': class_name_for(NAMES, class_id),
+            'track_id': int(track_id) if track_id is not None else None
+        })
+    return {'frame_id': 0, 'objects': objects, 'count': len(objects)}
+
+def extract_vectorized(detections, is_obb, scale, store):
+    """一次生成结构化检测数组，原地换算坐标后写入检测结果存储"""
+    bbox_type = 'obb' if is_obb else 'xyxy'
+    boxes = (detections.xyxyxyxy if is_obb else detections.xyxy).cpu().numpy()
+    array = make_detections(boxes, detections.cls.cpu().numpy(), detections.conf.cpu().numpy(),
+                            detections.id.cpu().numpy())
+    scale_detections(array, bbox_type, scale, scale)
+    detection_info = {'frame_id': 0, 'bbox_type': bbox_type, 'detections': array, 'count': len(array)}
+    store.append(detection_info, NAMES)
+    return detection_info
+
+def measure(extract, repeats):
+    """重复提取测量每帧平均耗时（毫秒）"""
+    extract()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        extract()
+    return (time.perf_counter() - start) / repeats * 1000
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="推理结果提取基准测试")
+    parser.add_argument('--counts', type=int, nargs='+', default=[10, 100, 500, 1000, 2000], help="每帧对象数量")
+    parser.add_argument('--repeats', type=int, default=200, help="每种情况重复提取的次数（默认200）")
+    parser.add_argument('--scale', type=float, default=2.0, help="换算到原始坐标的缩放比例（默认2.0）")
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    print(f"📋 每种情况提取 {args.repeats} 次，坐标缩放 {args.scale}\n")
+    print("| 检测框 | 对象数 | 逐对象(ms) | 结构化数组(ms) | 加速 |")
+    print("|---|---|---|---|---|")
+    for is_obb in (True, False):
+        for count in args.counts:
+            detections = Detections(count, is_obb, rng)
+            store = DetectionStore()
+            legacy_ms = measure(lambda: extract_per_object(detections, is_obb, args.scale), args.repeats)
+            vectorized_ms = measure(lambda: extract_vectorized(detections, is_obb, args.scale, store), args.repeats)
+            print(f"| {'OBB' if is_obb else 'xyxy'} | {count} | {legacy_ms:.3f} | {vectorized_ms:.3f} | "
+                  f"{legacy_ms / vectorized_ms:.1f}x |")
+
+if __name__ == "__main__":
+    main()
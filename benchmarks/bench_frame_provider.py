@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+原始帧提供器基准测试
+比较导入时解码并保存全部原始帧（原实现）与按需读取的帧提供器：导入耗时、峰值内存增长，
+以及按播放帧率顺序播放采样帧和随机拖动时取帧的延迟
+"""
+
+import sys
+import time
+import random
+import argparse
+import resource
+from pathlib import Path
+
+import cv2
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.frame_provider import FrameProvider, DEFAULT_MEMORY_LIMIT_MB, format_provider_stats
+from core.frame_sampler import FrameSampler, constant_fps_timestamps
+
+def peak_rss_mb():
+    """进程的峰值常驻内存（MB）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+def percentile(values, q):
+    """分位数（毫秒）"""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] * 1000 if values else 0.0
+
+def load_all_frames(video_path):
+    """原实现：导入时解码全部帧并保存拷贝"""
+    capture = cv2.VideoCapture(video_path)
+    frames = []
+    while True:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        frames.append(frame.copy())
+    capture.release()
+    return frames
+
+def run_provider(video_path, sampled_indices, args):
+    """按播放帧率顺序播放采样帧，再随机拖动，返回 (打开耗时, 播放延迟, 拖动延迟, 统计)"""
+    start = time.perf_counter()
+    provider = FrameProvider(video_path, args.memory_limit)
+    open_time = time.perf_counter() - start
+    
+    # 播放：每个间隔取一帧并预读之后的采样帧（与主窗口的播放定时器相同）
+    interval = 1.0 / args.play_fps
+    play_latencies = []
+    for position in range(min(len(sampled_indices), args.play_frames)):
+        tick = time.perf_counter()
+        provider.get(sampled_indices[position])
+        play_latencies.append(time.perf_counter() - tick)
+        provider.prefetch(sampled_indices[position + 1:position + 1 + provider.read_ahead])
+        time.sleep(max(0.0, interval - (time.perf_counter() - tick)))
+    
+    # 拖动：随机跳到任意采样帧
+    scrub_latencies = []
+    rng = random.Random(0)
+    for _ in range(args.scrubs):
+        position = rng.randrange(len(sampled_indices))
+        tick = time.perf_counter()
+        provider.get(sampled_indices[position])
+        scrub_latencies.append(time.perf_counter() - tick)
+    
+    stats = provider.get_stats()
+    provider.close()
+    return open_time, play_latencies, scrub_latencies, stats
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="原始帧提供器基准测试")
+    parser.add_argument('video', help="测试视频路径")
+    parser.add_argument('--target-fps', type=float, default=5.0, help="采样帧率（默认5）")
+    parser.add_argument('--play-fps', type=float, default=25.0, help="播放帧率（默认25）")
+    parser.add_argument('--play-frames', type=int, default=250, help="顺序播放的采样帧数（默认250）")
+    parser.add_argument('--scrubs', type=int, default=50, help="随机拖动次数（默认50）")
+    parser.add_argument('--memory-limit', type=float, default=DEFAULT_MEMORY_LIMIT_MB,
+                        help=f"缓存内存上限（MB，默认{DEFAULT_MEMORY_LIMIT_MB}）")
+    parser.add_argument('--skip-legacy', action='store_true', help="不测试原实现（长视频会占用大量内存）")
+    args = parser.parse_args()
+    
+    capture = cv2.VideoCapture(args.video)
+    if not capture.isOpened():
+        print(f"❌ 无法打开视频: {args.video}")
+        return
+    total_frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    original_fps = capture.get(cv2.CAP_PROP_FPS)
+    capture.release()
+    sampled_indices = FrameSampler(args.target_fps).sample(constant_fps_timestamps(total_frames, original_fps))
+    
+    print(f"📋 {total_frames}帧, {original_fps:.1f}FPS, 采样{len(sampled_indices)}帧, "
+          f"播放{args.play_fps:.0f}FPS, 缓存上限{args.memory_limit:.0f}MB\n")
+    
+    # 先测试帧提供器，峰值内存不受原实现影响
+    baseline = peak_rss_mb()
+    open_time, play_latencies, scrub_latencies, stats = run_provider(args.video, sampled_indices, args)
+    provider_memory = peak_rss_mb() - baseline
+    
+    print("| 实现 | 导入耗时(s) | 峰值内存增长(MB) | 播放取帧 平均/p95(ms) | 拖动取帧 平均/p95(ms) |")
+    print("|---|---|---|---|---|")
+    print(f"| 按需读取 | {open_time:.3f} | {provider_memory:.0f} | "
+          f"{sum(play_latencies) / len(play_latencies) * 1000:.2f} / {percentile(play_latencies, 0.95):.2f} | "
+          f"{sum(scrub_latencies) / max(1, len(scrub_latencies)) * 1000:.2f} / "
+          f"{percentile(scrub_latencies, 0.95):.2f} |")
+    
+    if not args.skip_legacy:
+        baseline = peak_rss_mb()
+        start = time.perf_counter()
+        frames = load_all_frames(args.video)
+        load_time = time.perf_counter() - start
+        legacy_memory = peak_rss_mb() - baseline
+        del frames
+        # 全部帧已在内存中，取帧只是列表索引
+        print(f"| 全部预加载 | {load_time:.3f} | {legacy_memory:.0f} | 0.00 / 0.00 | 0.00 / 0.00 |")
+    
+    print(f"\n{format_provider_stats(stats)}")
+
+if __name__ == "__main__":
+    main()
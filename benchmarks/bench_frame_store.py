@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+处理帧存储基准测试
+比较保存未压缩帧的列表（原实现）与各压缩方式的帧存储：添加帧的耗时、内存占用、写入磁盘的数据量，
+以及按播放帧率回放（提前解压）和随机拖动时取帧的延迟
+"""
+
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.frame_store import FrameStore, FRAME_CODECS, DEFAULT_DECODE_AHEAD, format_frame_store_stats
+
+def read_frames(video_path, count):
+    """读取视频开头的若干帧"""
+    capture = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < count:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        frames.append(frame)
+    capture.release()
+    return frames
+
+def run_store(frames, codec, args):
+    """添加全部帧后回放和拖动，返回 (添加耗时, 压缩完成耗时, 播放延迟, 拖动延迟, 统计)"""
+    store = FrameStore(codec, args.memory_budget)
+    start = time.perf_counter()
+    for frame in frames:
+        store.append(frame)
+    append_time = time.perf_counter() - start
+    while store.get_stats()['pending_count'] > 0:
+        time.sleep(0.005)
+    encode_time = time.perf_counter() - start
+    
+    # 回放：每个间隔取一帧并提前解压之后的帧（与主窗口的播放定时器相同）
+    interval = 1.0 / args.play_fps
+    play_latencies = []
+    for position in range(len(store)):
+        tick = time.perf_counter()
+        store.get(position)
+        play_latencies.append(time.perf_counter() - tick)
+        store.prefetch(range(position + 1, min(len(store), position + 1 + DEFAULT_DECODE_AHEAD)))
+        time.sleep(max(0.0, interval - (time.perf_counter() - tick)))
+    
+    scrub_latencies = []
+    rng = random.Random(0)
+    for _ in range(args.scrubs):
+        tick = time.perf_counter()
+        store.get(rng.randrange(len(store)))
+        scrub_latencies.append(time.perf_counter() - tick)
+    
+    stats = store.get_stats()
+    store.close()
+    return append_time, encode_time, play_latencies, scrub_latencies, stats
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="处理帧存储基准测试")
+    parser.add_argument('video', help="测试视频路径")
+    parser.add_argument('--frames', type=int, default=300, help="保存的帧数（默认300）")
+    parser.add_argument('--codecs', nargs='+', default=['jpeg', 'png'], choices=list(FRAME_CODECS),
+                        help="要测试的压缩方式")
+    parser.add_argument('--memory-budget', type=float, default=256.0, help="内存中压缩数据的预算（MB，默认256）")
+    parser.add_argument('--play-fps', type=float, default=25.0, help="回放帧率（默认25）")
+    parser.add_argument('--scrubs', type=int, default=50, help="随机拖动次数（默认50）")
+    args = parser.parse_args()
+    
+    frames = read_frames(args.video, args.frames)
+    if not frames:
+        print(f"❌ 无法读取视频: {args.video}")
+        return
+    raw_mb = sum(frame.nbytes for frame in frames) / 1024 / 1024
+    height, width = frames[0].shape[:2]
+    
+    print(f"📋 {len(frames)}帧 {width}x{height}, 未压缩{raw_mb:.0f}MB, 内存预算{args.memory_budget:.0f}MB\n")
+    print("| 存储 | 添加(ms/帧) | 压缩完成(s) | 内存(MB) | 磁盘(MB) | 回放取帧 平均/最大(ms) | 拖动取帧 平均(ms) |")
+    print("|---|---|---|---|---|---|---|")
+    print(f"| 未压缩列表 | 0.00 | - | {raw_mb:.0f} | 0 | 0.00 / 0.00 | 0.00 |")
+    summaries = []
+    for codec in args.codecs:
+        try:
+            append_time, encode_time, play, scrub, stats = run_store(frames, codec, args)
+        except RuntimeError as e:
+            print(f"| {codec} | 跳过: {e} | | | | | |")
+            continue
+        print(f"| {codec} | {append_time / len(frames) * 1000:.2f} | {encode_time:.1f} | {stats['memory_mb']:.0f} | "
+              f"{stats['spilled_mb']:.0f} | {np.mean(play) * 1000:.2f} / {np.max(play) * 1000:.2f} | "
+              f"{np.mean(scrub) * 1000:.2f} |")
+        summaries.append(format_frame_store_stats(stats))
+    
+    print()
+    for summary in summaries:
+        print(summary)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+检测结果绘制基准测试
+比较逐对象绘制（原实现）与按类别批量绘制 + 标签小图缓存在不同对象数量下的每帧耗时
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.renderer import AnnotationRenderer, DEFAULT_LABEL_LIMIT, class_color
+
+NAMES = {i: name for i, name in enumerate(['plane', 'ship', 'storage-tank', 'vehicle', 'harbor'])}
+
+def make_obbs(count, frame_shape, rng):
+    """生成随机旋转框，返回 (N, 4, 2) 角点、置信度、类别和跟踪ID"""
+    height, width = frame_shape
+    centers = rng.uniform([0, 0], [width, height], (count, 2))
+    sizes = rng.uniform(10, 60, (count, 2))
+    angles = rng.uniform(0, np.pi, count)
+    corners = np.array([[-0.5, -0.5], [0.5, -0.5], [0.5, 0.5], [-0.5, 0.5]])
+    cos, sin = np.cos(angles), np.sin(angles)
+    rotation = np.stack([np.stack([cos, -sin], 1), np.stack([sin, cos], 1)], 1)
+    points = np.einsum('nij,nkj->nki', rotation, corners[None] * sizes[:, None, :]) + centers[:, None, :]
+    confidences = rng.uniform(0.25, 1.0, count)
+    class_ids = rng.integers(0, len(NAMES), count)
+    track_ids = np.arange(1, count + 1)
+    return points.astype(np.float32), confidences, class_ids, track_ids
+
+def render_per_object(frame, boxes, class_ids, confidences, track_ids):
+    """原实现：逐对象绘制检测框、标签背景和文字"""
+    for i, (box, conf, class_id) in enumerate(zip(boxes, confidences, class_ids)):
+        class_name = NAMES[class_id] if class_id < len(NAMES) else f"Class_{class_id}"
+        color = class_color(class_id)
+        points = box.reshape(-1, 2).astype(int)
+        cv2.polylines(frame, [points], True, color, 2)
+        x1, y1 = points.min(axis=0)
+        label = f"ID:{track_ids[i]} {class_name}: {conf:.2f}"
+        label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2)[0]
+        cv2.rectangle(frame, (x1, y1 - label_size[1] - 10), (x1 + label_size[0], y1), color, -1)
+        cv2.putText(frame, label, (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
+    return frame
+
+def measure(render, frame, detections, repeats):
+    """重复绘制测量每帧平均耗时（毫秒），包括帧拷贝"""
+    render(frame.copy(), *detections)  # 预热（填充标签缓存）
+    start = time.perf_counter()
+    for _ in range(repeats):
+        render(frame.copy(), *detections)
+    return (time.perf_counter() - start) / repeats * 1000
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="检测结果绘制基准测试")
+    parser.add_argument('--counts', type=int, nargs='+', default=[10, 50, 100, 200, 500, 1000], help="每帧对象数量")
+    parser.add_argument('--resolution', default='1920x1080', help="帧分辨率（默认1920x1080）")
+    parser.add_argument('--repeats', type=int, default=20, help="每种情况重复绘制的次数（默认20）")
+    args = parser.parse_args()
+    
+    width, height = (int(v) for v in args.resolution.lower().split('x'))
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    
+    with_labels = AnnotationRenderer(label_limit=None)
+    with_lod = AnnotationRenderer(label_limit=DEFAULT_LABEL_LIMIT)
+    
+    def batched(renderer):
+        return lambda image, boxes, class_ids, confidences, track_ids: \
+            renderer.render(image, boxes, class_ids, confidences, track_ids, NAMES)
+    
+    print(f"📋 帧分辨率 {width}x{height}, 每种情况绘制 {args.repeats} 次（细节层次阈值 {DEFAULT_LABEL_LIMIT} 个对象）\n")
+    print("| 对象数 | 逐对象(ms) | 批量+缓存(ms) | 批量+细节层次(ms) | 加速 |")
+    print("|---|---|---|---|---|")
+    for count in args.counts:
+        boxes, confidences, class_ids, track_ids = make_obbs(count, (height, width), rng)
+        legacy_ms = measure(lambda image, *rest: render_per_object(image, *rest), frame,
+                            (boxes, class_ids, confidences, track_ids), args.repeats)
+        batched_ms = measure(batched(with_labels), frame, (boxes, class_ids, confidences, track_ids), args.repeats)
+        lod_ms = measure(batched(with_lod), frame, (boxes, class_ids, confidences, track_ids), args.repeats)
+        print(f"| {count} | {legacy_ms:.2f} | {batched_ms:.2f} | {lod_ms:.2f} | {legacy_ms / lod_ms:.1f}x |")
+
+if __name__ == "__main__":
+    main()
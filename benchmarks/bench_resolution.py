@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+推理分辨率配置基准测试
+逐个配置测量每帧处理耗时（缩放 + 推理 + 换算坐标 + 绘制），
+并以参考配置的检测结果为基准，比较各配置在原始视频坐标下的召回率和精确率
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.engine import YOLOEngine, DEFAULT_MODEL_PATH
+from core.resolution_profiles import RESOLUTION_PROFILES
+from core.segment_parallel import box_iou
+from core.detection_store import bounding_boxes
+from benchmarks.bench_backends import load_frames
+
+def run_profile(engine, profile, frames):
+    """用指定配置逐帧处理，返回每帧耗时（秒）和每帧检测信息"""
+    engine.set_resolution_profile(profile)
+    engine.detection_results.clear()
+    
+    latencies = []
+    results = []
+    for frame_index, frame in enumerate(frames):
+        start = time.perf_counter()
+        _, detection_info = engine.process_frame(engine.downscale_frame(frame), frame_index)
+        latencies.append(time.perf_counter() - start)
+        results.append(detection_info)
+    return np.array(latencies), results
+
+def match_counts(results, reference_results, iou_threshold):
+    """按类别和IoU贪心匹配两组逐帧检测结果，返回 (匹配数, 检测数, 参考检测数)"""
+    matched = detected = expected = 0
+    for detection_info, reference_info in zip(results, reference_results):
+        detections, reference_detections = detection_info['detections'], reference_info['detections']
+        detected += len(detections)
+        expected += len(reference_detections)
+        if len(detections) == 0 or len(reference_detections) == 0:
+            continue
+        
+        ious = box_iou(bounding_boxes(detections, detection_info['bbox_type']),
+                       bounding_boxes(reference_detections, reference_info['bbox_type']))
+        ious[detections['class_id'][:, None] != reference_detections['class_id'][None, :]] = 0.0
+        
+        while True:
+            i, j = np.unravel_index(np.argmax(ious), ious.shape)
+            if ious[i, j] < iou_threshold:
+                break
+            matched += 1
+            ious[i, :] = 0.0
+            ious[:, j] = 0.0
+    return matched, detected, expected
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="推理分辨率配置基准测试")
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH, help=f"模型权重路径（默认 {DEFAULT_MODEL_PATH}）")
+    parser.add_argument('--video', help="测试视频路径（不指定时使用随机帧，只有耗时有参考意义）")
+    parser.add_argument('--frames', type=int, default=50, help="测试帧数（默认50）")
+    parser.add_argument('--backend', choices=['pytorch', 'onnx', 'openvino'], default='pytorch', help="推理后端")
+    parser.add_argument('--profiles', nargs='+', default=list(RESOLUTION_PROFILES), choices=list(RESOLUTION_PROFILES),
+                        help="要测试的分辨率配置")
+    parser.add_argument('--reference', default='native', choices=list(RESOLUTION_PROFILES),
+                        help="作为精度基准的配置（默认 native）")
+    parser.add_argument('--iou', type=float, default=0.5, help="匹配检测框的IoU阈值（默认0.5）")
+    args = parser.parse_args()
+    
+    if not Path(args.model).exists():
+        print(f"❌ 模型文件不存在: {args.model}（可运行 download_weights.py 下载）")
+        return
+    
+    engine = YOLOEngine()
+    engine.set_backend(args.backend)
+    engine.set_tracking_enabled(False)
+    engine.verbose = False
+    if not engine.load_model(args.model):
+        print(f"❌ 模型加载失败: {args.model}")
+        return
+    
+    frames = load_frames(args.video, args.frames)
+    height, width = frames[0].shape[:2]
+    print(f"📋 模型: {args.model}, 后端: {args.backend}, 测试帧: {len(frames)}帧 {width}x{height}"
+          f"{' (随机帧)' if args.video is None else ''}")
+    
+    # 先运行基准配置（同时作为预热）
+    profiles = [args.reference] + [profile for profile in args.profiles if profile != args.reference]
+    _, reference_results = run_profile(engine, args.reference, frames)
+    
+    print("\n| 配置 | 输入尺寸 | 缩放长边 | 平均(ms) | P95(ms) | FPS | 加速 | 检测数 | 召回率 | 精确率 |")
+    print("|---|---|---|---|---|---|---|---|---|---|")
+    baseline_ms = None
+    for profile in profiles:
+        latencies, results = run_profile(engine, profile, frames)
+        mean_ms = latencies.mean() * 1000
+        baseline_ms = baseline_ms or mean_ms
+        matched, detected, expected = match_counts(results, reference_results, args.iou)
+        recall = matched / expected if expected else 1.0
+        precision = matched / detected if detected else 1.0
+        
+        settings = RESOLUTION_PROFILES[profile]
+        print(f"| {profile} | {settings['imgsz'] or '默认'} | {settings['max_side'] or '-'} | {mean_ms:.1f} | "
+              f"{np.percentile(latencies, 95) * 1000:.1f} | {1000 / mean_ms:.1f} | {baseline_ms / mean_ms:.2f}x | "
+              f"{detected} | {recall:.3f} | {precision:.3f} |")
+    
+    print(f"\n召回率/精确率以 {args.reference} 配置的检测结果为基准（同类别且IoU≥{args.iou}视为匹配）")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+稀疏解码基准测试
+比较逐帧read()、grab()跳过、跳转和自动模式的解码耗时，并标定跳转开销 SEEK_COST_FRAMES
+"""
+
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+import cv2
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.frame_sampler import FrameSampler, constant_fps_timestamps
+from core.video_index import build_video_index
+from core.video_reader import SparseFrameReader
+
+def run_mode(video_path, sampled_indices, video_index, mode):
+    """按指定解码方式读取全部采样帧，返回耗时和统计"""
+    capture = cv2.VideoCapture(video_path)
+    try:
+        reader = SparseFrameReader(capture, sampled_indices, video_index, mode=mode)
+        start = time.perf_counter()
+        frame_total = sum(1 for _ in reader)
+        elapsed = time.perf_counter() - start
+        return elapsed, frame_total, reader.get_stats()
+    finally:
+        capture.release()
+
+def calibrate_seek_cost(video_path, video_index, samples=30):
+    """测量一次跳转的额外开销，折算为顺序grab的帧数"""
+    capture = cv2.VideoCapture(video_path)
+    try:
+        # 顺序grab的平均耗时
+        grab_frames = min(200, video_index.frame_count)
+        start = time.perf_counter()
+        for _ in range(grab_frames):
+            if not capture.grab():
+                break
+        grab_time = (time.perf_counter() - start) / max(1, grab_frames)
+        
+        # 随机跳转到非关键帧，扣除从关键帧解码到目标帧的开销
+        overheads = []
+        for _ in range(samples):
+            target = random.randrange(0, video_index.frame_count)
+            keyframe = video_index.keyframe_before(target) or 0
+            start = time.perf_counter()
+            capture.set(cv2.CAP_PROP_POS_FRAMES, target)
+            capture.grab()
+            seek_time = time.perf_counter() - start
+            overheads.append(seek_time / grab_time - (target - keyframe + 1))
+        
+        overheads.sort()
+        return grab_time, overheads[len(overheads) // 2]
+    finally:
+        capture.release()
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="稀疏解码基准测试")
+    parser.add_argument('video', help="测试视频路径")
+    parser.add_argument('--target-fps', type=float, default=5.0, help="目标处理帧率（默认5）")
+    parser.add_argument('--modes', nargs='+', default=['read', 'grab', 'seek', 'auto'],
+                        choices=['read', 'grab', 'seek', 'auto'], help="要测试的解码方式")
+    parser.add_argument('--calibrate', action='store_true', help="标定跳转开销 SEEK_COST_FRAMES")
+    args = parser.parse_args()
+    
+    video_index = build_video_index(args.video)
+    if video_index is None:
+        print(f"❌ 无法打开视频: {args.video}")
+        return
+    
+    capture = cv2.VideoCapture(args.video)
+    original_fps = capture.get(cv2.CAP_PROP_FPS)
+    capture.release()
+    
+    timestamps = video_index.timestamps or constant_fps_timestamps(video_index.frame_count, original_fps)
+    sampled_indices = FrameSampler(args.target_fps).sample(timestamps)
+    
+    print(f"📋 视频: {video_index.frame_count}帧, {original_fps:.2f}FPS, "
+          f"GOP={video_index.gop_size() or '未知'}, 关键帧{len(video_index.keyframes)}个")
+    print(f"📋 目标{args.target_fps}FPS, 采样{len(sampled_indices)}帧")
+    
+    baseline = None
+    for mode in args.modes:
+        elapsed, frame_total, stats = run_mode(args.video, sampled_indices, video_index, mode)
+        if baseline is None:
+            baseline = elapsed
+        print(f"  • {mode:5s}: {elapsed:7.2f}s, 产出{frame_total}帧, 完整解码{stats['decoded_count']}帧, "
+              f"跳过{stats['grabbed_count']}帧, 跳转{stats['seek_count']}次, 加速 {baseline / elapsed:.2f}x")
+    
+    if args.calibrate:
+        if not video_index.has_keyframes:
+            print("❌ 视频索引没有关键帧信息，无法标定跳转开销")
+            return
+        grab_time, seek_cost = calibrate_seek_cost(args.video, video_index)
+        print(f"📋 平均grab耗时 {grab_time * 1000:.2f}ms, 跳转开销约 {seek_cost:.1f} 帧 (SEEK_COST_FRAMES)")
+
+if __name__ == "__main__":
+    main()
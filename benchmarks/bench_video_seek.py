@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+视频组件读帧基准测试
+比较视频组件原实现（每次读取前都设置 CAP_PROP_POS_FRAMES）与顺序读取 + 关键帧索引跳转的
+播放耗时和CPU时间、随机跳转和小步拖动（前后移动几帧到几十帧）的延迟，并检查两种方式读到的帧一致
+"""
+
+import sys
+import time
+import zlib
+import random
+import argparse
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.video_index import build_video_index
+from core.video_reader import SparseFrameReader
+
+class LegacyReader:
+    """原实现：每次读取前跳转到目标帧"""
+    
+    def __init__(self, video_capture):
+        self.video_capture = video_capture
+    
+    def read_at(self, target):
+        self.video_capture.set(cv2.CAP_PROP_POS_FRAMES, target)
+        ret, frame = self.video_capture.read()
+        return frame if ret else None
+
+def measure(reader, targets):
+    """依次读取目标帧，返回 (耗时, CPU时间, 每帧延迟列表, 帧校验和列表)"""
+    latencies = []
+    checksums = []
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for target in targets:
+        tick = time.perf_counter()
+        frame = reader.read_at(target)
+        latencies.append(time.perf_counter() - tick)
+        checksums.append(zlib.crc32(frame) if frame is not None else None)
+    return time.perf_counter() - wall_start, time.process_time() - cpu_start, latencies, checksums
+
+def format_latency(latencies):
+    """平均 / p95 延迟（毫秒）"""
+    ordered = sorted(latencies)
+    return f"{np.mean(latencies) * 1000:.1f} / {ordered[int(len(ordered) * 0.95)] * 1000:.1f}"
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="视频组件读帧基准测试")
+    parser.add_argument('video', help="测试视频路径")
+    parser.add_argument('--play-frames', type=int, default=300, help="顺序播放的帧数（默认300）")
+    parser.add_argument('--scrubs', type=int, default=50, help="随机拖动次数（默认50）")
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    video_index = build_video_index(args.video)
+    if video_index is None:
+        print(f"❌ 无法打开视频: {args.video}")
+        return
+    index_time = time.perf_counter() - start
+    
+    rng = random.Random(0)
+    play_targets = list(range(min(args.play_frames, video_index.frame_count)))
+    scrub_targets = [rng.randrange(video_index.frame_count) for _ in range(args.scrubs)]
+    drag_targets = [video_index.frame_count // 2]
+    for _ in range(args.scrubs * 4):
+        drag_targets.append(max(0, min(video_index.frame_count - 1, drag_targets[-1] + rng.randint(-10, 30))))
+    
+    print(f"📋 {video_index.frame_count}帧, 关键帧{len(video_index.keyframes)}个 (GOP {video_index.gop_size()}), "
+          f"建立索引{index_time:.2f}秒\n")
+    print("| 实现 | 播放耗时(s) | 播放CPU(s) | 播放每帧(ms) | 随机跳转 平均/p95(ms) | 小步拖动 平均/p95(ms) | 帧一致 |")
+    print("|---|---|---|---|---|---|---|")
+    
+    reference = None
+    for name, make_reader in (('每帧跳转（原实现）', LegacyReader),
+                              ('顺序读取+关键帧跳转', lambda capture: SparseFrameReader(capture, [], video_index))):
+        capture = cv2.VideoCapture(args.video)
+        reader = make_reader(capture)
+        play_time, play_cpu, _, play_frames = measure(reader, play_targets)
+        _, _, scrub_latencies, scrub_frames = measure(reader, scrub_targets)
+        _, _, drag_latencies, drag_frames = measure(reader, drag_targets)
+        capture.release()
+        
+        checksums = play_frames + scrub_frames + drag_frames
+        if reference is None:
+            reference, consistent = checksums, '-'
+        else:
+            consistent = '✅' if None not in checksums and checksums == reference else '❌'
+        print(f"| {name} | {play_time:.2f} | {play_cpu:.2f} | {play_time / len(play_targets) * 1000:.2f} | "
+              f"{format_latency(scrub_latencies)} | {format_latency(drag_latencies)} | {consistent} |")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+YOLO无界面批处理工具
+对视频文件、通配符或目录中的视频执行检测/跟踪/导出，以JSON lines格式输出进度，不依赖PyQt6
+"""
+
+import re
+import sys
+import json
+import glob
+import time
+import signal
+import argparse
+import threading
+from pathlib import Path
+
+from core.engine import YOLOEngine, DEFAULT_MODEL_PATH
+from core.job_queue import JobScheduler, JOB_DONE, default_torch_threads
+from core.live_source import is_live_source
+from core.resolution_profiles import RESOLUTION_PROFILES, DEFAULT_RESOLUTION_PROFILE
+from core.label_writer import LABEL_LAYOUTS, DEFAULT_LABEL_LAYOUT
+from core.model_cache import format_model_cache_stats
+
+# 支持的视频格式
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
+
+# 退出码
+EXIT_OK = 0  # 全部处理成功
+EXIT_FAILED = 1  # 有视频处理失败
+EXIT_USAGE = 2  # 参数错误或没有找到视频
+EXIT_INTERRUPTED = 130  # 被中断
+
+def collect_videos(inputs, recursive=False):
+    """根据文件、通配符或目录收集视频文件列表（去重并保持顺序），摄像头编号和视频流地址原样保留"""
+    videos = []
+    seen = set()
+    for item in inputs:
+        if is_live_source(item):
+            if item not in seen:
+                seen.add(item)
+                videos.append(item)
+            continue
+        
+        path = Path(item)
+        if path.is_dir():
+            pattern = '**/*' if recursive else '*'
+            candidates = sorted(p for p in path.glob(pattern) if p.is_file() and p.suffix.lower() in VIDEO_EXTENSIONS)
+        elif path.is_file():
+            candidates = [path]
+        else:
+            candidates = sorted(Path(p) for p in glob.glob(item, recursive=recursive)
+                                if Path(p).suffix.lower() in VIDEO_EXTENSIONS)
+        
+        for candidate in candidates:
+            key = candidate.resolve()
+            if key not in seen:
+                seen.add(key)
+                videos.append(candidate)
+    return videos
+
+def source_stem(video):
+    """输出文件名前缀：视频文件名，或由视频流地址转换的安全名称"""
+    if isinstance(video, Path):
+        return video.stem
+    return re.sub(r'[^0-9A-Za-z]+', '_', str(video)).strip('_') or 'live'
+
+def output_stems(videos):
+    """每个视频的输出文件名前缀，重名时追加序号（clip、clip_2 ...），避免多个任务写同一个文件"""
+    stems = []
+    used = set()  # 不区分大小写，兼容大小写不敏感的文件系统
+    for video in videos:
+        stem = candidate = source_stem(video)
+        number = 1
+        while candidate.lower() in used:
+            number += 1
+            candidate = f"{stem}_{number}"
+        used.add(candidate.lower())
+        stems.append(candidate)
+    return stems
+
+class JsonLinesReporter:
+    """将处理引擎的事件以JSON lines格式输出"""
+    
+    def __init__(self, stream, verbose=False, video=None, lock=None):
+        self.stream = stream
+        self.verbose = verbose  # 是否输出逐帧信息和预取统计
+        self.video = video
+        self.lock = lock or threading.Lock()  # 多个任务并发输出时共用同一把锁
+        self.video_errors = []
+        self.last_progress = -1
+    
+    def write(self, event, **fields):
+        """输出一条JSON记录"""
+        record = {'event': event, 'time': round(time.time(), 3)}
+        if self.video is not None:
+            record['video'] = self.video
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self.lock:
+            self.stream.write(line)
+            self.stream.flush()
+    
+    def __call__(self, event, *args):
+        """处理引擎事件回调"""
+        if event == 'progress_updated':
+            processed, expected, progress = args
+            # 只在百分比变化时输出，避免逐帧刷屏
+            if progress != self.last_progress:
+                self.last_progress = progress
+                self.write('progress', processed=processed, expected=expected, percent=progress)
+        elif event == 'fps_updated':
+            self.write('fps', fps=round(args[0], 2))
+        elif event == 'error_occurred':
+            self.video_errors.append(args[0])
+            self.write('error', message=args[0])
+        elif event == 'model_loaded':
+            self.write('model_loaded', model=args[0])
+        elif event == 'video_info_updated':
+            total_frames, original_fps, skip_frames, target_fps = args
+            self.write('video_info', total_frames=total_frames, original_fps=round(original_fps, 3),
+                       target_fps=target_fps)
+        elif event == 'detection_info_updated' and self.verbose:
+            self.write('info', message=args[0])
+        elif event == 'prefetch_stats_updated' and self.verbose:
+            self.write('prefetch', **args[0])
+        elif event == 'motion_stats_updated' and self.verbose:
+            self.write('motion', **args[0])
+        elif event == 'label_stats_updated' and self.verbose:
+            self.write('labels', **args[0])
+        elif event == 'frame_processed' and 'latency_ms' in args[1]:
+            # 实时视频流逐帧报告采集到结果的延迟
+            detection_info = args[1]
+            self.write('latency', frame_id=detection_info['frame_id'], latency_ms=round(detection_info['latency_ms'], 1),
+                       count=detection_info['count'])
+        elif event == 'rate_adjusted':
+            self.write('rate_adjustment', **args[0])
+        elif event == 'live_stats_updated':
+            self.write('live_stats', **{key: round(value, 1) for key, value in args[0].items()})
+
+def build_parser():
+    """创建命令行参数解析器"""
+    parser = argparse.ArgumentParser(description="YOLO无界面批处理工具（输出JSON lines进度）")
+    parser.add_argument('inputs', nargs='*', help="视频文件、通配符、目录、摄像头编号或视频流地址（rtsp://、http://）")
+    parser.add_argument('--recursive', action='store_true', help="递归搜索目录和通配符中的视频")
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH, help=f"模型权重路径（默认 {DEFAULT_MODEL_PATH}）")
+    parser.add_argument('--backend', choices=['pytorch', 'onnx', 'openvino'], default='pytorch',
+                        help="推理后端（onnx/openvino首次使用时自动导出并缓存）")
+    parser.add_argument('--auto-model', action='store_true',
+                        help="按校准结果自动选择能达到目标帧率的最大模型（先运行 --calibrate）")
+    parser.add_argument('--calibrate', metavar='WxH', help="在指定分辨率下校准各尺寸模型的处理帧率后退出，如 1280x720")
+    parser.add_argument('--resolution', choices=list(RESOLUTION_PROFILES), default=DEFAULT_RESOLUTION_PROFILE,
+                        help="推理分辨率配置: " + ", ".join(f"{name}={profile['description']}"
+                                                       for name, profile in RESOLUTION_PROFILES.items()))
+    parser.add_argument('--roi', metavar='FILE',
+                        help="ROI和排除区域文件（JSON），不指定时使用各视频旁的同名 .roi.json 文件（如果存在）")
+    parser.add_argument('--target-fps', type=int, default=25, help="目标处理帧率（默认25）")
+    parser.add_argument('--tracker', choices=['ByteTrack', 'BoT-SORT'], default='ByteTrack', help="跟踪算法")
+    parser.add_argument('--no-track', action='store_true', help="关闭跟踪，仅检测")
+    parser.add_argument('--batch-size', default='1', help="仅检测时的批大小（整数或auto）")
+    parser.add_argument('--prefetch', type=int, default=8, help="解码预取队列深度（0表示不启用）")
+    parser.add_argument('--decode-mode', choices=['auto', 'grab', 'seek', 'read'], default='auto', help="未采样帧的解码方式")
+    parser.add_argument('--no-probe', action='store_true', help="不扫描视频索引，按固定帧率采样")
+    parser.add_argument('--adaptive', action='store_true', help="根据处理速度自动调整采样率（--target-fps作为上限）")
+    parser.add_argument('--min-fps', type=float, default=1.0, help="自适应采样的帧率下限（默认1）")
+    parser.add_argument('--target-rtf', type=float, default=1.0, help="自适应采样的实时倍率目标（默认1.0，即与实时同步）")
+    parser.add_argument('--target-latency', type=float, help="实时视频流的延迟目标（毫秒）")
+    parser.add_argument('--adaptive-resolution', action='store_true', help="采样率到下限仍跟不上时降低推理分辨率")
+    parser.add_argument('--motion-gate', action='store_true', help="画面静止时跳过推理，复用上一次的检测结果")
+    parser.add_argument('--motion-threshold', type=float, default=0.005,
+                        help="运动门控的变化像素比例阈值，越小越灵敏（默认0.005）")
+    parser.add_argument('--max-skip', type=int, default=10, help="运动门控最多连续跳过的帧数（默认10）")
+    parser.add_argument('--tiled', action='store_true',
+                        help="分块推理超大画面（航拍图像），只推理发生变化的块，合并结果没有跟踪ID")
+    parser.add_argument('--tile-size', type=int, default=640, help="分块推理的块边长（默认640）")
+    parser.add_argument('--tile-overlap', type=float, default=0.2, help="相邻块的重叠比例（默认0.2）")
+    parser.add_argument('--keyframe-interval', type=int, default=30, help="分块推理每隔多少帧推理全部块（默认30）")
+    parser.add_argument('--live-queue', type=int, default=1, help="实时视频流采集队列保留的最新帧数（默认1）")
+    parser.add_argument('--simulate-live', action='store_true', help="把视频文件按原始帧率当作实时视频流处理（测试用）")
+    parser.add_argument('--workers', type=int, default=1, help="分段并行处理的进程数（默认1）")
+    parser.add_argument('--jobs', type=int, default=1, help="同时处理的视频数，每个任务线程常驻一个模型（默认1）")
+    parser.add_argument('--model-cache-mb', type=float, help="每个任务线程的模型缓存内存预算（MB，默认不限制）")
+    parser.add_argument('--output-dir', default='output', help="输出目录（默认 output）")
+    parser.add_argument('--save-txt', action='store_true', help="保存YOLO格式txt标签")
+    parser.add_argument('--save-conf', action='store_true', help="txt标签中包含置信度")
+    parser.add_argument('--label-layout', choices=list(LABEL_LAYOUTS), default=DEFAULT_LABEL_LAYOUT,
+                        help="标签输出方式：txt每帧一个文件，tar/zip写入单个归档并生成索引（默认txt）")
+    parser.add_argument('--export', choices=['json', 'jsonl', 'csv', 'parquet', 'npz'],
+                        help="导出检测结果文件（jsonl/csv/parquet在处理过程中流式写出，npz为列式存储的单个文件）")
+    parser.add_argument('--verbose', action='store_true', help="输出逐帧检测信息和预取统计")
+    return parser
+
+def run_calibration(args, reporter):
+    """校准各尺寸模型的处理帧率"""
+    try:
+        width, height = (int(v) for v in args.calibrate.lower().split('x'))
+    except ValueError:
+        reporter.write('error', message=f"无效的分辨率: {args.calibrate}")
+        return EXIT_USAGE
+    
+    engine = YOLOEngine(event_callback=reporter)
+    engine.model_path = args.model
+    engine.set_backend(args.backend)
+    engine.set_resolution_profile(args.resolution)
+    measured = engine.calibrate_models((height, width), download=True)
+    reporter.write('calibration', backend=args.backend, resolution=f"{width}x{height}", profile=args.resolution,
+                   fps={size: round(fps, 2) for size, fps in measured.items()})
+    return EXIT_OK if measured else EXIT_FAILED
+
+def main():
+    """主函数"""
+    parser = build_parser()
+    args = parser.parse_args()
+    
+    reporter = JsonLinesReporter(sys.stdout, verbose=args.verbose)
+    
+    # stdout只保留JSON lines，其余文本日志输出到stderr
+    sys.stdout = sys.stderr
+    
+    batch_size = args.batch_size
+    if batch_size != 'auto':
+        try:
+            batch_size = int(batch_size)
+        except ValueError:
+            reporter.write('error', message=f"无效的批大小: {args.batch_size}")
+            return EXIT_USAGE
+    
+    if args.calibrate:
+        return run_calibration(args, reporter)
+    
+    videos = collect_videos(args.inputs, args.recursive)
+    if not videos:
+        reporter.write('error', message="没有找到视频文件")
+        return EXIT_USAGE
+    
+    # 每个视频一个输出器，按任务转发调度器事件
+    reporters = {}
+    
+    def handle_job_event(event, job, *event_args):
+        job_reporter = reporters[job.job_id]
+        if event == 'job_started':
+            job_reporter.write('video_start')
+        elif event == 'job_finished':
+            info = job.to_dict()
+            job_reporter.write('video_done', success=job.status == JOB_DONE, status=job.status,
+                               elapsed=round(info['elapsed'], 3), processed_frames=job.processed_frames,
+                               summary=job.summary)
+        else:
+            job_reporter(event, *event_args)
+    
+    jobs = max(1, args.jobs)
+    scheduler = JobScheduler(jobs, event_callback=handle_job_event,
+                             torch_threads=default_torch_threads(jobs) if jobs > 1 else None,
+                             model_memory_budget_mb=args.model_cache_mb)
+    
+    # 收到终止信号时按中断处理
+    def handle_terminate(signum, frame):
+        raise KeyboardInterrupt()
+    signal.signal(signal.SIGTERM, handle_terminate)
+    
+    reporter.write('start', videos=len(videos), jobs=jobs)
+    output_dir = Path(args.output_dir)
+    if args.export:
+        output_dir.mkdir(parents=True, exist_ok=True)
+    
+    submitted = []
+    for video, stem in zip(videos, output_stems(videos)):
+        label_dir = output_dir / f"{stem}_labels" if args.save_txt else None
+        export_path = output_dir / f"{stem}_results.{args.export}" if args.export else None
+        job = scheduler.submit(
+            str(video),
+            model_path=args.model,
+            backend=args.backend,
+            auto_model_size=args.auto_model,
+            resolution_profile=args.resolution,
+            roi_path=args.roi,
+            target_fps=args.target_fps,
+            tracker=args.tracker,
+            tracking_enabled=not args.no_track,
+            batch_size=batch_size,
+            prefetch_size=args.prefetch,
+            decode_mode=args.decode_mode,
+            probe_timestamps=not args.no_probe,
+            parallel_workers=args.workers,
+            live_queue_size=args.live_queue,
+            simulate_live=args.simulate_live,
+            adaptive_rate=args.adaptive,
+            adaptive_options={
+                'min_fps': args.min_fps,
+                'target_rtf': args.target_rtf,
+                'target_latency_ms': args.target_latency,
+                'adaptive_resolution': args.adaptive_resolution
+            },
+            motion_gate=args.motion_gate,
+            motion_options={
+                'threshold': args.motion_threshold,
+                'max_skip': args.max_skip
+            },
+            tiled_inference=args.tiled,
+            tile_options={
+                'tile_size': args.tile_size,
+                'overlap': args.tile_overlap,
+                'keyframe_interval': args.keyframe_interval
+            },
+            save_txt=args.save_txt,
+            save_conf=args.save_conf,
+            label_layout=args.label_layout,
+            output_dir=str(label_dir) if label_dir else None,
+            export_format=args.export,
+            export_path=str(export_path) if export_path else None
+        )
+        reporters[job.job_id] = JsonLinesReporter(reporter.stream, args.verbose, str(video), reporter.lock)
+        submitted.append(job)
+    
+    try:
+        scheduler.start()
+        scheduler.wait()
+        scheduler.shutdown()
+    
+    except KeyboardInterrupt:
+        # 取消后等待工作线程结束，正在处理的任务关闭标签和导出文件后再退出
+        scheduler.shutdown(cancel_pending=True)
+        reporter.write('interrupted')
+        return EXIT_INTERRUPTED
+    
+    failed_count = sum(1 for job in submitted if job.status != JOB_DONE)
+    model_stats = scheduler.get_model_stats()
+    # 文本摘要输出到stderr，stdout只保留JSON lines
+    for worker_id, stats in sorted(model_stats.items()):
+        print(f"[工作线程 {worker_id}] {format_model_cache_stats(stats)}")
+    reporter.write('done', videos=len(videos), failed=failed_count, models=list(model_stats.values()))
+    return EXIT_OK if failed_count == 0 else EXIT_FAILED
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列式检测结果存储
+检测结果按列保存在可增长的NumPy数组中（每个对象一行，检测框统一为8个浮点数），
+按帧的偏移量索引，按需生成与JSON导出格式一致的每帧视图，可保存为单个 .npz 文件。
+每帧的推理结果是一个结构化数组（类别、置信度、跟踪ID、检测框），绘制、标签导出和统计都直接读取它
+"""
+
+import json
+import numpy as np
+
+# 检测框类型编码
+BBOX_XYXY = 0
+BBOX_OBB = 1
+BBOX_TYPES = {'xyxy': BBOX_XYXY, 'obb': BBOX_OBB}
+BBOX_TYPE_NAMES = {code: name for name, code in BBOX_TYPES.items()}
+
+# 检测框列宽：xyxy使用前4列，OBB使用全部8列（4个角点）
+BBOX_WIDTH = 8
+
+# 没有跟踪ID时的占位值
+NO_TRACK_ID = -1
+
+# 每帧检测信息中由存储的列表示的字段，其余字段作为附加字段保存
+FRAME_FIELDS = ('frame_id', 'count', 'detections', 'bbox_type')
+
+# 保存文件的格式版本
+STORE_VERSION = 1
+
+# 每帧检测结果的结构化数组类型
+DETECTION_DTYPE = np.dtype([
+    ('class_id', np.int32),
+    ('confidence', np.float32),
+    ('track_id', np.int64),
+    ('bbox', np.float32, (BBOX_WIDTH,))
+])
+
+def make_detections(boxes, class_ids, confidences, track_ids=None):
+    """
+    由推理结果的数组一次性生成结构化检测数组。
+    boxes: (N, 4) 的xyxy或 (N, 4, 2)/(N, 8) 的OBB角点；track_ids 长度与检测数不一致时视为没有跟踪ID
+    """
+    count = 0 if boxes is None else len(boxes)
+    detections = np.zeros(count, dtype=DETECTION_DTYPE)
+    if count == 0:
+        return detections
+    flat = np.asarray(boxes, dtype=np.float32).reshape(count, -1)
+    detections['bbox'][:, :flat.shape[1]] = flat
+    detections['class_id'] = class_ids
+    detections['confidence'] = confidences
+    if track_ids is not None and len(track_ids) == count:
+        detections['track_id'] = track_ids
+    else:
+        detections['track_id'] = NO_TRACK_ID
+    return detections
+
+def detection_boxes(detections, bbox_type):
+    """取出检测框：xyxy为 (N, 4)，OBB为 (N, 4, 2) 的角点（视图，不复制）"""
+    if bbox_type == 'obb':
+        return detections['bbox'].reshape(-1, 4, 2)
+    return detections['bbox'][:, :4]
+
+def bounding_boxes(detections, bbox_type):
+    """检测框的外接矩形 (N, 4)"""
+    if bbox_type == 'obb':
+        points = detections['bbox'].reshape(-1, 4, 2)
+        return np.concatenate([points.min(axis=1), points.max(axis=1)], axis=1)
+    return detections['bbox'][:, :4].copy()
+
+def scale_detections(detections, bbox_type, scale_x, scale_y):
+    """原地按比例缩放检测框坐标"""
+    width = BBOX_WIDTH if bbox_type == 'obb' else 4
+    detections['bbox'][:, 0:width:2] *= scale_x
+    detections['bbox'][:, 1:width:2] *= scale_y
+
+def name_mapping(names):
+    """把模型的类别名称（列表或字典）转换为 类别ID -> 名称 的字典"""
+    if not names:
+        return {}
+    return dict(names) if isinstance(names, dict) else dict(enumerate(names))
+
+def grow(array, size):
+    """容量不足时按倍数扩容（保留已有数据）"""
+    if size <= len(array):
+        return array
+    capacity = max(size, len(array) * 2, 16)
+    grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+class DetectionStore:
+    """按列存储的检测结果，接口与原先的检测信息列表兼容（append/clear/len/迭代/下标）"""
+    
+    def __init__(self, frame_capacity=1024, object_capacity=16384):
+        """frame_capacity/object_capacity: 初始容量，不够时自动翻倍"""
+        self.frame_capacity = frame_capacity
+        self.object_capacity = object_capacity
+        self.clear()
+    
+    def clear(self):
+        """清空全部结果"""
+        # 按帧的列
+        self.frame_ids = np.zeros(self.frame_capacity, dtype=np.int64)
+        self.offsets = np.zeros(self.frame_capacity + 1, dtype=np.int64)  # 第i帧的对象为 offsets[i]:offsets[i+1]
+        self.frame_extras = {}  # 帧位置 -> 附加字段（复用标记、延迟等），只保存有附加字段的帧
+        
+        # 按对象的列
+        self.class_ids = np.zeros(self.object_capacity, dtype=np.int32)
+        self.confidences = np.zeros(self.object_capacity, dtype=np.float32)
+        self.track_ids = np.zeros(self.object_capacity, dtype=np.int64)
+        self.bbox_types = np.zeros(self.object_capacity, dtype=np.uint8)
+        self.bboxes = np.zeros((self.object_capacity, BBOX_WIDTH), dtype=np.float32)
+        
+        self.class_names = {}  # 类别ID -> 名称
+        self.names_source = None  # 最近合并过的模型类别名称（相同对象不重复合并）
+        self.frame_count = 0
+        self.object_count = 0
+    
+    def __len__(self):
+        return self.frame_count
+    
+    def __bool__(self):
+        return self.frame_count > 0
+    
+    def __iter__(self):
+        for position in range(self.frame_count):
+            yield self.get_frame(position)
+    
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self.get_frame(i) for i in range(*position.indices(self.frame_count))]
+        if position < 0:
+            position += self.frame_count
+        if not 0 <= position < self.frame_count:
+            raise IndexError("检测结果索引超出范围")
+        return self.get_frame(position)
+    
+    def reserve(self, frame_count, object_count):
+        """确保能容纳指定数量的帧和对象"""
+        if frame_count > len(self.frame_ids):
+            self.frame_ids = grow(self.frame_ids, frame_count)
+            self.offsets = grow(self.offsets, len(self.frame_ids) + 1)
+        if object_count > len(self.class_ids):
+            self.class_ids = grow(self.class_ids, object_count)
+            self.confidences = grow(self.confidences, len(self.class_ids))
+            self.track_ids = grow(self.track_ids, len(self.class_ids))
+            self.bbox_types = grow(self.bbox_types, len(self.class_ids))
+            self.bboxes = grow(self.bboxes, len(self.class_ids))
+    
+    def append(self, detection_info, names=None):
+        """
+        追加一帧的检测信息（含结构化数组 detections 和检测框类型 bbox_type），
+        names 为模型的类别名称，其余字段作为帧的附加字段保存
+        """
+        detections = detection_info['detections']
+        count = len(detections)
+        start = self.object_count
+        self.reserve(self.frame_count + 1, start + count)
+        
+        if count:
+            end = start + count
+            self.class_ids[start:end] = detections['class_id']
+            self.confidences[start:end] = detections['confidence']
+            self.track_ids[start:end] = detections['track_id']
+            self.bboxes[start:end] = detections['bbox']
+            self.bbox_types[start:end] = BBOX_TYPES[detection_info['bbox_type']]
+            self.object_count = end
+            if names is not None and names is not self.names_source:
+                self.names_source = names
+                self.class_names.update(name_mapping(names))
+        
+        position = self.frame_count
+        self.frame_ids[position] = detection_info['frame_id']
+        self.offsets[position + 1] = self.object_count
+        extras = {key: value for key, value in detection_info.items() if key not in FRAME_FIELDS}
+        if extras:
+            self.frame_extras[position] = extras
+        self.frame_count += 1
+    
+    def frame_slice(self, position):
+        """第 position 帧的对象在按对象的列中的切片"""
+        return slice(int(self.offsets[position]), int(self.offsets[position + 1]))
+    
+    def class_name(self, class_id):
+        """获取类别名称"""
+        return self.class_names.get(int(class_id), f"Class_{class_id}")
+    
+    def get_frame(self, position):
+        """生成第 position 帧的检测信息视图（JSON导出格式，每个对象一个字典）"""
+        objects_slice = self.frame_slice(position)
+        objects = []
+        for i in range(objects_slice.start, objects_slice.stop):
+            class_id = int(self.class_ids[i])
+            track_id = int(self.track_ids[i])
+            if self.bbox_types[i] == BBOX_OBB:
+                bbox = self.bboxes[i].reshape(4, 2).tolist()
+            else:
+                bbox = [int(v) for v in self.bboxes[i, :4]]
+            objects.append({
+                'bbox': bbox,
+                'bbox_type': BBOX_TYPE_NAMES[int(self.bbox_types[i])],
+                'confidence': float(self.confidences[i]),
+                'class_id': class_id,
+                'class_name': self.class_name(class_id),
+                'track_id': track_id if track_id != NO_TRACK_ID else None
+            })
+        
+        detection_info = {
+            'frame_id': int(self.frame_ids[position]),
+            'objects': objects,
+            'count': len(objects)
+        }
+        detection_info.update(self.frame_extras.get(position, {}))
+        return detection_info
+    
+    def frame_detections(self, position):
+        """获取第 position 帧的结构化检测数组和检测框类型"""
+        objects_slice = self.frame_slice(position)
+        detections = np.zeros(objects_slice.stop - objects_slice.start, dtype=DETECTION_DTYPE)
+        detections['class_id'] = self.class_ids[objects_slice]
+        detections['confidence'] = self.confidences[objects_slice]
+        detections['track_id'] = self.track_ids[objects_slice]
+        detections['bbox'] = self.bboxes[objects_slice]
+        obb = len(detections) > 0 and self.bbox_types[objects_slice.start] == BBOX_OBB
+        return detections, 'obb' if obb else 'xyxy'
+    
+    def columns(self):
+        """获取按对象的列（只读视图，不复制），另含每个对象所属的帧号"""
+        count = self.object_count
+        counts = np.diff(self.offsets[:self.frame_count + 1])
+        return {
+            'frame_id': np.repeat(self.frame_ids[:self.frame_count], counts),
+            'class_id': self.class_ids[:count],
+            'confidence': self.confidences[:count],
+            'track_id': self.track_ids[:count],
+            'bbox_type': self.bbox_types[:count],
+            'bbox': self.bboxes[:count]
+        }
+    
+    def class_counts(self):
+        """统计各类别的检测数量（类别名称 -> 数量）"""
+        if self.object_count == 0:
+            return {}
+        counts = np.bincount(self.class_ids[:self.object_count])
+        class_counts = {}
+        for class_id in np.flatnonzero(counts):
+            name = self.class_name(class_id)
+            class_counts[name] = class_counts.get(name, 0) + int(counts[class_id])
+        return class_counts
+    
+    def summary(self):
+        """获取检测摘要信息"""
+        if self.frame_count == 0:
+            return {}
+        return {
+            'total_frames': self.frame_count,
+            'total_detections': self.object_count,
+            'average_detections_per_frame': self.object_count / self.frame_count,
+            'class_counts': self.class_counts()
+        }
+    
+    def save(self, path):
+        """保存为单个 .npz 文件"""
+        meta = {
+            'version': STORE_VERSION,
+            'class_names': {str(class_id): name for class_id, name in self.class_names.items()},
+            'frame_extras': {str(position): extras for position, extras in self.frame_extras.items()}
+        }
+        with open(path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                frame_ids=self.frame_ids[:self.frame_count],
+                offsets=self.offsets[:self.frame_count + 1],
+                class_ids=self.class_ids[:self.object_count],
+                confidences=self.confidences[:self.object_count],
+                track_ids=self.track_ids[:self.object_count],
+                bbox_types=self.bbox_types[:self.object_count],
+                bboxes=self.bboxes[:self.object_count],
+                meta=np.array(json.dumps(meta, ensure_ascii=False))
+            )
+    
+    @classmethod
+    def load(cls, path):
+        """从 save() 保存的文件加载"""
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            if meta.get('version') != STORE_VERSION:
+                raise ValueError(f"不支持的检测结果文件版本: {meta.get('version')}")
+            
+            store = cls(frame_capacity=max(1, len(data['frame_ids'])), object_capacity=max(1, len(data['class_ids'])))
+            store.frame_count = len(data['frame_ids'])
+            store.object_count = len(data['class_ids'])
+            store.frame_ids[:store.frame_count] = data['frame_ids']
+            store.offsets[:store.frame_count + 1] = data['offsets']
+            store.class_ids[:store.object_count] = data['class_ids']
+            store.confidences[:store.object_count] = data['confidences']
+            store.track_ids[:store.object_count] = data['track_ids']
+            store.bbox_types[:store.object_count] = data['bbox_types']
+            store.bboxes[:store.object_count] = data['bboxes']
+        
+        store.class_names = {int(class_id): name for class_id, name in meta['class_names'].items()}
+        store.frame_extras = {int(position): extras for position, extras in meta['frame_extras'].items()}
+        return store
+    
+    def memory_usage(self):
+        """已分配的数组内存（字节）"""
+        arrays = (self.frame_ids, self.offsets, self.class_ids, self.confidences,
+                  self.track_ids, self.bbox_types, self.bboxes)
+        return sum(array.nbytes for array in arrays)
@@ -0,0 +1,1319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+YOLO处理引擎
+实现YOLOv11目标检测和多目标跟踪的处理流程，不依赖Qt，可用于无界面环境
+"""
+
+import cv2
+import time
+import json
+from pathlib import Path
+import requests
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from core.frame_prefetcher import FramePrefetcher, format_prefetch_stats
+from core.frame_sampler import FrameSampler, constant_fps_timestamps, achieved_fps
+from core.video_index import build_video_index
+from core.video_reader import SparseFrameReader
+from core.segment_parallel import split_segments, process_segment, init_segment_worker, TrackStitcher
+from core.model_cache import ModelCache, default_model_cache, DEFAULT_BACKEND, WARMUP_IMGSZ, infer_task
+from core.model_export import EXPORT_BACKENDS, get_exported_model
+from core.live_source import (is_live_source, open_live_capture, LiveFrameGrabber, LatencyTracker,
+                              format_live_stats)
+from core.rate_controller import RateController, format_rate_adjustment, IMGSZ_LEVELS
+from core.resolution_profiles import RESOLUTION_PROFILES, DEFAULT_RESOLUTION_PROFILE, downscale_frame
+from core.region_mask import RegionMask, find_region_file, offset_boxes
+from core.motion_gate import MotionGate, format_motion_stats
+from core.tiled_inference import TiledInference, TiledResult, format_tile_stats
+from core.detection_store import DetectionStore, make_detections, detection_boxes, scale_detections
+from core.result_export import ResultExporter, STREAM_EXPORT_FORMATS, DEFAULT_CHUNK_ROWS, export_store
+from core.label_writer import (LabelWriter, LABEL_LAYOUTS, DEFAULT_LABEL_LAYOUT, format_labels, label_filename,
+                               format_label_stats)
+from core.renderer import AnnotationRenderer, class_color
+from core.model_calibration import (ModelCalibration, MODEL_SIZES, CALIBRATION_FRAMES, model_path_for_size,
+                                    measure_throughput, make_calibration_frames)
+
+# 默认模型权重
+DEFAULT_MODEL_PATH = 'weights/yolo11x-obb.pt'
+
+# 自动选择批大小时测量的候选值
+AUTO_BATCH_SIZES = (1, 2, 4, 8)
+
+# 并行处理时检查是否已停止的间隔（秒）
+PARALLEL_CANCEL_POLL_INTERVAL = 0.2
+
+# 自适应采样率的默认选项
+DEFAULT_ADAPTIVE_OPTIONS = {
+    'min_fps': 1.0,  # 采样帧率下限
+    'max_fps': None,  # 采样帧率上限，None表示使用目标帧率
+    'target_rtf': 1.0,  # 实时倍率目标（视频文件）
+    'target_latency_ms': None,  # 延迟目标（实时视频流）
+    'adaptive_resolution': False  # 采样率到下限后是否降低推理分辨率
+}
+
+# 运动门控的默认选项
+DEFAULT_MOTION_OPTIONS = {
+    'threshold': 0.005,  # 变化像素比例阈值（越小越灵敏）
+    'max_skip': 10  # 最多连续跳过的帧数
+}
+
+# 分块推理的默认选项
+DEFAULT_TILE_OPTIONS = {
+    'tile_size': 640,  # 块边长，也作为每块的推理尺寸
+    'overlap': 0.2,  # 相邻块的重叠比例
+    'keyframe_interval': 30,  # 每隔多少帧推理全部块
+    'change_threshold': 0.01  # 块内变化像素比例阈值
+}
+
+class YOLOEngine:
+    """YOLO处理引擎，通过事件回调报告进度"""
+    
+    def __init__(self, event_callback=None, **kwargs):
+        super().__init__(**kwargs)
+        self.event_callback = event_callback  # 事件回调: callback(事件名, *参数)
+        self.model = None
+        self.model_path = None  # 用户选择的模型路径，None表示使用默认模型
+        self.auto_model_path = None  # 本次处理按校准结果自动选择的模型路径，None表示使用 model_path
+        self.loaded_model_path = None  # 已加载模型（self.model）的路径
+        self.model_cache = default_model_cache  # 已加载模型的缓存，切换模型时复用
+        self.backend = DEFAULT_BACKEND  # 推理后端: pytorch/onnx/openvino
+        self.model_stats = None  # 当前模型的加载统计（加载耗时、预热耗时、内存占用）
+        self.auto_model_size = False  # 是否按校准结果自动选择能达到目标帧率的最大模型
+        self.model_calibration = None  # 模型吞吐量校准结果，首次使用时加载
+        self.video_capture = None
+        self.is_processing = False
+        self.cancel_requested = False  # 取消请求，开始处理时不会清除（由调用方在下一次处理前清除）
+        self.detection_enabled = True  # 默认启用检测
+        self.tracking_enabled = True
+        self.tracker_type = 'bytetrack.yaml'  # 默认跟踪器
+        self.is_obb_model = False  # 是否为OBB模型
+        self.verbose = True  # 是否输出ultralytics的逐帧推理日志
+        
+        # 帧率控制
+        self.target_fps = 25  # 目标处理帧率，默认25FPS
+        self.skip_frames = 1  # 平均采样间隔（仅用于显示），由采样帧列表计算得出
+        self.sampled_frame_indices = []  # 按时间戳采样得到的需处理帧索引
+        self.probe_timestamps = True  # 是否预先扫描视频索引（每帧时间戳和关键帧，支持可变帧率视频）
+        self.video_index = None  # 当前视频的索引
+        self.decode_mode = 'auto'  # 解码方式: auto/grab/seek/read，见SparseFrameReader
+        
+        # 解码预取
+        self.prefetch_size = 8  # 预取队列深度，0表示不启用解码线程
+        
+        # 批量推理（仅在关闭跟踪时生效）
+        self.batch_size = 1  # 批大小，或 'auto' 自动测量选择
+        
+        # 多进程分段并行处理
+        self.parallel_workers = 1  # 工作进程数，1表示不启用
+        self.parallel_overlap = 25  # 片段间重叠的采样帧数，用于拼接跟踪ID
+        
+        # 自适应采样率
+        self.adaptive_rate = False  # 是否在处理过程中根据吞吐量调整采样率
+        self.adaptive_options = dict(DEFAULT_ADAPTIVE_OPTIONS)
+        self.rate_controller = None  # 当前处理使用的控制器
+        self.frame_timestamps = []  # 当前视频每帧显示时间戳（秒）
+        self.imgsz = None  # 推理分辨率，None表示使用模型默认值
+        
+        # 推理分辨率配置
+        self.resolution_profile = DEFAULT_RESOLUTION_PROFILE  # 见RESOLUTION_PROFILES
+        self.source_frame_shape = None  # 原始视频帧尺寸 (高, 宽)，检测框和标签按该尺寸输出
+        
+        # 感兴趣区域和排除区域
+        self.roi_path = None  # 指定的区域文件，None表示使用视频旁的同名.roi.json文件（如果存在）
+        self.region_mask = None  # 当前视频的区域，None表示处理整帧
+        
+        # 运动门控：画面静止时跳过推理，复用上一次的检测结果
+        self.motion_gate_enabled = False
+        self.motion_options = dict(DEFAULT_MOTION_OPTIONS)
+        self.motion_gate = None  # 当前处理使用的门控
+        self.last_result = None  # 上一次推理的结果，跳过推理时复用
+        
+        # 分块推理：超大画面切块推理，只推理发生变化的块
+        self.tiled_enabled = False
+        self.tile_options = dict(DEFAULT_TILE_OPTIONS)
+        self.tiler = None  # 当前处理使用的分块推理
+        
+        # 检测结果绘制（按类别批量绘制，缓存标签小图）
+        self.renderer = AnnotationRenderer()
+        self.render_annotations = True  # 是否在处理时绘制标注帧（界面显示时按需绘制、无界面处理时关闭）
+        
+        # 实时视频流
+        self.live_queue_size = 1  # 采集队列保留的最新帧数
+        self.simulate_live = False  # 把本地视频文件按原始帧率当作实时视频流处理（用于测试）
+        
+        # 检测结果存储（按列存储，帧在所有字段写入后再记录）
+        self.detection_results = DetectionStore()
+        self.keep_results = True  # 是否在内存中保留全部检测结果（只流式导出时可关闭，内存不随视频长度增长）
+        
+        # 流式导出：处理过程中按块写出检测结果
+        self.stream_export = None  # {'path', 'format', 'chunk_rows'}，None表示不流式导出
+        self.result_exporter = None  # 当前处理使用的导出器
+        
+        # 性能统计
+        self.frame_count = 0
+        self.processed_frame_count = 0  # 实际处理的帧数
+        self.expected_processed_frames = 0  # 预期需要处理的帧数
+        self.start_time = None
+        
+        # 导出选项
+        self.export_options = {
+            'save_txt': False,
+            'save_conf': False,
+            'label_layout': DEFAULT_LABEL_LAYOUT
+        }
+        self.output_dir = None  # 输出目录
+        self.label_writer = None  # 当前处理使用的后台标签写出线程
+    
+    def notify(self, event, *args):
+        """发送处理事件（事件名与YOLOProcessor的信号名一致）"""
+        if self.event_callback is not None:
+            self.event_callback(event, *args)
+    
+    def set_target_fps(self, fps):
+        """设置目标处理帧率"""
+        self.target_fps = max(1, fps)  # 最小1FPS
+    
+    def set_probe_timestamps(self, enabled):
+        """设置是否扫描视频索引进行采样（关闭时按固定帧率计算，且不使用关键帧跳转）"""
+        self.probe_timestamps = enabled
+    
+    def set_decode_mode(self, mode):
+        """设置未采样帧的解码方式"""
+        if mode in ('auto', 'grab', 'seek', 'read'):
+            self.decode_mode = mode
+        else:
+            self.decode_mode = 'auto'  # 默认值
+    
+    def set_prefetch_size(self, size):
+        """设置解码预取队列深度"""
+        self.prefetch_size = max(0, int(size))
+    
+    def set_batch_size(self, batch_size):
+        """设置批量推理大小（整数或'auto'）"""
+        if batch_size == 'auto':
+            self.batch_size = 'auto'
+        else:
+            self.batch_size = max(1, int(batch_size))
+    
+    def set_parallel_workers(self, workers, overlap=None):
+        """设置分段并行处理的工作进程数和片段重叠帧数"""
+        self.parallel_workers = max(1, int(workers))
+        if overlap is not None:
+            self.parallel_overlap = max(0, int(overlap))
+    
+    def set_backend(self, backend):
+        """设置推理后端，切换后在下一次处理时重新加载模型"""
+        if backend != DEFAULT_BACKEND and backend not in EXPORT_BACKENDS:
+            backend = DEFAULT_BACKEND
+        if backend != self.backend:
+            self.backend = backend
+            self.model = None
+    
+    def set_auto_model_size(self, enabled):
+        """设置是否按校准结果自动选择模型尺寸"""
+        self.auto_model_size = enabled
+    
+    def get_model_calibration(self):
+        """获取模型吞吐量校准结果"""
+        if self.model_calibration is None:
+            self.model_calibration = ModelCalibration()
+        return self.model_calibration
+    
+    def calibrate_models(self, frame_shape, sizes=MODEL_SIZES, frame_count=CALIBRATION_FRAMES, download=False):
+        """
+        按当前分辨率配置（解码后缩放和模型输入尺寸）测量各尺寸模型在视频分辨率 (高, 宽) 下的处理帧率并保存，
+        返回 模型尺寸 -> 帧率
+        """
+        calibration = self.get_model_calibration()
+        task = infer_task(self.model_path or DEFAULT_MODEL_PATH)
+        profile = RESOLUTION_PROFILES[self.resolution_profile]
+        frames = [downscale_frame(frame, profile['max_side']) for frame in make_calibration_frames(frame_shape, frame_count)]
+        # 使用临时缓存，校准结束后释放全部模型
+        cache = ModelCache(warmup=True)
+        
+        measured = {}
+        for size in sizes:
+            model_path = model_path_for_size(size, task)
+            if not Path(model_path).exists() and not (download and self.download_model_if_needed(model_path)):
+                self.notify('detection_info_updated', f"跳过 {model_path}：权重文件不存在")
+                continue
+            
+            self.notify('detection_info_updated', f"正在校准 {model_path} ({self.backend}, {frame_shape[1]}x{frame_shape[0]}, "
+                                                  f"分辨率配置 {self.resolution_profile})...")
+            if self.backend in EXPORT_BACKENDS:
+                get_exported_model(model_path, self.backend, WARMUP_IMGSZ, task,
+                                   log=lambda message: self.notify('detection_info_updated', message))
+            model = cache.get(model_path, task, self.backend).model
+            fps, latency = measure_throughput(model, frames, profile['imgsz'])
+            cache.clear()
+            
+            calibration.record(size, self.backend, frame_shape, fps, latency, profile['imgsz'])
+            measured[size] = fps
+            self.notify('detection_info_updated', f"✅ {model_path}: {fps:.1f} FPS ({latency * 1000:.1f}ms/帧)")
+        
+        calibration.save()
+        return measured
+    
+    def select_model_for_video(self, video_path):
+        """按校准结果为视频选择能达到目标帧率的最大模型（只用于本次处理），没有校准结果时使用用户选择的模型"""
+        capture = cv2.VideoCapture(video_path)
+        frame_shape = (int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)))
+        capture.release()
+        if min(frame_shape) <= 0:
+            frame_shape = None
+        
+        # 按当前分辨率配置的模型输入尺寸查找校准结果
+        imgsz = RESOLUTION_PROFILES[self.resolution_profile]['imgsz']
+        calibration = self.get_model_calibration()
+        size = calibration.select_size(self.target_fps, self.backend, frame_shape, imgsz)
+        if size is None:
+            self.notify('detection_info_updated', f"分辨率配置 {self.resolution_profile} 没有模型校准结果，使用当前模型"
+                                                  f"（可在模型设置中校准）")
+            return
+        
+        model_path = model_path_for_size(size, infer_task(self.model_path or DEFAULT_MODEL_PATH))
+        fps = calibration.get_results(self.backend, frame_shape, imgsz)[size]['fps']
+        self.notify('detection_info_updated', f"自动选择模型: {model_path}（校准 {fps:.1f} FPS, 目标 {self.target_fps} FPS）")
+        self.auto_model_path = model_path
+    
+    def run_model_path(self):
+        """本次处理使用的模型路径：自动选择的模型，否则为用户选择的模型"""
+        return self.auto_model_path or self.model_path or DEFAULT_MODEL_PATH
+    
+    def ensure_model(self):
+        """确保已加载本次处理使用的模型，已加载的模型不同时切换（已缓存的模型不会重新加载）"""
+        model_path = self.run_model_path()
+        if self.model is not None and model_path != self.loaded_model_path:
+            self.model = None
+        if self.model is None:
+            return self.load_model(model_path)
+        return True
+    
+    def prepare_export(self, model_path):
+        """导出后端首次使用时导出模型（已导出时直接返回）"""
+        if self.backend in EXPORT_BACKENDS:
+            get_exported_model(model_path, self.backend, WARMUP_IMGSZ, infer_task(model_path),
+                               log=lambda message: self.notify('detection_info_updated', message))
+    
+    def set_adaptive_rate(self, enabled, **options):
+        """设置自适应采样率及其选项（min_fps/max_fps/target_rtf/target_latency_ms/adaptive_resolution）"""
+        self.adaptive_rate = enabled
+        for key, value in options.items():
+            if key not in self.adaptive_options:
+                raise ValueError(f"未知的自适应选项: {key}")
+            self.adaptive_options[key] = value
+    
+    def reset_options(self):
+        """恢复自适应采样率、运动门控和分块推理选项的默认值（setter只覆盖传入的选项）"""
+        self.adaptive_options = dict(DEFAULT_ADAPTIVE_OPTIONS)
+        self.motion_options = dict(DEFAULT_MOTION_OPTIONS)
+        self.tile_options = dict(DEFAULT_TILE_OPTIONS)
+    
+    def set_resolution_profile(self, name):
+        """设置推理分辨率配置（模型输入尺寸和解码后缩放）"""
+        if name not in RESOLUTION_PROFILES:
+            raise ValueError(f"未知的分辨率配置: {name}")
+        self.resolution_profile = name
+        self.imgsz = RESOLUTION_PROFILES[name]['imgsz']
+    
+    def downscale_frame(self, frame):
+        """按分辨率配置缩放解码帧，并记录原始帧尺寸用于换算检测框"""
+        self.source_frame_shape = frame.shape[:2]
+        return downscale_frame(frame, RESOLUTION_PROFILES[self.resolution_profile]['max_side'])
+    
+    def set_roi_path(self, path):
+        """设置区域文件（ROI和排除区域），None表示自动查找视频旁的同名区域文件"""
+        self.roi_path = path
+    
+    def load_region_mask(self, video_path):
+        """加载当前视频的区域：优先使用指定的区域文件，其次使用视频旁的同名区域文件"""
+        path = self.roi_path or find_region_file(video_path)
+        self.region_mask = RegionMask.load(path) if path else None
+        if self.region_mask is not None:
+            self.notify('detection_info_updated', f"区域文件: {path}, ROI {len(self.region_mask.roi_polygons)}个, "
+                                             f"排除区域 {len(self.region_mask.exclude_polygons)}个")
+    
+    def get_region_layout(self, frame):
+        """获取帧对应的区域布局，没有区域时返回None"""
+        if self.region_mask is None:
+            return None
+        return self.region_mask.get_layout(frame.shape, self.source_frame_shape)
+    
+    def set_motion_gate(self, enabled, **options):
+        """设置运动门控及其选项（threshold/max_skip）"""
+        self.motion_gate_enabled = enabled
+        for key, value in options.items():
+            if key not in self.motion_options:
+                raise ValueError(f"未知的运动门控选项: {key}")
+            self.motion_options[key] = value
+    
+    def create_motion_gate(self):
+        """为新的处理过程创建运动门控（未启用时为None）"""
+        self.motion_gate = MotionGate(**self.motion_options) if self.motion_gate_enabled else None
+        self.last_result = None
+    
+    def set_render_annotations(self, enabled):
+        """设置是否在处理时绘制标注帧，关闭时frame_processed发送未绘制的帧（不拷贝）"""
+        self.render_annotations = enabled
+    
+    def set_keep_results(self, enabled):
+        """设置是否在内存中保留全部检测结果"""
+        self.keep_results = enabled
+    
+    def set_stream_export(self, path, format=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+        """设置流式导出（jsonl/csv/parquet，None时按扩展名判断），path为None时关闭"""
+        self.close_result_exporter()
+        self.result_exporter = None
+        if path is None:
+            self.stream_export = None
+            return
+        if format is not None and format not in STREAM_EXPORT_FORMATS:
+            raise ValueError(f"不支持的流式导出格式: {format}")
+        self.stream_export = {'path': str(path), 'format': format, 'chunk_rows': chunk_rows}
+    
+    def create_result_exporter(self):
+        """为新的处理过程创建流式导出器（未启用时为None）"""
+        self.close_result_exporter()
+        self.result_exporter = ResultExporter(**self.stream_export) if self.stream_export else None
+    
+    def close_result_exporter(self):
+        """写出剩余结果并关闭导出文件（处理结束、取消或出错时调用）"""
+        if self.result_exporter is None or self.result_exporter.closed:
+            return
+        try:
+            self.result_exporter.close()
+            self.notify('detection_info_updated', f"流式导出: {self.result_exporter.written_rows}个对象, "
+                                             f"{self.result_exporter.chunk_count}块 -> {self.result_exporter.path}")
+        except Exception as e:
+            self.notify('error_occurred', f"流式导出失败: {str(e)}")
+    
+    def create_label_writer(self):
+        """为新的处理过程创建后台标签写出线程（未启用标签导出时为None）"""
+        self.close_label_writer()
+        if self.export_options['save_txt'] and self.output_dir:
+            self.label_writer = LabelWriter(self.output_dir, self.export_options['label_layout'],
+                                            self.export_options['save_conf'],
+                                            on_error=lambda message: self.notify('error_occurred', message))
+        else:
+            self.label_writer = None
+    
+    def close_label_writer(self):
+        """写出队列中剩余的标签并关闭文件（处理结束、取消或出错时调用）"""
+        if self.label_writer is None or self.label_writer.thread is None:
+            return
+        try:
+            self.label_writer.close()
+            self.emit_label_stats()
+            self.notify('detection_info_updated', format_label_stats(self.label_writer.get_stats()))
+        except Exception as e:
+            self.notify('error_occurred', f"保存标签文件失败: {str(e)}")
+    
+    def emit_label_stats(self):
+        """发送标签写出队列的积压统计"""
+        if self.label_writer is not None:
+            self.notify('label_stats_updated', self.label_writer.get_stats())
+    
+    def record_result(self, detection_info, names=None):
+        """记录一帧的最终检测信息：保存到结果存储并写入流式导出"""
+        if self.keep_results:
+            self.detection_results.append(detection_info, names)
+        if self.result_exporter is not None:
+            self.result_exporter.add(detection_info, names)
+    
+    def set_label_limit(self, limit):
+        """设置绘制标签的对象数量上限，超过时只绘制检测框（None表示始终绘制标签）"""
+        self.renderer.label_limit = limit
+    
+    def set_tiled_inference(self, enabled, **options):
+        """设置分块推理及其选项（tile_size/overlap/keyframe_interval/change_threshold）"""
+        self.tiled_enabled = enabled
+        for key, value in options.items():
+            if key not in self.tile_options:
+                raise ValueError(f"未知的分块推理选项: {key}")
+            self.tile_options[key] = value
+    
+    def create_tiler(self):
+        """为新的处理过程创建分块推理（未启用时为None）"""
+        self.tiler = TiledInference(**self.tile_options) if self.tiled_enabled else None
+        if self.tiler is not None and self.tracking_enabled:
+            self.notify('detection_info_updated', "分块推理只进行检测，合并后的结果没有跟踪ID")
+    
+    def emit_motion_stats(self):
+        """发送运动门控的跳过统计"""
+        if self.motion_gate is not None:
+            self.notify('motion_stats_updated', self.motion_gate.get_stats())
+    
+    def create_rate_controller(self):
+        """为新的处理过程创建自适应采样率控制器（未启用时为None）"""
+        profile_imgsz = RESOLUTION_PROFILES[self.resolution_profile]['imgsz']
+        if self.adaptive_rate:
+            options = dict(self.adaptive_options)
+            options['max_fps'] = options['max_fps'] or self.target_fps
+            if profile_imgsz:
+                # 分辨率档位从配置的输入尺寸开始向下调整
+                options['imgsz_levels'] = (profile_imgsz,) + tuple(level for level in IMGSZ_LEVELS if level < profile_imgsz)
+            self.rate_controller = RateController(self.target_fps, **options)
+            self.rate_controller.start()
+        else:
+            self.rate_controller = None
+        
+        if self.rate_controller and self.rate_controller.imgsz is not None:
+            self.imgsz = self.rate_controller.imgsz
+        else:
+            self.imgsz = profile_imgsz
+    
+    def iter_adaptive_samples(self):
+        """按控制器当前的采样率逐个产出采样帧索引，并记录实际采样的帧"""
+        self.sampled_frame_indices = []
+        sampler = FrameSampler(self.target_fps)
+        for frame_index in sampler.iter_sample(self.frame_timestamps, lambda: self.rate_controller.fps):
+            self.sampled_frame_indices.append(frame_index)
+            yield frame_index
+    
+    def apply_rate_control(self, frame_index, detection_info, latency_ms=None, inference_time=None):
+        """更新自适应采样率控制器，在检测信息中记录该帧的采样率和发生的调整"""
+        if self.rate_controller is None:
+            return
+        
+        detection_info['sample_fps'] = self.rate_controller.fps
+        if self.rate_controller.imgsz is not None:
+            detection_info['imgsz'] = self.rate_controller.imgsz
+        
+        video_time = None
+        if frame_index < len(self.frame_timestamps):
+            video_time = self.frame_timestamps[frame_index] - self.frame_timestamps[0]
+        adjustment = self.rate_controller.update(frame_index, video_time, latency_ms, inference_time)
+        if adjustment is None:
+            return
+        
+        detection_info['rate_adjustment'] = adjustment
+        if self.rate_controller.imgsz is not None:
+            self.imgsz = self.rate_controller.imgsz
+        if video_time is not None:
+            # 按新的采样率重新估计需要处理的帧数
+            remaining_time = self.frame_timestamps[-1] - self.frame_timestamps[frame_index]
+            self.expected_processed_frames = self.processed_frame_count + 1 + int(remaining_time * self.rate_controller.fps)
+        
+        self.notify('rate_adjusted', adjustment)
+        self.notify('detection_info_updated', format_rate_adjustment(adjustment))
+    
+    def inference_options(self):
+        """模型调用的公共参数"""
+        options = {'verbose': self.verbose}
+        if self.imgsz is not None:
+            options['imgsz'] = self.imgsz
+        return options
+    
+    def set_live_options(self, queue_size=None, simulate_live=None):
+        """设置实时视频流选项"""
+        if queue_size is not None:
+            self.live_queue_size = max(1, int(queue_size))
+        if simulate_live is not None:
+            self.simulate_live = simulate_live
+    
+    def download_model_if_needed(self, model_path):
+        """如果模型文件不存在，则自动下载"""
+        if Path(model_path).exists():
+            return True
+        
+        # 权重文件下载配置
+        weights_config = {
+            'weights/yolo11x-obb.pt': {
+                'url': 'https://github.com/ultralytics/assets/releases/download/v8.3.0/yolo11x-obb.pt',
+                'description': 'YOLO11x-OBB 模型权重文件',
+                'size': '113MB'
+            },
+            'weights/yolo11n-obb.pt': {
+                'url': 'https://github.com/ultralytics/assets/releases/download/v8.3.0/yolo11n-obb.pt',
+                'description': 'YOLO11n-OBB 模型权重文件（轻量版）',
+                'size': '5.6MB'
+            },
+            'weights/yolo11s-obb.pt': {
+                'url': 'https://github.com/ultralytics/assets/releases/download/v8.3.0/yolo11s-obb.pt',
+                'description': 'YOLO11s-OBB 模型权重文件（小型版）',
+                'size': '19.8MB'
+            },
+            'weights/yolo11m-obb.pt': {
+                'url': 'https://github.com/ultralytics/assets/releases/download/v8.3.0/yolo11m-obb.pt',
+                'description': 'YOLO11m-OBB 模型权重文件（中型版）',
+                'size': '42.9MB'
+            },
+            'weights/yolo11l-obb.pt': {
+                'url': 'https://github.com/ultralytics/assets/releases/download/v8.3.0/yolo11l-obb.pt',
+                'description': 'YOLO11l-OBB 模型权重文件（大型版）',
+                'size': '54.3MB'
+            }
+        }
+        
+        if model_path not in weights_config:
+            return False
+        
+        config = weights_config[model_path]
+        
+        try:
+            # 确保weights目录存在
+            weights_dir = Path("weights")
+            weights_dir.mkdir(exist_ok=True)
+            
+            # 发送下载开始信号
+            self.notify('detection_info_updated', f"正在下载 {config['description']} ({config['size']})...")
+            
+            # 下载文件
+            response = requests.get(config['url'], stream=True)
+            response.raise_for_status()
+            
+            total_size = int(response.headers.get('content-length', 0))
+            downloaded_size = 0
+            
+            with open(model_path, 'wb') as file:
+                for chunk in response.iter_content(chunk_size=8192):
+                    if chunk:
+                        file.write(chunk)
+                        downloaded_size += len(chunk)
+                        
+                        # 计算下载进度
+                        if total_size > 0:
+                            progress = int((downloaded_size / total_size) * 100)
+                            self.notify('detection_info_updated', f"下载进度: {progress}% ({downloaded_size // 1024 // 1024}MB/{total_size // 1024 // 1024}MB)")
+            
+            self.notify('detection_info_updated', f"✅ {config['description']} 下载完成")
+            return True
+            
+        except Exception as e:
+            self.notify('error_occurred', f"模型下载失败: {str(e)}")
+            return False
+    
+    def load_model(self, model_path=None):
+        """加载YOLO模型"""
+        try:
+            if model_path is None:
+                # 使用指定的YOLOv11x-OBB模型
+                model_path = DEFAULT_MODEL_PATH
+            
+            # 检查模型文件是否存在，如果不存在则尝试下载
+            if not Path(model_path).exists():
+                self.notify('detection_info_updated', f"模型文件不存在，正在自动下载: {model_path}")
+                if not self.download_model_if_needed(model_path):
+                    raise FileNotFoundError(f"模型文件不存在且下载失败: {model_path}")
+            
+            self.prepare_export(model_path)
+            self.notify('detection_info_updated', f"正在加载模型: {model_path} ({self.backend})")
+            cached_model = self.model_cache.get(model_path, backend=self.backend)
+            self.model = cached_model.model
+            self.loaded_model_path = model_path
+            self.model_stats = cached_model.to_dict()
+            self.is_obb_model = cached_model.key[1] == 'obb'  # 检测是否为OBB模型
+            # 缓存中的模型可能保留了上一次使用时的跟踪器状态
+            self.reset_tracker()
+            
+            if cached_model.hits > 0:
+                self.notify('detection_info_updated', f"✅ 使用已缓存的模型: {model_path}")
+            else:
+                self.notify('detection_info_updated',
+                            f"✅ 模型加载成功: {model_path} (加载 {cached_model.load_time:.2f}s, "
+                            f"预热 {cached_model.warmup_time:.2f}s, 内存 {cached_model.memory_bytes / 1024 / 1024:.0f}MB)")
+            
+            # 发送模型加载成功信号
+            self.notify('model_loaded', model_path)
+            return True
+            
+        except Exception as e:
+            self.notify('error_occurred', f"模型加载失败: {str(e)}")
+            return False
+    
+    def reset_tracker(self):
+        """重置跟踪器状态，避免跟踪ID在不同视频之间延续"""
+        predictor = getattr(self.model, 'predictor', None) if self.model is not None else None
+        if predictor is not None and hasattr(predictor, 'trackers'):
+            # 删除后ultralytics会在下一次track调用时重新创建跟踪器
+            del predictor.trackers
+    
+    def set_tracker(self, tracker_name):
+        """设置跟踪算法"""
+        tracker_map = {
+            'ByteTrack': 'bytetrack.yaml',
+            'BoT-SORT': 'botsort.yaml'
+        }
+        
+        if tracker_name in tracker_map:
+            self.tracker_type = tracker_map[tracker_name]
+        else:
+            self.tracker_type = 'bytetrack.yaml'  # 默认值
+    
+    def set_detection_enabled(self, enabled):
+        """设置是否启用检测"""
+        self.detection_enabled = enabled
+    
+    def set_tracking_enabled(self, enabled):
+        """设置是否启用跟踪"""
+        self.tracking_enabled = enabled
+    
+    def set_export_options(self, save_txt=False, save_conf=False, output_dir=None, label_layout=DEFAULT_LABEL_LAYOUT):
+        """设置导出选项（label_layout: txt每帧一个文件，tar/zip写入单个归档并生成索引）"""
+        if label_layout not in LABEL_LAYOUTS:
+            raise ValueError(f"不支持的标签输出方式: {label_layout}")
+        self.export_options = {
+            'save_txt': save_txt,
+            'save_conf': save_conf,
+            'label_layout': label_layout
+        }
+        self.output_dir = output_dir
+        
+        if save_txt and output_dir:
+            # 确保输出目录存在
+            Path(output_dir).mkdir(parents=True, exist_ok=True)
+    
+    def process_video(self, video_path):
+        """处理视频文件"""
+        # 摄像头和视频流：只处理最新的帧
+        if is_live_source(video_path) or self.simulate_live:
+            return self.process_live(video_path)
+        
+        try:
+            # 按校准结果选择模型尺寸，关闭时使用用户选择的模型
+            self.auto_model_path = None
+            if self.auto_model_size:
+                self.select_model_for_video(video_path)
+            
+            # 模型选择期间可能已取消
+            if self.cancel_requested:
+                return False
+            
+            # 并行模式：多进程分段处理
+            if self.parallel_workers > 1:
+                return self.process_video_parallel(video_path)
+            
+            # 确保模型已加载
+            if not self.ensure_model():
+                return False
+            
+            # 打开视频文件并计算采样帧
+            total_frames = self.prepare_video(video_path)
+            if total_frames is None:
+                return False
+            
+            # 跟踪需要逐帧更新跟踪器，只有仅检测时才批量推理
+            batch_size = self.batch_size if not self.tracking_enabled else 1
+            
+            # 逐帧处理：解码线程只完整解码采样帧并预取到队列，推理线程从队列中取帧
+            # 自适应采样时采样帧在处理过程中按控制器的采样率逐个生成
+            sampled_indices = self.iter_adaptive_samples() if self.rate_controller else self.sampled_frame_indices
+            frame_reader = SparseFrameReader(self.video_capture, sampled_indices, self.video_index,
+                                             mode=self.decode_mode, should_continue=lambda: self.is_processing)
+            # 解码线程中按分辨率配置缩放，推理线程和预取队列只处理缩放后的帧
+            frames = ((frame_index, self.downscale_frame(frame)) for frame_index, frame in frame_reader)
+            prefetcher = FramePrefetcher(frames, self.prefetch_size)
+            prefetcher.start()
+            try:
+                pending = []
+                for frame_index, frame in prefetcher:
+                    if not self.is_processing:
+                        break
+                    
+                    pending.append((frame_index, frame))
+                    if batch_size == 'auto':
+                        if len(pending) < max(AUTO_BATCH_SIZES):
+                            continue
+                        batch_size = self.auto_select_batch_size([item[1] for item in pending])
+                    
+                    if len(pending) >= batch_size:
+                        self.process_pending_frames(pending, batch_size, total_frames, prefetcher)
+                        pending = []
+                
+                # 处理剩余不足一批的帧
+                if pending and self.is_processing:
+                    if batch_size == 'auto':
+                        batch_size = self.auto_select_batch_size([item[1] for item in pending])
+                    self.process_pending_frames(pending, batch_size, total_frames, prefetcher)
+            finally:
+                prefetcher.stop()
+            
+            prefetch_stats = prefetcher.get_stats()
+            self.notify('prefetch_stats_updated', prefetch_stats)
+            self.notify('detection_info_updated', format_prefetch_stats(prefetch_stats))
+            
+            decode_stats = frame_reader.get_stats()
+            self.frame_count = frame_reader.position
+            if self.motion_gate:
+                self.emit_motion_stats()
+                self.notify('detection_info_updated', format_motion_stats(self.motion_gate.get_stats()))
+            if self.tiler:
+                self.notify('detection_info_updated', format_tile_stats(self.tiler.get_stats()))
+            if self.rate_controller:
+                # 发送实际采样的帧列表
+                self.notify('sampled_frames_updated', list(self.sampled_frame_indices))
+                self.notify('detection_info_updated', f"自适应采样: 调整{len(self.rate_controller.adjustments)}次, "
+                                                 f"最终采样{self.rate_controller.fps:.1f}FPS")
+            self.notify('detection_info_updated', f"解码统计: 完整解码{decode_stats['decoded_count']}帧, "
+                                             f"跳过{decode_stats['grabbed_count']}帧, 跳转{decode_stats['seek_count']}次")
+            
+            self.notify('processing_finished')
+            return True
+            
+        except Exception as e:
+            self.notify('error_occurred', f"视频处理失败: {str(e)}")
+            return False
+        
+        finally:
+            if self.video_capture:
+                self.video_capture.release()
+            self.close_label_writer()
+            self.close_result_exporter()
+    
+    def process_live(self, source):
+        """
+        处理实时视频源（摄像头/RTSP/HTTP流），采集线程只保留最新的帧，报告每帧从采集到结果的延迟。
+        实时视频源没有结束时间，检测结果不保留在内存中（需要结果时使用流式导出）
+        """
+        keep_results = self.keep_results
+        self.keep_results = False
+        try:
+            # 确保模型已加载（实时视频源不自动选择模型尺寸）
+            self.auto_model_path = None
+            if not self.ensure_model():
+                return False
+            
+            self.video_capture = open_live_capture(source)
+            if not self.video_capture.isOpened():
+                self.notify('error_occurred', f"无法打开视频源: {source}")
+                return False
+            
+            original_fps = self.video_capture.get(cv2.CAP_PROP_FPS) or 0.0
+            # 本地文件模拟为实时流时按原始帧率读取
+            pace_fps = original_fps if self.simulate_live and not is_live_source(source) else None
+            
+            self.is_processing = not self.cancel_requested
+            self.frame_count = 0
+            self.processed_frame_count = 0
+            self.expected_processed_frames = 0  # 实时流没有总帧数
+            self.sampled_frame_indices = []
+            self.skip_frames = 1
+            self.start_time = time.time()
+            self.detection_results.clear()
+            self.frame_timestamps = []
+            self.source_frame_shape = None
+            self.load_region_mask(source)
+            self.reset_tracker()
+            self.create_rate_controller()
+            self.create_motion_gate()
+            self.create_tiler()
+            self.create_result_exporter()
+            self.create_label_writer()
+            
+            self.notify('sampled_frames_updated', self.sampled_frame_indices)
+            self.notify('video_info_updated', 0, original_fps, 1, self.target_fps)
+            self.notify('detection_info_updated', f"实时视频源: {source}, 源帧率{original_fps:.1f}FPS, "
+                                             f"最多处理{self.target_fps}FPS, 队列保留最新{self.live_queue_size}帧")
+            
+            # 采集线程退出时释放视频源（网络流的read()可能阻塞，不能在其他线程中释放）
+            grabber = LiveFrameGrabber(self.video_capture, self.live_queue_size, pace_fps,
+                                       should_continue=lambda: self.is_processing)
+            latency_tracker = LatencyTracker()
+            period = 1.0 / max(1e-3, self.target_fps)
+            last_start = 0.0
+            
+            grabber.start()
+            self.video_capture = None
+            try:
+                while self.is_processing:
+                    # 处理速度超过目标帧率时等待下一个处理时刻，之后取到的仍是最新的帧
+                    if self.rate_controller:
+                        period = 1.0 / self.rate_controller.fps
+                    wait_time = last_start + period - time.time()
+                    if wait_time > 0:
+                        time.sleep(wait_time)
+                    
+                    item = grabber.get()
+                    if item is None:
+                        break
+                    frame_id, capture_time, frame = item
+                    last_start = time.time()
+                    
+                    # 只缩放被取走处理的帧，被丢弃的帧不做缩放
+                    processed_frame, detection_info = self.process_frame(self.downscale_frame(frame), frame_id)
+                    latency_ms = (time.time() - capture_time) * 1000
+                    latency_tracker.add(latency_ms)
+                    detection_info['capture_time'] = capture_time
+                    detection_info['latency_ms'] = latency_ms
+                    # 按采样率限速后实测帧率不超过采样率，控制器按推理耗时估计处理能力
+                    self.apply_rate_control(frame_id, detection_info, latency_ms, time.time() - last_start)
+                    self.record_result(detection_info, self.class_names())
+                    
+                    self.notify('frame_processed', processed_frame, detection_info)
+                    self.processed_frame_count += 1
+                    self.emit_progress()
+                    
+                    if self.processed_frame_count % 10 == 0:
+                        self.emit_fps()
+                        self.emit_motion_stats()
+                        self.emit_label_stats()
+                        self.notify('live_stats_updated', dict(grabber.get_stats(), **latency_tracker.get_stats()))
+            finally:
+                grabber.stop()
+            
+            live_stats = dict(grabber.get_stats(), **latency_tracker.get_stats())
+            self.frame_count = live_stats['captured_count']
+            self.notify('live_stats_updated', live_stats)
+            self.notify('detection_info_updated', format_live_stats(live_stats))
+            if self.motion_gate:
+                self.emit_motion_stats()
+                self.notify('detection_info_updated', format_motion_stats(self.motion_gate.get_stats()))
+            if self.tiler:
+                self.notify('detection_info_updated', format_tile_stats(self.tiler.get_stats()))
+            self.notify('processing_finished')
+            return True
+            
+        except Exception as e:
+            self.notify('error_occurred', f"实时视频处理失败: {str(e)}")
+            return False
+        
+        finally:
+            self.keep_results = keep_results
+            if self.video_capture:
+                self.video_capture.release()
+            self.close_label_writer()
+            self.close_result_exporter()
+    
+    def process_video_parallel(self, video_path):
+        """多进程分段并行处理视频（只生成检测结果和标签，不生成标注帧）"""
+        try:
+            # 在主进程中确保权重文件存在并完成导出，避免多个进程同时下载或导出
+            model_path = self.run_model_path()
+            if not Path(model_path).exists() and not self.download_model_if_needed(model_path):
+                self.notify('error_occurred', f"模型文件不存在且下载失败: {model_path}")
+                return False
+            self.prepare_export(model_path)
+            
+            total_frames = self.prepare_video(video_path)
+            if total_frames is None:
+                return False
+            frame_shape = (int(self.video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                           int(self.video_capture.get(cv2.CAP_PROP_FRAME_WIDTH)))
+            self.video_capture.release()
+            
+            # 跟踪时需要重叠窗口拼接跟踪ID
+            overlap = self.parallel_overlap if self.tracking_enabled else 0
+            segments = split_segments(self.sampled_frame_indices, self.parallel_workers, overlap)
+            torch_threads = max(1, (os.cpu_count() or 1) // len(segments))
+            tasks = [dict(segment,
+                          video_path=video_path,
+                          video_index=self.video_index,
+                          model_path=model_path,
+                          backend=self.backend,
+                          resolution_profile=self.resolution_profile,
+                          roi_path=self.region_mask.path if self.region_mask else None,
+                          motion_gate=self.motion_options if self.motion_gate_enabled else None,
+                          tiled=self.tile_options if self.tiled_enabled else None,
+                          detection_enabled=self.detection_enabled,
+                          tracking_enabled=self.tracking_enabled,
+                          tracker_type=self.tracker_type,
+                          decode_mode=self.decode_mode,
+                          torch_threads=torch_threads)
+                     for segment in segments]
+            
+            self.notify('detection_info_updated', f"并行处理: {len(tasks)}个片段, {len(tasks)}个工作进程, 重叠{overlap}帧")
+            
+            stitcher = TrackStitcher()
+            finished_segments = {}
+            next_segment = 0
+            class_names = None
+            
+            # 使用spawn启动子进程，每个进程加载独立的模型实例；停止时通过事件通知正在处理的片段提前结束
+            mp_context = multiprocessing.get_context('spawn')
+            cancel_event = mp_context.Event()
+            executor = ProcessPoolExecutor(max_workers=len(tasks), mp_context=mp_context,
+                                           initializer=init_segment_worker, initargs=(cancel_event,))
+            pending = set()
+            try:
+                pending = {executor.submit(process_segment, task) for task in tasks}
+                while pending and self.is_processing:
+                    # 定时检查是否已停止，不等到下一个片段完成
+                    done, pending = wait(pending, timeout=PARALLEL_CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        segment_id, segment_results, class_names = future.result()
+                        finished_segments[segment_id] = segment_results
+                        self.processed_frame_count += len(segment_results) - tasks[segment_id]['overlap_count']
+                        self.emit_progress()
+                        self.emit_fps()
+                        self.notify('detection_info_updated', f"片段 {segment_id + 1}/{len(tasks)} 处理完成")
+                    
+                    # 按片段顺序拼接跟踪ID
+                    while next_segment in finished_segments:
+                        stitcher.add_segment(finished_segments.pop(next_segment), tasks[next_segment]['overlap_count'])
+                        next_segment += 1
+            finally:
+                # 停止或出错时未完成的片段提前结束
+                if pending:
+                    cancel_event.set()
+                executor.shutdown(wait=self.is_processing, cancel_futures=True)
+            
+            if not self.is_processing:
+                self.notify('detection_info_updated', "并行处理已取消")
+                return False
+            
+            # 合并结果，与逐帧处理的输出格式一致
+            for detection_info in stitcher.merged_results:
+                self.record_result(detection_info, class_names)
+                if self.export_options['save_txt'] and self.output_dir and detection_info['count'] > 0:
+                    self.save_labels_to_txt(detection_info['frame_id'], detection_info, frame_shape)
+            
+            self.frame_count = total_frames
+            self.notify('detection_info_updated', f"并行处理完成: {len(stitcher.merged_results)}帧, 跟踪ID {stitcher.next_track_id - 1}个")
+            self.notify('processing_finished')
+            return True
+            
+        except Exception as e:
+            self.notify('error_occurred', f"并行处理失败: {str(e)}")
+            return False
+        
+        finally:
+            if self.video_capture:
+                self.video_capture.release()
+    
+    def prepare_video(self, video_path):
+        """打开视频文件，计算采样帧并发送视频信息，返回总帧数（失败或已取消时返回None）"""
+        # 加载模型期间可能已取消
+        if self.cancel_requested:
+            return None
+        
+        # 打开视频文件
+        self.video_capture = cv2.VideoCapture(video_path)
+        if not self.video_capture.isOpened():
+            self.notify('error_occurred', "无法打开视频文件")
+            return None
+        
+        # 获取视频信息
+        total_frames = int(self.video_capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        original_fps = self.video_capture.get(cv2.CAP_PROP_FPS)
+        
+        # 按显示时间戳计算需要处理的帧（可变帧率视频读取实际时间戳）
+        self.video_index = build_video_index(video_path, decode_fallback=True) if self.probe_timestamps else None
+        timestamps = self.video_index.timestamps if self.video_index else None
+        if timestamps:
+            total_frames = len(timestamps)
+        else:
+            timestamps = constant_fps_timestamps(total_frames, original_fps)
+        
+        self.frame_timestamps = timestamps
+        self.source_frame_shape = None
+        self.load_region_mask(video_path)
+        self.sampled_frame_indices = FrameSampler(self.target_fps).sample(timestamps)
+        expected_processed_frames = len(self.sampled_frame_indices)
+        sampled_fps = achieved_fps(self.sampled_frame_indices, timestamps)
+        
+        # 平均采样间隔（仅用于显示）
+        self.skip_frames = max(1, round(total_frames / expected_processed_frames)) if expected_processed_frames > 0 else 1
+        video_duration = total_frames / original_fps  # 视频时长（秒）
+        
+        # 扫描视频索引期间取消时不再开始处理
+        self.is_processing = not self.cancel_requested
+        self.frame_count = 0
+        self.processed_frame_count = 0
+        self.expected_processed_frames = expected_processed_frames
+        self.start_time = time.time()
+        self.detection_results.clear()
+        self.reset_tracker()
+        self.create_rate_controller()
+        self.create_motion_gate()
+        self.create_tiler()
+        self.create_result_exporter()
+        self.create_label_writer()
+        
+        # 发送采样帧列表、视频信息和处理参数
+        self.notify('sampled_frames_updated', self.sampled_frame_indices)
+        self.notify('video_info_updated', total_frames, original_fps, self.skip_frames, self.target_fps)
+        
+        # 发送初始信息
+        self.notify('detection_info_updated', f"视频信息: {total_frames}帧, {original_fps:.1f}FPS, 时长{video_duration:.1f}秒")
+        self.notify('detection_info_updated', f"处理设置: 目标{self.target_fps}FPS, 需处理{expected_processed_frames}帧, 实际采样{sampled_fps:.2f}FPS")
+        
+        return total_frames
+    
+    def process_pending_frames(self, pending, batch_size, total_frames, prefetcher):
+        """按批推理已收集的帧，并按帧顺序发送结果和进度"""
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            frame_indices = [item[0] for item in batch]
+            frames = [item[1] for item in batch]
+            
+            for frame_index, (processed_frame, detection_info) in zip(frame_indices, self.process_frames(frames, frame_indices)):
+                self.apply_rate_control(frame_index, detection_info)
+                self.record_result(detection_info, self.class_names())
+                
+                # 发送处理结果
+                self.notify('frame_processed', processed_frame, detection_info)
+                
+                # 发送检测信息
+                count = detection_info.get('count', 0)
+                if count > 0:
+                    info_text = f"帧 {frame_index + 1}/{total_frames}: 检测到 {count} 个对象"
+                    self.notify('detection_info_updated', info_text)
+                
+                self.processed_frame_count += 1
+                self.emit_progress()
+                
+                # 更新FPS和预取队列占用（每10个处理帧更新一次）
+                if self.processed_frame_count % 10 == 0:
+                    self.emit_fps()
+                    self.emit_motion_stats()
+                    self.emit_label_stats()
+                    self.notify('prefetch_stats_updated', prefetcher.get_stats())
+    
+    def emit_progress(self):
+        """发送处理进度（基于实际处理的帧数）"""
+        if self.expected_processed_frames > 0:
+            # 确保processed_frame_count不超过expected_processed_frames
+            actual_processed = min(self.processed_frame_count, self.expected_processed_frames)
+            progress = int((actual_processed / self.expected_processed_frames) * 100)
+            progress = min(progress, 100)  # 确保进度不超过100%
+        else:
+            actual_processed = self.processed_frame_count
+            progress = 0
+            
+        self.notify('progress_updated', actual_processed, self.expected_processed_frames, progress)
+    
+    def emit_fps(self):
+        """发送当前处理速度"""
+        elapsed_time = time.time() - self.start_time
+        if elapsed_time > 0:
+            self.notify('fps_updated', self.processed_frame_count / elapsed_time)
+    
+    def auto_select_batch_size(self, sample_frames):
+        """在样本帧上测量各批大小的吞吐量，选择最快的批大小"""
+        if not self.detection_enabled or self.model is None or not sample_frames:
+            return 1
+        
+        try:
+            # 预热一次，避免首次推理的初始化开销影响测量
+            self.run_inference(sample_frames[:1])
+            
+            best_size = 1
+            best_throughput = 0.0
+            for size in AUTO_BATCH_SIZES:
+                if size > len(sample_frames):
+                    break
+                
+                batch = sample_frames[:size]
+                start = time.perf_counter()
+                self.run_inference(batch)
+                elapsed = time.perf_counter() - start
+                throughput = size / elapsed if elapsed > 0 else 0.0
+                self.notify('detection_info_updated', f"批大小 {size}: {throughput:.1f} 帧/秒")
+                
+                # 吞吐量提升不足5%时不值得增大批大小（增加延迟和内存）
+                if throughput > best_throughput * 1.05:
+                    best_size = size
+                    best_throughput = throughput
+            
+            self.notify('detection_info_updated', f"自动选择批大小: {best_size}")
+            return best_size
+            
+        except Exception as e:
+            self.notify('detection_info_updated', f"批大小自动选择失败，使用1: {str(e)}")
+            return 1
+    
+    def process_frame(self, frame, frame_index):
+        """处理单帧"""
+        return self.process_frames([frame], [frame_index])[0]
+    
+    def process_frames(self, frames, frame_indices):
+        """批量处理多帧，按帧顺序返回 (处理后的帧, 检测信息) 列表"""
+        # 运动门控：画面静止的帧不推理，复用之前最近一次推理的结果
+        if self.motion_gate is not None:
+            layout = self.get_region_layout(frames[0])
+            run_flags = [self.motion_gate.check(frame, layout.mask if layout else None) for frame in frames]
+        else:
+            run_flags = [True] * len(frames)
+        
+        infer_frames = [frame for frame, run in zip(frames, run_flags) if run]
+        try:
+            infer_results = self.run_inference(infer_frames) if infer_frames else []
+        except Exception as e:
+            print(f"处理帧 {frame_indices[0]} 时出错: {e}")
+            infer_results = [None] * len(infer_frames)
+        
+        outputs = []
+        infer_iter = iter(infer_results)
+        for frame, frame_index, run in zip(frames, frame_indices, run_flags):
+            if run:
+                self.last_result = next(infer_iter)
+            processed_frame, detection_info = self.build_frame_result(frame, frame_index, self.last_result)
+            if not run:
+                detection_info['reused'] = True
+            outputs.append((processed_frame, detection_info))
+        return outputs
+    
+    def run_inference(self, frames):
+        """对一批帧进行推理，返回与帧一一对应的结果（无结果时为None）"""
+        if not self.detection_enabled or self.model is None:
+            return [None] * len(frames)
+        
+        options = self.inference_options()
+        layout = self.get_region_layout(frames[0])
+        if layout is not None:
+            if layout.crop is None:
+                return [None] * len(frames)
+            # 只对区域的外接矩形推理，按相同像素密度缩小推理尺寸（结果坐标相对于裁剪区域）
+            frames = [layout.crop_frame(frame) for frame in frames]
+            options['imgsz'] = layout.inference_size(self.imgsz or WARMUP_IMGSZ)
+        
+        if self.tiler is not None:
+            # 分块推理：每帧发生变化的块组成一批推理，结果合并为整帧（或ROI裁剪区域）坐标
+            options['imgsz'] = self.tiler.tile_size
+            predict = lambda tiles: list(self.model(tiles, **options))
+            return [self.tiler.infer(frame, predict, self.is_obb_model) for frame in frames]
+        
+        if self.tracking_enabled:
+            # 使用跟踪：跟踪器状态需要逐帧更新
+            outputs = []
+            for frame in frames:
+                results = self.model.track(frame, tracker=self.tracker_type, persist=True, **options)
+                outputs.append(results[0] if results and len(results) > 0 else None)
+            return outputs
+        
+        # 仅检测：一次模型调用处理整批帧
+        results = self.model(frames if len(frames) > 1 else frames[0], **options)
+        outputs = list(results) if results else []
+        return outputs + [None] * (len(frames) - len(outputs))
+    
+    def build_frame_result(self, frame, frame_index, result):
+        """根据推理结果记录检测信息，启用绘制时在帧的副本上绘制检测框"""
+        processed_frame = frame.copy() if self.render_annotations else frame
+        
+        # 帧按分辨率配置缩放过时，检测框需要按比例换算回原始视频坐标
+        height, width = frame.shape[:2]
+        source_shape = self.source_frame_shape or (height, width)
+        scale_x, scale_y = source_shape[1] / width, source_shape[0] / height
+        bbox_type = 'obb' if self.is_obb_model else 'xyxy'
+        
+        detection_info = {
+            'frame_id': frame_index,
+            'bbox_type': bbox_type,
+            'detections': make_detections(None, None, None),
+            'count': 0
+        }
+        
+        try:
+            if result is not None:
+                # 处理分块推理、OBB模型和普通模型的不同输出
+                boxes = None
+                track_ids = None
+                if isinstance(result, TiledResult):
+                    # 分块推理：已合并的检测结果（没有跟踪ID）
+                    boxes, confidences, class_ids = result.boxes, result.confidences, result.class_ids
+                    detection_info['tiles_inferred'] = result.tiles_inferred
+                else:
+                    # OBB模型取8点坐标(旋转框)，普通模型取xyxy边界框
+                    if self.is_obb_model and getattr(result, 'obb', None) is not None:
+                        outputs, boxes = result.obb, result.obb.xyxyxyxy.cpu().numpy()
+                    elif result.boxes is not None:
+                        outputs, boxes = result.boxes, result.boxes.xyxy.cpu().numpy()
+                    if boxes is not None:
+                        confidences = outputs.conf.cpu().numpy()
+                        class_ids = outputs.cls.cpu().numpy()
+                        # 获取跟踪ID（如果启用跟踪）
+                        if self.tracking_enabled and getattr(outputs, 'id', None) is not None:
+                            track_ids = outputs.id.cpu().numpy()
+                
+                if boxes is not None and len(boxes) > 0:
+                    # 一次生成整帧的结构化检测数组，之后只做数组运算
+                    detections = make_detections(boxes, class_ids, confidences, track_ids)
+                    
+                    # 有区域时：裁剪坐标平移回整帧，丢弃中心不在有效区域内的检测
+                    layout = self.get_region_layout(frame)
+                    if layout is not None:
+                        boxes = offset_boxes(detection_boxes(detections, bbox_type), layout.crop[0], layout.crop[1])
+                        detections['bbox'][:, :boxes[0].size] = boxes.reshape(len(boxes), -1)
+                        detections = detections[layout.contains(boxes)]
+                    
+                    # 绘制使用缩放帧上的坐标，之后原地换算为原始坐标（检测信息和标签使用原始坐标）
+                    if self.render_annotations:
+                        self.renderer.render_detections(processed_frame, detections, bbox_type, self.model.names)
+                    if scale_x != 1 or scale_y != 1:
+                        scale_detections(detections, bbox_type, scale_x, scale_y)
+                    
+                    detection_info['detections'] = detections
+                    detection_info['count'] = len(detections)
+            
+            # 如果启用了txt文件导出，保存标签到txt文件
+            if self.export_options['save_txt'] and self.output_dir and detection_info['count'] > 0:
+                self.save_labels_to_txt(frame_index, detection_info, source_shape)
+            
+        except Exception as e:
+            print(f"处理帧 {frame_index} 时出错: {e}")
+        
+        return processed_frame, detection_info
+    
+    def class_names(self):
+        """获取模型的类别名称，没有加载模型时返回None"""
+        return self.model.names if self.model is not None else None
+    
+    def get_color_for_class(self, class_id):
+        """为不同类别生成不同颜色"""
+        return class_color(class_id)
+    
+    def save_labels_to_txt(self, frame_index, detection_info, frame_shape):
+        """保存标签（YOLO格式）：放入后台写出队列，没有写出线程时直接写入txt文件"""
+        if self.label_writer is not None:
+            self.label_writer.put(frame_index, detection_info, frame_shape)
+            return
+        
+        try:
+            if not self.output_dir:
+                return
+            
+            text = format_labels(detection_info['detections'], detection_info['bbox_type'], frame_shape,
+                                 self.export_options['save_conf'])
+            with open(Path(self.output_dir) / label_filename(frame_index), 'w', encoding='utf-8') as f:
+                f.write(text)
+                    
+        except Exception as e:
+            self.notify('error_occurred', f"保存标签文件失败: {str(e)}")
+    
+    def stop_processing(self):
+        """停止处理"""
+        self.is_processing = False
+    
+    def cancel_processing(self):
+        """取消处理：停止当前处理，尚未开始的处理（加载模型、扫描视频索引期间）也不再开始"""
+        self.cancel_requested = True
+        self.is_processing = False
+    
+    def export_results(self, output_path, format='json'):
+        """
+        导出内存中的检测结果：json（每帧一项）、jsonl / csv / parquet（每个对象一行，按块写出，
+        OBB包含全部角点）、npz（列式存储的单个文件，可用 DetectionStore.load 加载）
+        """
+        try:
+            format = format.lower()
+            if format == 'json':
+                # 逐帧生成并写出，不在内存中构建完整列表
+                with open(output_path, 'w', encoding='utf-8') as f:
+                    f.write('[')
+                    for position, frame_data in enumerate(self.detection_results):
+                        f.write(',\n' if position else '\n')
+                        json.dump(frame_data, f, ensure_ascii=False)
+                    f.write('\n]\n')
+            
+            elif format in STREAM_EXPORT_FORMATS:
+                export_store(self.detection_results, output_path, format)
+            
+            elif format == 'npz':
+                self.detection_results.save(output_path)
+            
+            else:
+                raise ValueError(f"不支持的导出格式: {format}")
+            
+            return True
+            
+        except Exception as e:
+            self.notify('error_occurred', f"导出结果失败: {str(e)}")
+            return False
+    
+    def get_detection_summary(self):
+        """获取检测摘要信息（不保留结果时使用流式导出的统计）"""
+        if not self.keep_results and self.result_exporter is not None:
+            return self.result_exporter.summary()
+        return self.detection_results.summary() 
\ No newline at end of file
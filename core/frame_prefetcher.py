@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+帧预取器
+在独立的解码线程中提前读取需要处理的帧，使解码与推理并行执行
+"""
+
+import queue
+import threading
+import time
+
+# 解码结束标记
+_END_OF_STREAM = object()
+
+class FramePrefetcher:
+    """帧预取器（有界生产者/消费者队列）"""
+    
+    def __init__(self, frame_source, max_queue_size=8):
+        """
+        frame_source: 可迭代对象，逐个产出 (帧索引, 帧) ，只包含需要处理的帧
+        max_queue_size: 队列深度，0 表示不启用解码线程（顺序读取）
+        """
+        self.frame_source = frame_source
+        self.max_queue_size = max(0, int(max_queue_size))
+        self.frame_queue = queue.Queue(maxsize=max(1, self.max_queue_size))
+        self.decoder_thread = None
+        self.stop_event = threading.Event()
+        self.error = None
+        
+        # 统计信息
+        self.produced_count = 0  # 已解码入队的帧数
+        self.consumed_count = 0  # 已被推理取走的帧数
+        self.decode_wait_time = 0.0  # 队列已满时解码线程的等待时间（推理是瓶颈）
+        self.inference_wait_time = 0.0  # 队列为空时推理线程的等待时间（解码是瓶颈）
+        self.occupancy_total = 0
+        self.occupancy_samples = 0
+    
+    @property
+    def enabled(self):
+        """是否启用解码线程"""
+        return self.max_queue_size > 0
+    
+    def start(self):
+        """启动解码线程"""
+        if not self.enabled or self.decoder_thread is not None:
+            return
+        
+        self.decoder_thread = threading.Thread(target=self._decode_loop, name='FramePrefetcher', daemon=True)
+        self.decoder_thread.start()
+    
+    def _decode_loop(self):
+        """解码线程主循环"""
+        try:
+            for item in self.frame_source:
+                if not self._put(item):
+                    return
+                self.produced_count += 1
+        except Exception as e:
+            self.error = e
+        finally:
+            self._put(_END_OF_STREAM)
+    
+    def _put(self, item):
+        """将帧放入队列，队列已满时等待；停止后返回False"""
+        start = time.perf_counter()
+        while not self.stop_event.is_set():
+            try:
+                self.frame_queue.put(item, timeout=0.1)
+                self.decode_wait_time += time.perf_counter() - start
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def __iter__(self):
+        """按顺序产出 (帧索引, 帧)"""
+        if not self.enabled:
+            for item in self.frame_source:
+                self.produced_count += 1
+                self.consumed_count += 1
+                yield item
+            return
+        
+        while True:
+            self.occupancy_total += self.frame_queue.qsize()
+            self.occupancy_samples += 1
+            
+            start = time.perf_counter()
+            item = self.frame_queue.get()
+            self.inference_wait_time += time.perf_counter() - start
+            
+            if item is _END_OF_STREAM:
+                break
+            
+            self.consumed_count += 1
+            yield item
+        
+        if self.error is not None:
+            raise self.error
+    
+    def stop(self):
+        """停止解码线程并清空队列"""
+        self.stop_event.set()
+        self._drain()
+        if self.decoder_thread is not None:
+            self.decoder_thread.join()
+            self.decoder_thread = None
+        self._drain()
+    
+    def _drain(self):
+        """清空队列中剩余的帧"""
+        while True:
+            try:
+                self.frame_queue.get_nowait()
+            except queue.Empty:
+                break
+    
+    def get_stats(self):
+        """获取队列占用统计"""
+        average_occupancy = self.occupancy_total / self.occupancy_samples if self.occupancy_samples > 0 else 0.0
+        
+        # 推理等待解码的时间更长说明解码是瓶颈，反之为推理瓶颈
+        if not self.enabled:
+            bottleneck = 'none'
+        elif self.inference_wait_time > self.decode_wait_time:
+            bottleneck = 'decode'
+        else:
+            bottleneck = 'inference'
+        
+        return {
+            'queue_size': self.frame_queue.qsize() if self.enabled else 0,
+            'max_queue_size': self.max_queue_size,
+            'average_occupancy': average_occupancy,
+            'produced_count': self.produced_count,
+            'consumed_count': self.consumed_count,
+            'decode_wait_time': self.decode_wait_time,
+            'inference_wait_time': self.inference_wait_time,
+            'bottleneck': bottleneck
+        }
+
+def format_prefetch_stats(stats):
+    """将预取统计格式化为可读文本"""
+    if stats.get('max_queue_size', 0) <= 0:
+        return "解码预取: 未启用"
+    
+    bottleneck_names = {
+        'decode': '视频解码',
+        'inference': '模型推理',
+        'none': '无'
+    }
+    bottleneck = bottleneck_names.get(stats.get('bottleneck'), '未知')
+    return (f"解码队列: {stats['queue_size']}/{stats['max_queue_size']} "
+            f"(平均 {stats['average_occupancy']:.1f}), "
+            f"解码等待 {stats['decode_wait_time']:.1f}s, 推理等待 {stats['inference_wait_time']:.1f}s, "
+            f"瓶颈: {bottleneck}")
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+原始帧提供器
+按需从视频文件读取原始帧（不在导入时解码整个视频）：后台线程建立一次关键帧索引用于跳转，
+已解码的帧保存在按内存上限淘汰的LRU缓存中，并按播放方向在后台提前读取即将显示的帧
+"""
+
+import threading
+from collections import OrderedDict, deque
+import cv2
+from core.video_index import build_video_index
+from core.video_reader import SparseFrameReader
+
+# 缓存的内存上限（MB）
+DEFAULT_MEMORY_LIMIT_MB = 512
+
+# 按播放方向提前读取的帧数
+DEFAULT_READ_AHEAD = 16
+
+class FrameProvider:
+    """按需读取并缓存视频原始帧"""
+    
+    def __init__(self, video_path, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB, read_ahead=DEFAULT_READ_AHEAD,
+                 build_index=True):
+        """
+        memory_limit_mb: 缓存帧的内存上限（MB），超过时淘汰最久未使用的帧
+        read_ahead: prefetch 最多提前读取的帧数（不超过内存上限的一半能容纳的帧数）
+        build_index: 是否在后台建立关键帧索引（建立完成前按帧间隔判断是否跳转）
+        """
+        self.video_path = video_path
+        self.memory_limit = int(memory_limit_mb * 1024 * 1024)
+        self.capture = cv2.VideoCapture(video_path)
+        self.frame_count = int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.frame_shape = (int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                            int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH)))
+        frame_bytes = max(1, self.frame_shape[0] * self.frame_shape[1] * 3)
+        self.read_ahead = max(0, min(int(read_ahead), self.memory_limit // frame_bytes // 2))
+        self.reader = SparseFrameReader(self.capture, [])
+        
+        # 缓存：帧索引 -> 帧，最近使用的在末尾
+        self.frames = OrderedDict()
+        self.memory_usage = 0
+        self.cache_lock = threading.Lock()  # 保护缓存（持有时间短）
+        self.decode_lock = threading.Lock()  # 保护解码器（一次解码一帧）
+        
+        # 提前读取请求
+        self.wanted = deque()
+        self.condition = threading.Condition()
+        self.stopped = False
+        self.thread = None
+        
+        # 统计
+        self.hit_count = 0  # 请求的帧已在缓存中
+        self.miss_count = 0  # 请求的帧需要立即解码
+        self.prefetched_count = 0  # 后台提前读取的帧数
+        self.evicted_count = 0
+        
+        if self.capture.isOpened():
+            self.thread = threading.Thread(target=self.run, name='FrameProvider', daemon=True)
+            self.thread.start()
+            if build_index:
+                # 扫描整个视频的数据包，在独立线程中进行，不延迟提前读取（完成后不需要等待）
+                threading.Thread(target=self.load_index, name='FrameProviderIndex', daemon=True).start()
+    
+    def is_opened(self):
+        """视频是否成功打开"""
+        return self.capture.isOpened()
+    
+    def get(self, frame_index):
+        """获取原始帧，不在缓存中时立即解码，无法读取时返回None"""
+        with self.cache_lock:
+            frame = self.frames.get(frame_index)
+            if frame is not None:
+                self.frames.move_to_end(frame_index)
+                self.hit_count += 1
+                return frame
+            self.miss_count += 1
+        return self.decode(frame_index)
+    
+    def prefetch(self, frame_indices):
+        """按给定顺序在后台提前读取帧（替换之前未完成的请求）"""
+        with self.cache_lock:
+            frame_indices = [index for index in frame_indices[:self.read_ahead] if index not in self.frames]
+        with self.condition:
+            self.wanted = deque(frame_indices)
+            self.condition.notify()
+    
+    def decode(self, frame_index):
+        """解码指定帧并放入缓存"""
+        with self.decode_lock:
+            # 等待解码器期间后台线程可能已读取该帧
+            with self.cache_lock:
+                frame = self.frames.get(frame_index)
+            if frame is not None:
+                return frame
+            if self.stopped or frame_index < 0:
+                return None
+            frame = self.reader.read_at(frame_index)
+        if frame is not None:
+            self.store(frame_index, frame)
+        return frame
+    
+    def store(self, frame_index, frame):
+        """放入缓存，超过内存上限时淘汰最久未使用的帧（至少保留刚放入的帧）"""
+        with self.cache_lock:
+            if frame_index in self.frames:
+                return
+            self.frames[frame_index] = frame
+            self.memory_usage += frame.nbytes
+            while self.memory_usage > self.memory_limit and len(self.frames) > 1:
+                _, evicted = self.frames.popitem(last=False)
+                self.memory_usage -= evicted.nbytes
+                self.evicted_count += 1
+    
+    def load_index(self):
+        """建立关键帧索引，之后读取较远的帧时按GOP结构判断跳转还是顺序跳过"""
+        video_index = build_video_index(self.video_path)
+        if video_index is not None and video_index.has_keyframes:
+            with self.decode_lock:
+                self.reader.video_index = video_index
+    
+    def run(self):
+        """后台线程：处理提前读取请求"""
+        while True:
+            with self.condition:
+                while not self.wanted and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                frame_index = self.wanted.popleft()
+            
+            with self.cache_lock:
+                cached = frame_index in self.frames
+            if not cached and self.decode(frame_index) is not None:
+                self.prefetched_count += 1
+    
+    def close(self):
+        """停止后台线程，释放视频和缓存"""
+        with self.condition:
+            self.stopped = True
+            self.wanted.clear()
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        with self.decode_lock:
+            self.capture.release()
+        with self.cache_lock:
+            self.frames.clear()
+            self.memory_usage = 0
+    
+    def get_stats(self):
+        """获取缓存和解码统计"""
+        requests = self.hit_count + self.miss_count
+        return dict(self.reader.get_stats(),
+                    cached_count=len(self.frames),
+                    memory_mb=self.memory_usage / 1024 / 1024,
+                    memory_limit_mb=self.memory_limit / 1024 / 1024,
+                    hit_count=self.hit_count,
+                    miss_count=self.miss_count,
+                    hit_rate=self.hit_count / requests if requests > 0 else 0.0,
+                    prefetched_count=self.prefetched_count,
+                    evicted_count=self.evicted_count,
+                    indexed=self.reader.video_index is not None)
+
+def format_provider_stats(stats):
+    """格式化原始帧缓存统计为显示文本"""
+    return (f"原始帧缓存: {stats['cached_count']}帧 {stats['memory_mb']:.0f}/{stats['memory_limit_mb']:.0f}MB, "
+            f"命中率{stats['hit_rate'] * 100:.0f}%, 后台预读{stats['prefetched_count']}帧, "
+            f"解码{stats['decoded_count']}帧, 跳转{stats['seek_count']}次")
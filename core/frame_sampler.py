@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+帧采样器
+按显示时间戳选择需要处理的帧，使实际处理帧率与目标帧率一致（支持可变帧率视频）
+"""
+
+class FrameSampler:
+    """基于时间戳的帧采样器"""
+    
+    def __init__(self, target_fps):
+        self.target_fps = max(1e-3, float(target_fps))
+    
+    def sample(self, timestamps):
+        """根据每帧显示时间戳（秒，按显示顺序）返回被采样的帧索引列表"""
+        if not timestamps:
+            return []
+        
+        period = 1.0 / self.target_fps
+        start_time = timestamps[0]
+        sample_number = 0  # 下一个采样时刻的序号，采样时刻 = start_time + sample_number * period
+        sampled_indices = []
+        frame_total = len(timestamps)
+        
+        for index, timestamp in enumerate(timestamps):
+            # 当前帧覆盖到与下一帧的中点，采样时刻落在此范围内则当前帧是最近的帧
+            if index + 1 < frame_total:
+                frame_end = (timestamp + timestamps[index + 1]) / 2.0
+            elif index > 0:
+                frame_end = timestamp + (timestamp - timestamps[index - 1]) / 2.0
+            else:
+                frame_end = timestamp
+            
+            if frame_end >= start_time + sample_number * period:
+                sampled_indices.append(index)
+                # 跳过被当前帧覆盖的所有采样时刻，保证每帧最多被采样一次
+                while start_time + sample_number * period <= frame_end:
+                    sample_number += 1
+        
+        return sampled_indices
+    
+    def iter_sample(self, timestamps, fps_source=None):
+        """逐个产出采样帧索引，每采样一帧后重新读取目标帧率（用于处理过程中调整采样率）"""
+        fps_source = fps_source or (lambda: self.target_fps)
+        frame_total = len(timestamps)
+        next_time = timestamps[0] if timestamps else 0.0
+        
+        for index, timestamp in enumerate(timestamps):
+            if index + 1 < frame_total:
+                frame_end = (timestamp + timestamps[index + 1]) / 2.0
+            elif index > 0:
+                frame_end = timestamp + (timestamp - timestamps[index - 1]) / 2.0
+            else:
+                frame_end = timestamp
+            
+            if frame_end >= next_time:
+                yield index
+                period = 1.0 / max(1e-3, float(fps_source()))
+                while next_time <= frame_end:
+                    next_time += period
+
+def constant_fps_timestamps(total_frames, fps):
+    """生成固定帧率视频的每帧时间戳（秒）"""
+    if fps <= 0:
+        fps = 30.0
+    return [index / fps for index in range(max(0, int(total_frames)))]
+
+def achieved_fps(sampled_indices, timestamps):
+    """计算采样后的实际处理帧率"""
+    if len(sampled_indices) < 2:
+        return 0.0
+    
+    duration = timestamps[sampled_indices[-1]] - timestamps[sampled_indices[0]]
+    if duration <= 0:
+        return 0.0
+    return (len(sampled_indices) - 1) / duration
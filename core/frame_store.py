@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+压缩帧存储
+保存处理帧用于回放：帧由后台线程压缩（JPEG/PNG/LZ4）后保存在内存中，压缩数据超过内存预算后
+追加写入临时文件并通过内存映射读取；回放时后台线程提前解压播放位置之后的帧
+"""
+
+import mmap
+import tempfile
+import threading
+from collections import OrderedDict, deque
+import cv2
+import numpy as np
+
+# 压缩方式：jpeg（有损，压缩率最高）、png（无损）、lz4（无损，最快，需要安装 lz4）
+FRAME_CODECS = {
+    'jpeg': "JPEG",
+    'png': "PNG（无损）",
+    'lz4': "LZ4（无损）"
+}
+DEFAULT_FRAME_CODEC = 'jpeg'
+
+# 内存中压缩数据的预算（MB），超过后写入磁盘
+DEFAULT_MEMORY_BUDGET_MB = 1024
+
+# 已解压帧的缓存数量
+DEFAULT_DECODED_CACHE_SIZE = 12
+
+# 回放时提前解压的帧数
+DEFAULT_DECODE_AHEAD = 8
+
+# 等待压缩的帧数上限，超过时在调用线程中直接压缩
+MAX_PENDING_FRAMES = 16
+
+JPEG_QUALITY = 90
+PNG_COMPRESSION = 1  # 压缩级别低，速度优先
+
+def encode_frame(frame, codec, quality=JPEG_QUALITY):
+    """压缩帧为字节串"""
+    if codec == 'lz4':
+        import lz4.frame
+        return lz4.frame.compress(np.ascontiguousarray(frame).data)
+    
+    if codec == 'jpeg':
+        ok, data = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    else:
+        ok, data = cv2.imencode('.png', frame, [cv2.IMWRITE_PNG_COMPRESSION, PNG_COMPRESSION])
+    if not ok:
+        raise ValueError(f"帧压缩失败: {codec}")
+    return data.tobytes()
+
+def decode_frame(data, codec, shape):
+    """解压字节串为帧"""
+    if codec == 'lz4':
+        import lz4.frame
+        return np.frombuffer(lz4.frame.decompress(data), dtype=np.uint8).reshape(shape)
+    
+    flags = cv2.IMREAD_COLOR if len(shape) == 3 else cv2.IMREAD_GRAYSCALE
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flags)
+
+class FrameStore:
+    """按位置保存处理帧的压缩存储（可按下标读取）"""
+    
+    def __init__(self, codec=DEFAULT_FRAME_CODEC, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB,
+                 decoded_cache_size=DEFAULT_DECODED_CACHE_SIZE, decode_ahead=DEFAULT_DECODE_AHEAD,
+                 quality=JPEG_QUALITY, spill_dir=None):
+        """
+        memory_budget_mb: 内存中压缩数据的预算（MB），超过后新的帧写入 spill_dir 下的临时文件（默认系统临时目录）
+        decoded_cache_size: 已解压帧的缓存数量（最近读取和提前解压的帧）
+        decode_ahead: prefetch 最多提前解压的帧数
+        """
+        if codec not in FRAME_CODECS:
+            raise ValueError(f"不支持的帧压缩方式: {codec}")
+        if codec == 'lz4':
+            try:
+                import lz4.frame  # noqa: F401
+            except ImportError:
+                raise RuntimeError("LZ4压缩需要安装lz4: pip install lz4")
+        
+        self.codec = codec
+        self.quality = quality
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.decoded_cache_size = max(1, int(decoded_cache_size))
+        self.decode_ahead = max(0, int(decode_ahead))
+        self.spill_dir = spill_dir
+        
+        self.condition = threading.Condition()  # 保护下面的全部状态
+        self.thread = None
+        self.reset()
+    
+    def reset(self):
+        """初始化为空存储"""
+        self.entries = []  # 每帧: None（等待压缩）、bytes（内存中）或 (偏移, 长度)（磁盘上）
+        self.shapes = []
+        self.pending = {}  # 帧位置 -> 等待压缩的原始帧
+        self.encode_queue = deque()
+        self.wanted = deque()  # 等待提前解压的帧位置
+        self.decoded = OrderedDict()  # 帧位置 -> 已解压的帧，最近使用的在末尾
+        self.stopped = False
+        
+        self.spill_file = None
+        self.spill_map = None
+        self.spill_size = 0
+        
+        # 统计
+        self.memory_bytes = 0  # 内存中的压缩数据
+        self.raw_bytes = 0  # 已压缩帧的原始大小
+        self.spilled_count = 0
+        self.hit_count = 0
+        self.miss_count = 0
+        self.prefetched_count = 0
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def __getitem__(self, position):
+        return self.get(position)
+    
+    def append(self, frame):
+        """添加一帧（保存引用，由后台线程压缩），返回帧位置"""
+        with self.condition:
+            position = len(self.entries)
+            self.entries.append(None)
+            self.shapes.append(frame.shape)
+            encode_now = len(self.pending) >= MAX_PENDING_FRAMES
+            if not encode_now:
+                self.pending[position] = frame
+                self.encode_queue.append(position)
+                self.start_worker()
+                self.condition.notify()
+        
+        # 压缩速度跟不上时在调用线程中压缩，等待压缩的帧占用的内存有界
+        if encode_now:
+            self.put_encoded(position, encode_frame(frame, self.codec, self.quality), frame.nbytes)
+        return position
+    
+    def get(self, position):
+        """获取帧，未解压时立即解压"""
+        with self.condition:
+            frame = self.decoded.get(position)
+            if frame is not None:
+                self.decoded.move_to_end(position)
+                self.hit_count += 1
+                return frame
+            
+            frame = self.pending.get(position)
+            if frame is not None:
+                self.hit_count += 1
+                return frame
+            
+            self.miss_count += 1
+            data = self.read_entry(position)
+            shape = self.shapes[position]
+        
+        frame = decode_frame(data, self.codec, shape)
+        self.cache_decoded(position, frame)
+        return frame
+    
+    def prefetch(self, positions):
+        """按给定顺序在后台提前解压帧（替换之前未完成的请求）"""
+        with self.condition:
+            self.wanted = deque(position for position in list(positions)[:self.decode_ahead]
+                                if 0 <= position < len(self.entries) and position not in self.decoded
+                                and self.entries[position] is not None)
+            if self.wanted:
+                self.start_worker()
+                self.condition.notify()
+    
+    def start_worker(self):
+        """启动后台线程（调用时需持有锁）"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name='FrameStore', daemon=True)
+            self.thread.start()
+    
+    def run(self):
+        """后台线程：提前解压回放需要的帧，其余时间压缩新添加的帧"""
+        while True:
+            with self.condition:
+                while not self.wanted and not self.encode_queue and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                
+                if self.wanted:
+                    position = self.wanted.popleft()
+                    if position in self.decoded:
+                        continue
+                    data = self.read_entry(position)
+                    shape = self.shapes[position]
+                    frame = None
+                else:
+                    position = self.encode_queue.popleft()
+                    frame = self.pending[position]
+            
+            if frame is None:
+                self.cache_decoded(position, decode_frame(data, self.codec, shape))
+                self.prefetched_count += 1
+            else:
+                self.put_encoded(position, encode_frame(frame, self.codec, self.quality), frame.nbytes)
+    
+    def put_encoded(self, position, data, raw_size):
+        """保存压缩数据：内存预算以内保存在内存中，否则追加写入临时文件"""
+        with self.condition:
+            if self.stopped:
+                return
+            if self.memory_bytes + len(data) <= self.memory_budget:
+                self.entries[position] = data
+                self.memory_bytes += len(data)
+            else:
+                if self.spill_file is None:
+                    self.spill_file = tempfile.TemporaryFile(prefix='frames_', suffix='.bin', dir=self.spill_dir)
+                self.spill_file.write(data)
+                self.entries[position] = (self.spill_size, len(data))
+                self.spill_size += len(data)
+                self.spilled_count += 1
+            self.raw_bytes += raw_size
+            self.pending.pop(position, None)
+    
+    def read_entry(self, position):
+        """读取一帧的压缩数据（调用时需持有锁）"""
+        entry = self.entries[position]
+        if isinstance(entry, bytes):
+            return entry
+        
+        offset, size = entry
+        if self.spill_map is None or offset + size > len(self.spill_map):
+            # 文件增长后重新映射
+            self.spill_file.flush()
+            if self.spill_map is not None:
+                self.spill_map.close()
+            self.spill_map = mmap.mmap(self.spill_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.spill_map[offset:offset + size]
+    
+    def cache_decoded(self, position, frame):
+        """放入已解压帧缓存"""
+        with self.condition:
+            if self.stopped:
+                return
+            self.decoded[position] = frame
+            self.decoded.move_to_end(position)
+            while len(self.decoded) > self.decoded_cache_size:
+                self.decoded.popitem(last=False)
+    
+    def close(self):
+        """停止后台线程，删除临时文件并释放全部帧"""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        
+        with self.condition:
+            if self.spill_map is not None:
+                self.spill_map.close()
+            if self.spill_file is not None:
+                self.spill_file.close()
+            self.reset()
+    
+    def clear(self):
+        """清空存储（可继续添加帧）"""
+        self.close()
+    
+    def get_stats(self):
+        """获取内存占用和命中统计"""
+        with self.condition:
+            pending_bytes = sum(frame.nbytes for frame in self.pending.values())
+            decoded_bytes = sum(frame.nbytes for frame in self.decoded.values())
+            encoded_count = len(self.entries) - len(self.pending)
+            requests = self.hit_count + self.miss_count
+            return {
+                'codec': self.codec,
+                'frame_count': len(self.entries),
+                'pending_count': len(self.pending),
+                'memory_mb': (self.memory_bytes + pending_bytes + decoded_bytes) / 1024 / 1024,
+                'compressed_mb': self.memory_bytes / 1024 / 1024,
+                'memory_budget_mb': self.memory_budget / 1024 / 1024,
+                'decoded_mb': decoded_bytes / 1024 / 1024,
+                'spilled_count': self.spilled_count,
+                'spilled_mb': self.spill_size / 1024 / 1024,
+                'compression_ratio': (self.raw_bytes / max(1, self.memory_bytes + self.spill_size)
+                                      if encoded_count else 0.0),
+                'hit_count': self.hit_count,
+                'miss_count': self.miss_count,
+                'hit_rate': self.hit_count / requests if requests > 0 else 0.0,
+                'prefetched_count': self.prefetched_count
+            }
+
+def format_frame_store_stats(stats):
+    """格式化帧存储统计为状态栏文本"""
+    text = (f"帧存储({FRAME_CODECS[stats['codec']]}): 内存{stats['memory_mb']:.0f}MB, "
+            f"压缩{stats['compression_ratio']:.0f}:1")
+    if stats['spilled_count']:
+        text += f", 磁盘{stats['spilled_mb']:.0f}MB({stats['spilled_count']}帧)"
+    return text + f", 命中{stats['hit_count']}/未命中{stats['miss_count']}"
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+视频任务队列
+按优先级将多个视频分配给工作线程池处理，每个工作线程持有常驻的处理引擎，模型在任务之间保持加载
+"""
+
+import os
+import queue
+import itertools
+import threading
+import time
+from core.engine import YOLOEngine, DEFAULT_MODEL_PATH
+from core.result_export import STREAM_EXPORT_FORMATS
+from core.label_writer import DEFAULT_LABEL_LAYOUT
+from core.model_cache import ModelCache
+
+# 任务状态
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+
+# 任务的默认处理参数，每个任务开始前都会完整应用一次，避免参数在任务之间延续
+DEFAULT_JOB_SETTINGS = {
+    'model_path': None,
+    'backend': 'pytorch',
+    'auto_model_size': False,
+    'resolution_profile': 'native',
+    'roi_path': None,
+    'target_fps': 25,
+    'tracker': 'ByteTrack',
+    'tracking_enabled': True,
+    'batch_size': 1,
+    'prefetch_size': 8,
+    'decode_mode': 'auto',
+    'probe_timestamps': True,
+    'parallel_workers': 1,
+    'live_queue_size': 1,
+    'adaptive_rate': False,
+    'adaptive_options': None,
+    'motion_gate': False,
+    'motion_options': None,
+    'tiled_inference': False,
+    'tile_options': None,
+    'render_annotations': False,
+    'simulate_live': False,
+    'save_txt': False,
+    'save_conf': False,
+    'label_layout': DEFAULT_LABEL_LAYOUT,
+    'output_dir': None,
+    'export_format': None,
+    'export_path': None
+}
+
+# 工作线程退出标记
+_STOP_WORKER = object()
+
+class VideoJob:
+    """视频处理任务"""
+    
+    def __init__(self, job_id, video_path, priority=0, settings=None):
+        self.job_id = job_id
+        self.video_path = video_path
+        self.priority = priority  # 数值越大越先处理
+        self.settings = dict(DEFAULT_JOB_SETTINGS)
+        self.settings.update(settings or {})
+        
+        self.status = JOB_PENDING
+        self.error = None
+        self.summary = {}
+        self.processed_frames = 0
+        self.worker_id = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_requested = False
+    
+    def to_dict(self):
+        """获取任务状态信息"""
+        return {
+            'job_id': self.job_id,
+            'video_path': self.video_path,
+            'priority': self.priority,
+            'status': self.status,
+            'error': self.error,
+            'processed_frames': self.processed_frames,
+            'worker_id': self.worker_id,
+            'elapsed': (self.finished_at or time.time()) - self.started_at if self.started_at else 0.0,
+            'summary': self.summary
+        }
+
+class JobScheduler:
+    """视频任务调度器（工作线程池 + 常驻模型）"""
+    
+    def __init__(self, worker_count=1, event_callback=None, torch_threads=None, model_memory_budget_mb=None):
+        """
+        event_callback: callback(事件名, 任务, *参数)，事件包括 job_started/job_finished
+                        以及处理引擎的全部事件（progress_updated 等）
+        torch_threads: 推理线程总数，会平均分配给工作线程，None表示不限制
+        model_memory_budget_mb: 每个工作线程的模型缓存内存预算（MB），None表示不限制
+        """
+        self.worker_count = max(1, int(worker_count))
+        self.event_callback = event_callback
+        self.torch_threads = torch_threads
+        self.model_memory_budget_mb = model_memory_budget_mb
+        
+        self.job_queue = queue.PriorityQueue()
+        self.sequence = itertools.count()  # 相同优先级按提交顺序处理
+        self.jobs = {}
+        self.engines = {}  # 工作线程ID -> 处理引擎
+        self.running_jobs = {}  # 工作线程ID -> 正在处理的任务
+        self.workers = []
+        self.lock = threading.Lock()
+    
+    def submit(self, video_path, priority=0, **settings):
+        """提交视频处理任务，返回任务对象"""
+        job = VideoJob(next(self.sequence), video_path, priority, settings)
+        with self.lock:
+            self.jobs[job.job_id] = job
+        self.job_queue.put((-priority, job.job_id, job))
+        return job
+    
+    def cancel(self, job_id):
+        """取消任务：等待中的任务直接跳过（发送 job_finished），正在处理的任务停止处理"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.status in (JOB_DONE, JOB_FAILED, JOB_CANCELLED):
+                return False
+            
+            job.cancel_requested = True
+            pending = job.status == JOB_PENDING
+            if pending:
+                job.status = JOB_CANCELLED
+                job.finished_at = time.time()
+            engine = None if pending else self.engines.get(job.worker_id)
+        
+        if pending:
+            # 等待中的任务不会再被处理，在这里报告结束
+            self._notify('job_finished', job)
+        elif engine is not None:
+            engine.cancel_processing()
+        return True
+    
+    def cancel_all(self):
+        """取消所有未完成的任务"""
+        for job_id in list(self.jobs):
+            self.cancel(job_id)
+    
+    def start(self):
+        """启动工作线程"""
+        if self.workers:
+            return
+        
+        # 多个工作线程共享CPU，限制每个线程的推理线程数
+        if self.torch_threads:
+            try:
+                import torch
+                torch.set_num_threads(max(1, int(self.torch_threads)))
+            except ImportError:
+                pass
+        
+        for worker_id in range(self.worker_count):
+            worker = threading.Thread(target=self._worker_loop, args=(worker_id,),
+                                      name=f'JobWorker-{worker_id}', daemon=True)
+            self.workers.append(worker)
+            worker.start()
+    
+    def wait(self):
+        """等待所有已提交的任务完成"""
+        self.job_queue.join()
+    
+    def shutdown(self, cancel_pending=False):
+        """停止所有工作线程（默认先处理完已提交的任务）"""
+        if cancel_pending:
+            self.cancel_all()
+        
+        for _ in self.workers:
+            # 退出标记优先级最低，排在所有已提交任务之后
+            self.job_queue.put((float('inf'), next(self.sequence), _STOP_WORKER))
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+    
+    def get_jobs(self):
+        """获取所有任务的状态信息"""
+        with self.lock:
+            return [job.to_dict() for job in self.jobs.values()]
+    
+    def get_model_stats(self):
+        """获取每个工作线程的模型缓存统计"""
+        with self.lock:
+            return {worker_id: engine.model_cache.get_stats() for worker_id, engine in self.engines.items()}
+    
+    def _notify(self, event, job, *args):
+        """发送调度事件"""
+        if self.event_callback is not None:
+            self.event_callback(event, job, *args)
+    
+    def _worker_loop(self, worker_id):
+        """工作线程主循环"""
+        # 每个工作线程持有独立的引擎：模型在任务之间保持加载，跟踪器状态互不干扰
+        engine = YOLOEngine(event_callback=lambda event, *args: self._on_engine_event(worker_id, event, *args))
+        engine.verbose = False
+        # 模型实例带有跟踪器状态，不能在线程间共享，每个工作线程使用独立的模型缓存
+        engine.model_cache = ModelCache(self.model_memory_budget_mb)
+        with self.lock:
+            self.engines[worker_id] = engine
+        
+        while True:
+            _, _, job = self.job_queue.get()
+            try:
+                if job is _STOP_WORKER:
+                    return
+                self._run_job(worker_id, engine, job)
+            finally:
+                self.job_queue.task_done()
+    
+    def _run_job(self, worker_id, engine, job):
+        """在指定引擎上处理任务"""
+        with self.lock:
+            if job.status == JOB_CANCELLED:
+                return
+            job.status = JOB_RUNNING
+            job.worker_id = worker_id
+            job.started_at = time.time()
+            self.running_jobs[worker_id] = job
+            # 在锁内清除上一个任务的取消请求，之后的取消一定作用于本任务
+            engine.cancel_requested = False
+        
+        self._notify('job_started', job)
+        try:
+            self.apply_settings(engine, job.settings)
+            
+            success = engine.process_video(job.video_path)
+            # 流式导出的格式已在处理过程中写出
+            if (success and not job.cancel_requested and job.settings['export_format']
+                    and job.settings['export_format'] not in STREAM_EXPORT_FORMATS):
+                success = engine.export_results(job.settings['export_path'], job.settings['export_format'])
+            
+            job.processed_frames = engine.processed_frame_count
+            job.summary = engine.get_detection_summary()
+            if job.cancel_requested:
+                job.status = JOB_CANCELLED
+            elif success and job.error is None:
+                job.status = JOB_DONE
+            else:
+                job.status = JOB_FAILED
+        
+        except Exception as e:
+            job.error = str(e)
+            job.status = JOB_FAILED
+        
+        finally:
+            job.finished_at = time.time()
+            with self.lock:
+                self.running_jobs.pop(worker_id, None)
+            # 任务结束后清除跟踪器状态，不让跟踪ID延续到下一个视频
+            engine.reset_tracker()
+            self._notify('job_finished', job)
+    
+    def apply_settings(self, engine, settings):
+        """将任务参数完整应用到引擎"""
+        model_path = settings['model_path']
+        if (model_path or DEFAULT_MODEL_PATH) != (engine.model_path or DEFAULT_MODEL_PATH):
+            # 任务使用不同的模型时切换（None表示默认模型，已缓存的模型不会重新加载）
+            engine.model = None
+        engine.model_path = model_path
+        engine.set_backend(settings['backend'])
+        engine.set_auto_model_size(settings['auto_model_size'])
+        engine.set_resolution_profile(settings['resolution_profile'])
+        engine.set_roi_path(settings['roi_path'])
+        
+        engine.set_target_fps(settings['target_fps'])
+        engine.set_tracker(settings['tracker'])
+        engine.set_tracking_enabled(settings['tracking_enabled'])
+        engine.set_batch_size(settings['batch_size'])
+        engine.set_prefetch_size(settings['prefetch_size'])
+        engine.set_decode_mode(settings['decode_mode'])
+        engine.set_probe_timestamps(settings['probe_timestamps'])
+        engine.set_parallel_workers(settings['parallel_workers'])
+        engine.set_live_options(settings['live_queue_size'], settings['simulate_live'])
+        # 选项未指定时使用默认值，不沿用上一个任务的选项
+        engine.reset_options()
+        engine.set_adaptive_rate(settings['adaptive_rate'], **(settings['adaptive_options'] or {}))
+        engine.set_motion_gate(settings['motion_gate'], **(settings['motion_options'] or {}))
+        engine.set_tiled_inference(settings['tiled_inference'], **(settings['tile_options'] or {}))
+        engine.set_render_annotations(settings['render_annotations'])
+        engine.set_export_options(save_txt=settings['save_txt'], save_conf=settings['save_conf'],
+                                  output_dir=settings['output_dir'], label_layout=settings['label_layout'])
+        
+        # 逐对象的表格格式在处理过程中流式写出，结果不保留在内存中
+        streaming = settings['export_format'] in STREAM_EXPORT_FORMATS
+        engine.set_stream_export(settings['export_path'] if streaming else None, settings['export_format'])
+        engine.set_keep_results(not streaming)
+    
+    def _on_engine_event(self, worker_id, event, *args):
+        """将引擎事件附带任务信息转发"""
+        job = self.running_jobs.get(worker_id)
+        if job is None:
+            return
+        if event == 'error_occurred' and job.error is None:
+            job.error = args[0]
+        self._notify(event, job, *args)
+
+def default_torch_threads(worker_count):
+    """按工作线程数平均分配的推理线程数"""
+    return max(1, (os.cpu_count() or 1) // max(1, worker_count))
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步标签写出
+推理线程只把每帧的检测数组放入有界队列，后台线程批量取出、向量化归一化后写出YOLO格式标签：
+每帧一个txt文件，或全部写入一个tar/zip归档并生成索引文件。队列满时推理线程等待（内存有界），
+停止或出错时写出队列中剩余的标签
+"""
+
+import io
+import csv
+import time
+import queue
+import tarfile
+import zipfile
+import threading
+from pathlib import Path
+import numpy as np
+from core.detection_store import BBOX_WIDTH
+
+# 标签输出方式
+LABEL_LAYOUTS = {
+    'txt': "每帧一个txt文件",
+    'tar': "tar归档（附索引）",
+    'zip': "zip归档（附索引）"
+}
+DEFAULT_LABEL_LAYOUT = 'txt'
+
+# 归档文件名（不含扩展名）
+ARCHIVE_NAME = 'labels'
+
+# 队列中最多等待写出的帧数
+DEFAULT_QUEUE_SIZE = 256
+
+# 后台线程每次最多取出的帧数
+WRITE_BATCH_SIZE = 64
+
+# 队列结束标记
+_STOP = object()
+
+def label_filename(frame_index):
+    """标签文件名"""
+    return f"frame_{frame_index:06d}.txt"
+
+def format_labels(detections, bbox_type, frame_shape, save_conf=False):
+    """
+    将一帧的结构化检测数组转换为YOLO格式标签文本（坐标按帧尺寸归一化）：
+    OBB为 class_id x1 y1 ... x4 y4 [confidence]，普通框为 class_id center_x center_y width height [confidence]
+    """
+    height, width = frame_shape[:2]
+    if bbox_type == 'obb':
+        values = detections['bbox'].astype(np.float64) / np.array([width, height] * (BBOX_WIDTH // 2))
+    else:
+        x1, y1, x2, y2 = np.trunc(detections['bbox'][:, :4].astype(np.float64)).T  # 与整数像素坐标的结果一致
+        values = np.stack([(x1 + x2) / 2.0 / width, (y1 + y2) / 2.0 / height,
+                           (x2 - x1) / width, (y2 - y1) / height], axis=1)
+    
+    if save_conf:
+        values = np.column_stack([values, detections['confidence']])
+    
+    template = '%d' + ' %.6f' * values.shape[1]
+    lines = map(template.__mod__, zip(detections['class_id'].tolist(), *values.T.tolist()))
+    return '\n'.join(lines) + '\n'
+
+class TxtLabelSink:
+    """每帧一个txt文件"""
+    
+    def __init__(self, output_dir):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.output_dir
+    
+    def write(self, frame_index, text, count):
+        with open(self.output_dir / label_filename(frame_index), 'w', encoding='utf-8') as f:
+            f.write(text)
+        return len(text)  # 标签只含ASCII字符
+    
+    def close(self):
+        pass
+
+class ArchiveLabelSink:
+    """
+    全部标签写入一个tar/zip归档，另生成 <归档>.index.csv（帧号、成员名、对象数、偏移、大小），
+    tar的偏移为成员数据的位置，zip的偏移为成员本地文件头的位置
+    """
+    
+    def __init__(self, output_dir, layout):
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        self.layout = layout
+        self.path = output_dir / f"{ARCHIVE_NAME}.{layout}"
+        if layout == 'tar':
+            self.archive = tarfile.open(self.path, 'w')
+        else:
+            self.archive = zipfile.ZipFile(self.path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1)
+        self.index_file = open(output_dir / f"{ARCHIVE_NAME}.{layout}.index.csv", 'w', encoding='utf-8', newline='')
+        self.index = csv.writer(self.index_file)
+        self.index.writerow(['frame_id', 'name', 'count', 'offset', 'size'])
+    
+    def write(self, frame_index, text, count):
+        name = label_filename(frame_index)
+        data = text.encode('utf-8')
+        if self.layout == 'tar':
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            self.archive.addfile(info, io.BytesIO(data))
+            # 成员数据在tar文件中的偏移（数据按块对齐写在头部之后），可直接按偏移读取
+            blocks = (len(data) + tarfile.BLOCKSIZE - 1) // tarfile.BLOCKSIZE
+            offset = self.archive.offset - blocks * tarfile.BLOCKSIZE
+        else:
+            self.archive.writestr(name, data)
+            offset = self.archive.getinfo(name).header_offset
+        self.index.writerow([frame_index, name, count, offset, len(data)])
+        return len(data)
+    
+    def close(self):
+        try:
+            self.archive.close()
+        finally:
+            self.index_file.close()
+
+class LabelWriter:
+    """后台标签写出线程"""
+    
+    def __init__(self, output_dir, layout=DEFAULT_LABEL_LAYOUT, save_conf=False, queue_size=DEFAULT_QUEUE_SIZE,
+                 on_error=None):
+        """
+        layout: txt/tar/zip
+        queue_size: 队列中最多等待写出的帧数，队列满时 put 阻塞
+        on_error: 写出失败时的回调 on_error(错误信息)，在后台线程中调用
+        """
+        if layout not in LABEL_LAYOUTS:
+            raise ValueError(f"不支持的标签输出方式: {layout}（可选 {', '.join(LABEL_LAYOUTS)}）")
+        self.layout = layout
+        self.save_conf = save_conf
+        self.on_error = on_error
+        self.sink = TxtLabelSink(output_dir) if layout == 'txt' else ArchiveLabelSink(output_dir, layout)
+        self.queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self.error = None
+        
+        # 统计
+        self.queued_count = 0
+        self.written_count = 0
+        self.written_bytes = 0
+        self.max_backlog = 0
+        self.blocked_time = 0.0  # 推理线程因队列满而等待的总时间
+        
+        self.thread = threading.Thread(target=self.run, name='LabelWriter', daemon=True)
+        self.thread.start()
+    
+    def put(self, frame_index, detection_info, frame_shape):
+        """把一帧的标签放入写出队列（只保存检测数组的引用）"""
+        if self.error is not None:
+            return
+        item = (frame_index, detection_info['detections'], detection_info['bbox_type'], frame_shape)
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            start = time.perf_counter()
+            self.queue.put(item)
+            self.blocked_time += time.perf_counter() - start
+        self.queued_count += 1
+        self.max_backlog = max(self.max_backlog, self.queue.qsize())
+    
+    def run(self):
+        """后台线程：批量取出并写出标签"""
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            for item in batch:
+                if item is _STOP:
+                    return
+                if self.error is not None:
+                    continue  # 出错后丢弃剩余标签，只保证不阻塞推理线程
+                frame_index, detections, bbox_type, frame_shape = item
+                try:
+                    text = format_labels(detections, bbox_type, frame_shape, self.save_conf)
+                    self.written_bytes += self.sink.write(frame_index, text, len(detections))
+                    self.written_count += 1
+                except Exception as e:
+                    self.error = f"保存标签文件失败: {str(e)}"
+                    if self.on_error:
+                        self.on_error(self.error)
+    
+    def backlog(self):
+        """队列中等待写出的帧数"""
+        return self.queue.qsize()
+    
+    def close(self):
+        """写出队列中剩余的标签并关闭文件（可重复调用）"""
+        if self.thread is None:
+            return
+        self.queue.put(_STOP)
+        self.thread.join()
+        self.thread = None
+        self.sink.close()
+    
+    def get_stats(self):
+        """获取写出统计"""
+        return {
+            'layout': self.layout,
+            'path': str(self.sink.path),
+            'queued_count': self.queued_count,
+            'written_count': self.written_count,
+            'written_bytes': self.written_bytes,
+            'backlog': self.backlog(),
+            'max_backlog': self.max_backlog,
+            'queue_size': self.queue.maxsize,
+            'blocked_time': self.blocked_time,
+            'error': self.error
+        }
+
+def format_label_stats(stats):
+    """格式化标签写出统计为显示文本"""
+    text = (f"标签写出({LABEL_LAYOUTS[stats['layout']]}): {stats['written_count']}/{stats['queued_count']}帧, "
+            f"积压{stats['backlog']}帧(最大{stats['max_backlog']}/{stats['queue_size']}), "
+            f"推理线程等待{stats['blocked_time']:.2f}秒")
+    if stats['error']:
+        text += f", 错误: {stats['error']}"
+    return text
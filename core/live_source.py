@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+实时视频源
+摄像头和RTSP/HTTP视频流在独立线程中持续采集，只保留最新的帧（队列满时丢弃最旧的帧），
+无论模型多慢，推理处理的总是最新数据，端到端延迟保持有界
+"""
+
+import time
+import threading
+from collections import deque
+import cv2
+
+# 视为实时视频流的URL协议
+LIVE_SCHEMES = ('rtsp', 'rtsps', 'rtmp', 'http', 'https', 'udp', 'tcp', 'srt')
+
+def is_live_source(source):
+    """判断输入是否为实时视频源（摄像头编号或视频流URL）"""
+    source = str(source).strip()
+    if source.isdigit():
+        return True
+    scheme, separator, _ = source.partition('://')
+    return bool(separator) and scheme.lower() in LIVE_SCHEMES
+
+def open_live_capture(source):
+    """打开实时视频源，摄像头编号按整数打开"""
+    source = str(source).strip()
+    capture = cv2.VideoCapture(int(source)) if source.isdigit() else cv2.VideoCapture(source)
+    # 尽量减小驱动内部的缓冲，避免读到积压的旧帧
+    capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return capture
+
+class LiveFrameGrabber:
+    """后台采集线程 + 丢弃最旧帧的有界队列"""
+    
+    def __init__(self, video_capture, max_queue_size=1, pace_fps=None, should_continue=None):
+        """
+        video_capture: 视频源，由采集线程独占读取并在线程退出时释放
+        max_queue_size: 队列中保留的最新帧数
+        pace_fps: 按该帧率节流读取（把本地文件模拟为实时视频流），None表示尽快读取
+        """
+        self.video_capture = video_capture
+        self.frames = deque(maxlen=max(1, int(max_queue_size)))
+        self.pace_fps = pace_fps
+        self.should_continue = should_continue or (lambda: True)
+        self.condition = threading.Condition()
+        self.thread = None
+        self.stopped = False
+        self.finished = False
+        self.error = None
+        
+        # 统计信息
+        self.captured_count = 0  # 采集的帧数
+        self.dropped_count = 0  # 未被处理就被丢弃的帧数
+        self.consumed_count = 0  # 被取走处理的帧数
+    
+    def start(self):
+        """启动采集线程"""
+        self.thread = threading.Thread(target=self._capture_loop, name='LiveFrameGrabber', daemon=True)
+        self.thread.start()
+    
+    def _capture_loop(self):
+        """采集线程：持续读取帧，队列满时丢弃最旧的帧"""
+        interval = 1.0 / self.pace_fps if self.pace_fps and self.pace_fps > 0 else None
+        next_time = time.time()
+        try:
+            while not self.stopped:
+                ret, frame = self.video_capture.read()
+                capture_time = time.time()
+                if not ret:
+                    break
+                
+                with self.condition:
+                    if len(self.frames) == self.frames.maxlen:
+                        self.dropped_count += 1
+                    # 帧编号按采集顺序递增（包括被丢弃的帧）
+                    self.frames.append((self.captured_count, capture_time, frame))
+                    self.captured_count += 1
+                    self.condition.notify()
+                
+                if interval is not None:
+                    next_time += interval
+                    time.sleep(max(0.0, next_time - time.time()))
+        
+        except Exception as e:
+            self.error = e
+        
+        finally:
+            # 在采集线程中释放，不会与阻塞中的read()并发
+            self.video_capture.release()
+            with self.condition:
+                self.finished = True
+                self.condition.notify_all()
+    
+    def get(self, timeout=0.1):
+        """取出队列中最旧的帧 (帧编号, 采集时间, 帧)，视频源结束时返回None"""
+        with self.condition:
+            while not self.frames:
+                if self.finished:
+                    if self.error is not None:
+                        raise self.error
+                    return None
+                if not self.should_continue():
+                    return None
+                self.condition.wait(timeout)
+            
+            self.consumed_count += 1
+            return self.frames.popleft()
+    
+    def __iter__(self):
+        """按顺序产出 (帧编号, 采集时间, 帧)"""
+        while True:
+            item = self.get()
+            if item is None:
+                return
+            yield item
+    
+    def stop(self):
+        """停止采集线程"""
+        self.stopped = True
+        with self.condition:
+            self.condition.notify_all()
+        if self.thread is not None:
+            # 网络流的read()可能阻塞，不无限等待；超时后采集线程在read()返回时自行释放视频源
+            self.thread.join(timeout=2.0)
+            self.thread = None
+    
+    def get_stats(self):
+        """获取采集统计"""
+        with self.condition:
+            return {
+                'captured_count': self.captured_count,
+                'consumed_count': self.consumed_count,
+                'dropped_count': self.dropped_count,
+                'queue_size': len(self.frames)
+            }
+
+class LatencyTracker:
+    """记录每帧从采集到结果的延迟"""
+    
+    def __init__(self, window_size=100):
+        self.latencies = deque(maxlen=window_size)  # 最近若干帧的延迟（毫秒）
+        self.total_latency = 0.0
+        self.count = 0
+        self.max_latency = 0.0
+    
+    def add(self, latency_ms):
+        """添加一帧的延迟"""
+        self.latencies.append(latency_ms)
+        self.total_latency += latency_ms
+        self.count += 1
+        self.max_latency = max(self.max_latency, latency_ms)
+    
+    def get_stats(self):
+        """获取延迟统计（毫秒）"""
+        recent = sorted(self.latencies)
+        return {
+            'latency_ms': self.latencies[-1] if self.latencies else 0.0,
+            'average_latency_ms': self.total_latency / self.count if self.count else 0.0,
+            'p95_latency_ms': recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0.0,
+            'max_latency_ms': self.max_latency
+        }
+
+def format_live_stats(stats):
+    """格式化实时视频流统计为显示文本"""
+    return (f"实时流: 采集{stats['captured_count']}帧, 处理{stats['consumed_count']}帧, 丢弃{stats['dropped_count']}帧 | "
+            f"延迟 当前{stats['latency_ms']:.0f}ms, 平均{stats['average_latency_ms']:.0f}ms, "
+            f"P95 {stats['p95_latency_ms']:.0f}ms, 最大{stats['max_latency_ms']:.0f}ms")
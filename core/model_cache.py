@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模型缓存
+按 (权重路径, 任务类型, 推理后端) 缓存已加载的模型，在内存预算内按最近最少使用淘汰，
+加载后可用空白帧预热，使第一帧真实推理不承担延迟初始化的开销
+"""
+
+import os
+import gc
+import time
+import threading
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+
+# 默认推理后端
+DEFAULT_BACKEND = 'pytorch'
+
+# 预热使用的空白帧尺寸（也是导出后端的输入尺寸）
+WARMUP_IMGSZ = 640
+
+def infer_task(model_path):
+    """根据权重文件名推断任务类型（obb/detect）"""
+    return 'obb' if 'obb' in Path(model_path).name.lower() else 'detect'
+
+def get_process_memory():
+    """获取当前进程的常驻内存（字节），无法获取时返回0"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0
+
+def get_model_parameter_bytes(model):
+    """统计模型参数和缓冲区占用的字节数，非PyTorch模型返回0"""
+    module = getattr(model, 'model', None)
+    if module is None or not hasattr(module, 'parameters'):
+        return 0
+    
+    total = sum(p.numel() * p.element_size() for p in module.parameters())
+    total += sum(b.numel() * b.element_size() for b in module.buffers())
+    return total
+
+def load_pytorch_model(model_path, task, imgsz):
+    """加载PyTorch权重"""
+    from ultralytics import YOLO
+    return YOLO(model_path, task=task)
+
+def load_exported_model(backend):
+    """创建导出后端（onnx/openvino）的加载函数：首次使用时导出，之后直接加载磁盘缓存"""
+    def loader(model_path, task, imgsz):
+        from ultralytics import YOLO
+        from core.model_export import get_exported_model
+        return YOLO(get_exported_model(model_path, backend, imgsz, task), task=task)
+    return loader
+
+class CachedModel:
+    """缓存中的模型及其加载统计"""
+    
+    def __init__(self, key, model, load_time, warmup_time, memory_bytes, parameter_bytes):
+        self.key = key
+        self.model = model
+        self.load_time = load_time  # 加载耗时（秒）
+        self.warmup_time = warmup_time  # 预热耗时（秒），未预热时为0
+        self.memory_bytes = memory_bytes  # 常驻内存占用（字节），用于内存预算
+        self.parameter_bytes = parameter_bytes  # 模型参数占用（字节）
+        self.hits = 0
+        self.last_used = time.time()
+    
+    def to_dict(self):
+        """获取统计信息"""
+        model_path, task, backend = self.key
+        return {
+            'model_path': model_path,
+            'task': task,
+            'backend': backend,
+            'load_time': self.load_time,
+            'warmup_time': self.warmup_time,
+            'memory_mb': self.memory_bytes / 1024 / 1024,
+            'parameter_mb': self.parameter_bytes / 1024 / 1024,
+            'hits': self.hits
+        }
+
+class ModelCache:
+    """进程内模型缓存（LRU + 内存预算）"""
+    
+    def __init__(self, memory_budget_mb=None, warmup=True, warmup_imgsz=WARMUP_IMGSZ):
+        """
+        memory_budget_mb: 缓存模型的总内存预算（MB），None表示不限制；最近使用的模型总会保留
+        warmup: 加载后是否用空白帧预热
+        """
+        self.memory_budget_mb = memory_budget_mb
+        self.warmup = warmup
+        self.warmup_imgsz = warmup_imgsz
+        # 推理后端 -> 加载函数(权重路径, 任务类型, 输入尺寸)
+        self.loaders = {
+            DEFAULT_BACKEND: load_pytorch_model,
+            'onnx': load_exported_model('onnx'),
+            'openvino': load_exported_model('openvino')
+        }
+        self.entries = OrderedDict()  # 键 -> CachedModel，按最近使用排序
+        self.lock = threading.RLock()
+        self.hit_count = 0
+        self.miss_count = 0
+        self.eviction_count = 0
+    
+    def make_key(self, model_path, task=None, backend=DEFAULT_BACKEND):
+        """生成缓存键"""
+        return (str(Path(model_path).resolve()), task or infer_task(model_path), backend)
+    
+    def get(self, model_path, task=None, backend=DEFAULT_BACKEND):
+        """获取模型，未缓存时加载并预热，返回CachedModel"""
+        key = self.make_key(model_path, task, backend)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                entry.hits += 1
+                self.hit_count += 1
+                entry.last_used = time.time()
+                return entry
+            
+            if backend not in self.loaders:
+                raise ValueError(f"不支持的推理后端: {backend}")
+            
+            self.miss_count += 1
+            memory_before = get_process_memory()
+            
+            start_time = time.time()
+            model = self.loaders[backend](model_path, key[1], self.warmup_imgsz)
+            load_time = time.time() - start_time
+            
+            warmup_time = self.warmup_model(model) if self.warmup else 0.0
+            
+            # 常驻内存取进程内存增量和参数占用中的较大值（进程内存增量在多线程下不准确）
+            parameter_bytes = get_model_parameter_bytes(model)
+            memory_bytes = max(get_process_memory() - memory_before, parameter_bytes)
+            
+            entry = CachedModel(key, model, load_time, warmup_time, memory_bytes, parameter_bytes)
+            self.entries[key] = entry
+            self.evict()
+            return entry
+    
+    def warmup_model(self, model):
+        """用空白帧执行一次推理，返回耗时"""
+        dummy_frame = np.zeros((self.warmup_imgsz, self.warmup_imgsz, 3), dtype=np.uint8)
+        start_time = time.time()
+        model.predict(dummy_frame, imgsz=self.warmup_imgsz, verbose=False)
+        return time.time() - start_time
+    
+    def evict(self):
+        """淘汰最近最少使用的模型，直到满足内存预算（至少保留一个模型）"""
+        if self.memory_budget_mb is None:
+            return
+        
+        budget_bytes = self.memory_budget_mb * 1024 * 1024
+        evicted = False
+        with self.lock:
+            while len(self.entries) > 1 and self.total_memory_bytes() > budget_bytes:
+                self.entries.popitem(last=False)
+                self.eviction_count += 1
+                evicted = True
+        
+        if evicted:
+            gc.collect()
+    
+    def remove(self, model_path, task=None, backend=DEFAULT_BACKEND):
+        """从缓存中移除模型"""
+        with self.lock:
+            return self.entries.pop(self.make_key(model_path, task, backend), None) is not None
+    
+    def clear(self):
+        """清空缓存"""
+        with self.lock:
+            self.entries.clear()
+        gc.collect()
+    
+    def set_memory_budget(self, memory_budget_mb):
+        """设置内存预算（MB），None表示不限制"""
+        self.memory_budget_mb = memory_budget_mb
+        self.evict()
+    
+    def total_memory_bytes(self):
+        """缓存模型的总内存占用"""
+        with self.lock:
+            return sum(entry.memory_bytes for entry in self.entries.values())
+    
+    def get_stats(self):
+        """获取缓存统计（每个模型的加载耗时、预热耗时和内存占用）"""
+        with self.lock:
+            return {
+                'models': [entry.to_dict() for entry in reversed(self.entries.values())],
+                'total_memory_mb': self.total_memory_bytes() / 1024 / 1024,
+                'memory_budget_mb': self.memory_budget_mb,
+                'hit_count': self.hit_count,
+                'miss_count': self.miss_count,
+                'eviction_count': self.eviction_count
+            }
+
+def format_model_cache_stats(stats):
+    """格式化模型缓存统计为显示文本"""
+    budget = stats['memory_budget_mb']
+    budget_text = f"{budget:.0f}MB" if budget is not None else "不限"
+    lines = [f"模型缓存: {len(stats['models'])} 个模型, 内存 {stats['total_memory_mb']:.0f}MB / {budget_text}, "
+             f"命中 {stats['hit_count']} 次, 加载 {stats['miss_count']} 次, 淘汰 {stats['eviction_count']} 次"]
+    for model in stats['models']:
+        lines.append(f"  {Path(model['model_path']).name} [{model['task']}/{model['backend']}] "
+                     f"加载 {model['load_time']:.2f}s, 预热 {model['warmup_time']:.2f}s, "
+                     f"内存 {model['memory_mb']:.0f}MB")
+    return '\n'.join(lines)
+
+# 进程内共享的模型缓存
+default_model_cache = ModelCache()
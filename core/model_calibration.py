@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模型吞吐量校准
+在本机上测量各尺寸模型（n/s/m/l/x）在指定视频分辨率、模型输入尺寸和推理后端下的实际处理帧率并保存，
+处理时可按目标帧率自动选择能达到目标的最大模型
+"""
+
+import json
+import time
+import platform
+from pathlib import Path
+import numpy as np
+
+# 模型尺寸（从小到大）
+MODEL_SIZES = ('n', 's', 'm', 'l', 'x')
+
+# 校准结果文件
+CALIBRATION_FILE = 'weights/calibration.json'
+
+# 每个模型测量的帧数
+CALIBRATION_FRAMES = 20
+
+def model_path_for_size(size, task='obb'):
+    """获取指定尺寸模型的权重路径"""
+    suffix = '-obb' if task == 'obb' else ''
+    return f'weights/yolo11{size}{suffix}.pt'
+
+def measure_throughput(model, frames, imgsz=None):
+    """逐帧推理测量处理帧率（imgsz为None时使用模型默认输入尺寸），返回 (帧率, 平均延迟秒)"""
+    options = {'imgsz': imgsz} if imgsz else {}
+    latencies = []
+    for frame in frames:
+        start = time.perf_counter()
+        model.predict(frame, verbose=False, **options)
+        latencies.append(time.perf_counter() - start)
+    
+    mean_latency = float(np.mean(latencies)) if latencies else 0.0
+    return (1.0 / mean_latency if mean_latency > 0 else 0.0), mean_latency
+
+def make_calibration_frames(frame_shape, frame_count=CALIBRATION_FRAMES):
+    """生成指定分辨率的随机测试帧"""
+    height, width = frame_shape
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(frame_count)]
+
+class ModelCalibration:
+    """模型吞吐量校准结果（按主机、推理后端、视频分辨率和模型输入尺寸保存）"""
+    
+    def __init__(self, path=CALIBRATION_FILE):
+        self.path = Path(path)
+        self.host = platform.node() or 'localhost'
+        self.results = {}  # 主机 -> "后端|宽x高[|输入尺寸]" -> 模型尺寸 -> 测量结果
+        self.load()
+    
+    @staticmethod
+    def make_key(backend, frame_shape, imgsz=None):
+        """生成结果键（模型默认输入尺寸不写入键，与之前保存的结果兼容）"""
+        height, width = frame_shape
+        key = f"{backend}|{width}x{height}"
+        return f"{key}|{imgsz}" if imgsz else key
+    
+    @staticmethod
+    def parse_key(key):
+        """解析结果键，返回 (后端, "宽x高", 输入尺寸或None)"""
+        backend, resolution, *rest = key.split('|')
+        return backend, resolution, int(rest[0]) if rest else None
+    
+    def load(self):
+        """从文件加载校准结果"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                self.results = json.load(file)
+        except (OSError, ValueError):
+            self.results = {}
+    
+    def save(self):
+        """保存校准结果到文件"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as file:
+            json.dump(self.results, file, ensure_ascii=False, indent=2)
+    
+    def record(self, size, backend, frame_shape, fps, latency, imgsz=None):
+        """记录一个模型的测量结果"""
+        host_results = self.results.setdefault(self.host, {})
+        host_results.setdefault(self.make_key(backend, frame_shape, imgsz), {})[size] = {
+            'fps': fps,
+            'latency_ms': latency * 1000,
+            'measured_at': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+    
+    def get_results(self, backend, frame_shape=None, imgsz=None):
+        """
+        获取本机指定后端和模型输入尺寸的测量结果（模型尺寸 -> 结果），
+        没有该分辨率时使用像素数最接近的分辨率
+        """
+        host_results = self.results.get(self.host, {})
+        candidates = {}
+        for key, size_results in host_results.items():
+            key_backend, resolution, key_imgsz = self.parse_key(key)
+            if key_backend == backend and key_imgsz == imgsz:
+                width, height = (int(v) for v in resolution.split('x'))
+                candidates[(height, width)] = size_results
+        
+        if not candidates:
+            return {}
+        if frame_shape is None or tuple(frame_shape) in candidates:
+            return candidates.get(tuple(frame_shape) if frame_shape else max(candidates), {})
+        
+        pixels = frame_shape[0] * frame_shape[1]
+        nearest = min(candidates, key=lambda shape: abs(shape[0] * shape[1] - pixels))
+        return candidates[nearest]
+    
+    def get_all_results(self):
+        """获取本机全部测量结果，返回 [(后端, 分辨率, 输入尺寸, 模型尺寸, 结果)]，输入尺寸None表示模型默认值"""
+        rows = []
+        for key, size_results in sorted(self.results.get(self.host, {}).items()):
+            backend, resolution, imgsz = self.parse_key(key)
+            for size in MODEL_SIZES:
+                if size in size_results:
+                    rows.append((backend, resolution, imgsz, size, size_results[size]))
+        return rows
+    
+    def select_size(self, target_fps, backend, frame_shape=None, imgsz=None):
+        """选择测量帧率不低于目标帧率的最大模型尺寸；都达不到时选择最快的模型，没有测量结果时返回None"""
+        size_results = self.get_results(backend, frame_shape, imgsz)
+        measured = [size for size in MODEL_SIZES if size in size_results]
+        if not measured:
+            return None
+        
+        meeting = [size for size in measured if size_results[size]['fps'] >= target_fps]
+        if meeting:
+            return meeting[-1]
+        return max(measured, key=lambda size: size_results[size]['fps'])
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+导出模型后端
+首次使用时将PyTorch权重导出为ONNX Runtime / OpenVINO格式，并按权重内容哈希、输入尺寸和后端版本缓存到磁盘，
+之后的运行直接加载已导出的模型
+"""
+
+import os
+import shutil
+import hashlib
+import threading
+from pathlib import Path
+
+# 导出模型缓存目录
+EXPORT_CACHE_DIR = 'weights/exports'
+
+# 导出后端配置：ultralytics导出格式、运行时包名、导出产物的后缀
+EXPORT_BACKENDS = {
+    'onnx': {
+        'format': 'onnx',
+        'package': 'onnxruntime',
+        'suffix': '.onnx',
+        'description': 'ONNX Runtime'
+    },
+    'openvino': {
+        'format': 'openvino',
+        'package': 'openvino',
+        'suffix': '_openvino_model',
+        'description': 'OpenVINO'
+    }
+}
+
+# 同一进程内同时导出同一个模型时只导出一次
+_export_lock = threading.Lock()
+
+# 权重哈希缓存：(路径, 修改时间, 大小) -> 哈希
+_hash_cache = {}
+
+def weights_hash(model_path):
+    """计算权重文件内容的SHA-256（按文件修改时间和大小缓存）"""
+    stat = os.stat(model_path)
+    cache_key = (str(Path(model_path).resolve()), stat.st_mtime_ns, stat.st_size)
+    if cache_key in _hash_cache:
+        return _hash_cache[cache_key]
+    
+    digest = hashlib.sha256()
+    with open(model_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    _hash_cache[cache_key] = digest.hexdigest()
+    return _hash_cache[cache_key]
+
+def backend_version(backend):
+    """获取导出后端运行时的版本，未安装时返回None"""
+    from importlib import metadata
+    try:
+        return metadata.version(EXPORT_BACKENDS[backend]['package'])
+    except metadata.PackageNotFoundError:
+        return None
+
+def is_backend_available(backend):
+    """检查导出后端的运行时是否已安装"""
+    return backend in EXPORT_BACKENDS and backend_version(backend) is not None
+
+def export_cache_path(model_path, backend, imgsz, cache_dir=EXPORT_CACHE_DIR):
+    """已导出模型的缓存路径：<权重名>-<内容哈希>-<输入尺寸>-<后端>-<版本><后缀>"""
+    config = EXPORT_BACKENDS[backend]
+    version = backend_version(backend)
+    name = f"{Path(model_path).stem}-{weights_hash(model_path)[:16]}-{imgsz}-{backend}-{version}{config['suffix']}"
+    return Path(cache_dir) / name
+
+def get_exported_model(model_path, backend, imgsz=640, task=None, cache_dir=EXPORT_CACHE_DIR, log=None):
+    """获取已导出模型的路径，缓存中没有时导出"""
+    if backend not in EXPORT_BACKENDS:
+        raise ValueError(f"不支持的推理后端: {backend}")
+    if not is_backend_available(backend):
+        raise RuntimeError(f"推理后端 {EXPORT_BACKENDS[backend]['description']} 未安装，"
+                           f"请先安装 {EXPORT_BACKENDS[backend]['package']}")
+    
+    export_path = export_cache_path(model_path, backend, imgsz, cache_dir)
+    if export_path.exists():
+        return str(export_path)
+    
+    with _export_lock:
+        if export_path.exists():
+            return str(export_path)
+        
+        if log is not None:
+            log(f"首次使用 {EXPORT_BACKENDS[backend]['description']} 后端，正在导出模型: {model_path}")
+        
+        # 在临时目录中导出，避免产物覆盖weights目录中的其他文件，完成后再移动到缓存路径
+        from ultralytics import YOLO
+        work_dir = export_path.parent / f".{export_path.name}.tmp{os.getpid()}"
+        shutil.rmtree(work_dir, ignore_errors=True)
+        work_dir.mkdir(parents=True)
+        try:
+            work_weights = work_dir / Path(model_path).name
+            shutil.copy2(model_path, work_weights)
+            # 动态输入形状：批量推理和不同输入尺寸都可以使用同一个导出模型
+            exported = YOLO(str(work_weights), task=task).export(
+                format=EXPORT_BACKENDS[backend]['format'], imgsz=imgsz, dynamic=True)
+            
+            try:
+                os.replace(exported, export_path)
+            except OSError:
+                # 其他进程已完成导出（目录无法覆盖），直接使用已有的导出
+                if not export_path.exists():
+                    raise
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        
+        if log is not None:
+            log(f"✅ 模型导出完成: {export_path}")
+        return str(export_path)
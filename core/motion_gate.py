@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运动检测门控
+在缩小的灰度图上与上一次推理的帧做差分，画面基本静止时跳过推理、复用上一次的检测结果，
+连续跳过的帧数有上限，保证检测结果定期刷新
+"""
+
+import cv2
+
+# 差分图的宽度（像素）
+GATE_WIDTH = 160
+
+class MotionGate:
+    """帧差分运动门控"""
+    
+    def __init__(self, threshold=0.005, max_skip=10, pixel_threshold=25, gate_width=GATE_WIDTH):
+        """
+        threshold: 变化像素比例不低于该值时视为有运动（越小越灵敏）
+        max_skip: 最多连续跳过的帧数
+        pixel_threshold: 单个像素灰度变化超过该值才计为变化（过滤噪声）
+        """
+        self.threshold = threshold
+        self.max_skip = max(0, int(max_skip))
+        self.pixel_threshold = pixel_threshold
+        self.gate_width = gate_width
+        self.reset()
+    
+    def reset(self):
+        """开始新的处理过程"""
+        self.reference = None  # 上一次推理的帧（缩小的灰度图）
+        self.consecutive_skips = 0
+        self.checked_count = 0
+        self.skipped_count = 0
+        self.last_score = 0.0
+        self.masks = {}  # 差分图尺寸 -> 缩小的区域掩码
+    
+    def prepare(self, frame):
+        """生成缩小并模糊的灰度图"""
+        height, width = frame.shape[:2]
+        gate_height = max(1, round(height * self.gate_width / width))
+        small = cv2.resize(frame, (self.gate_width, gate_height), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+    
+    def get_mask(self, mask, shape):
+        """缩小区域掩码到差分图尺寸，只在有效区域内统计变化"""
+        if mask is None:
+            return None
+        if shape not in self.masks:
+            self.masks[shape] = cv2.resize(mask, (shape[1], shape[0]), interpolation=cv2.INTER_NEAREST) > 0
+        return self.masks[shape]
+    
+    def check(self, frame, mask=None):
+        """判断是否需要对该帧推理，需要时以该帧作为新的参考帧"""
+        self.checked_count += 1
+        gray = self.prepare(frame)
+        
+        run = True
+        if self.reference is not None and self.reference.shape == gray.shape and self.consecutive_skips < self.max_skip:
+            changed = cv2.absdiff(gray, self.reference) > self.pixel_threshold
+            valid = self.get_mask(mask, gray.shape)
+            if valid is not None:
+                total = int(valid.sum())
+                self.last_score = float(changed[valid].sum()) / total if total else 0.0
+            else:
+                self.last_score = float(changed.mean())
+            run = self.last_score >= self.threshold
+        
+        if run:
+            self.reference = gray
+            self.consecutive_skips = 0
+        else:
+            self.consecutive_skips += 1
+            self.skipped_count += 1
+        return run
+    
+    def get_stats(self):
+        """获取跳过统计"""
+        return {
+            'checked_count': self.checked_count,
+            'skipped_count': self.skipped_count,
+            'skip_ratio': self.skipped_count / self.checked_count if self.checked_count else 0.0
+        }
+
+def format_motion_stats(stats):
+    """格式化运动门控统计为显示文本"""
+    return (f"运动门控: 跳过{stats['skipped_count']}/{stats['checked_count']}帧 "
+            f"({stats['skip_ratio'] * 100:.1f}%)")
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自适应采样率控制器
+在处理过程中根据实测推理吞吐量和滞后程度调整采样帧率（可选同时调整推理分辨率），
+使处理速度达到实时倍率目标（视频文件）或延迟目标（实时视频流）
+"""
+
+import time
+
+# 可选的推理分辨率档位（从高到低）
+IMGSZ_LEVELS = (640, 512, 416, 320)
+
+class RateController:
+    """采样率反馈控制器"""
+    
+    def __init__(self, initial_fps, min_fps=1.0, max_fps=None, target_rtf=1.0, target_latency_ms=None,
+                 adaptive_resolution=False, imgsz_levels=IMGSZ_LEVELS, update_interval=10,
+                 gain=0.5, deadband=0.1, catchup_seconds=10.0):
+        """
+        initial_fps: 初始采样帧率
+        min_fps/max_fps: 采样帧率的调整范围
+        target_rtf: 实时倍率目标（处理的视频时长 / 实际耗时），1.0表示与实时同步
+        target_latency_ms: 实时视频流的延迟目标，None表示不限制
+        adaptive_resolution: 采样率降到下限仍跟不上时是否降低推理分辨率
+        update_interval: 每处理多少帧评估一次
+        gain: 每次向期望帧率靠近的比例
+        deadband: 相对变化小于该比例时不调整，避免来回抖动
+        catchup_seconds: 滞后时期望在多少秒内追上
+        """
+        self.min_fps = max(1e-3, float(min_fps))
+        self.max_fps = float(max_fps) if max_fps else float(initial_fps)
+        self.fps = min(max(float(initial_fps), self.min_fps), self.max_fps)
+        self.target_rtf = max(1e-3, float(target_rtf))
+        self.target_latency_ms = target_latency_ms
+        self.adaptive_resolution = adaptive_resolution
+        self.imgsz_levels = tuple(imgsz_levels)
+        self.imgsz_level = 0
+        self.update_interval = max(1, int(update_interval))
+        self.gain = gain
+        self.deadband = deadband
+        self.catchup_seconds = catchup_seconds
+        
+        self.start_time = None
+        self.window_start_time = None
+        self.window_frames = 0
+        self.window_inference_time = 0.0  # 窗口内各帧推理耗时之和（秒）
+        self.adjustments = []  # 全部调整记录
+    
+    @property
+    def imgsz(self):
+        """当前推理分辨率，未启用分辨率调整时返回None（使用模型默认值）"""
+        return self.imgsz_levels[self.imgsz_level] if self.adaptive_resolution else None
+    
+    def start(self):
+        """开始计时"""
+        self.start_time = time.time()
+        self.window_start_time = self.start_time
+        self.window_frames = 0
+        self.window_inference_time = 0.0
+    
+    def update(self, frame_index, video_time=None, latency_ms=None, inference_time=None):
+        """
+        每处理一帧调用一次：video_time为该帧在视频中的时间（秒，从0开始），latency_ms为实时流的帧延迟，
+        inference_time为该帧的推理耗时（秒）。处理按采样率限速时（实时视频流）实测帧率不会超过当前采样率，
+        此时按推理耗时计算处理能力，采样率降低后还能再提高。需要调整时返回调整记录，否则返回None
+        """
+        if self.start_time is None:
+            self.start()
+        
+        self.window_frames += 1
+        if inference_time is not None:
+            self.window_inference_time += inference_time
+        if self.window_frames < self.update_interval:
+            return None
+        
+        now = time.time()
+        # 有推理耗时时为处理能力，否则为实测处理帧率（帧/秒）
+        window_time = self.window_inference_time if self.window_inference_time > 0 else now - self.window_start_time
+        if window_time <= 0:
+            return None
+        throughput = self.window_frames / window_time
+        self.window_start_time = now
+        self.window_frames = 0
+        self.window_inference_time = 0.0
+        
+        # 保持实时倍率需要的采样帧率：采样帧率 × 实时倍率 = 处理帧率
+        desired_fps = throughput / self.target_rtf
+        lag = None
+        if video_time is not None:
+            # 滞后时间为正表示落后于目标进度，按追赶时间进一步降低采样率
+            lag = (now - self.start_time) * self.target_rtf - video_time
+            if lag > 0:
+                desired_fps /= 1.0 + lag / self.catchup_seconds
+        
+        overloaded = desired_fps < self.min_fps
+        if self.target_latency_ms is not None and latency_ms is not None and latency_ms > self.target_latency_ms:
+            overloaded = True
+        
+        # 采样率已到下限仍跟不上时降低分辨率；有充足余量时恢复分辨率
+        reason = None
+        previous_fps, previous_imgsz = self.fps, self.imgsz
+        if self.adaptive_resolution and overloaded and self.imgsz_level < len(self.imgsz_levels) - 1 \
+                and self.fps <= self.min_fps * (1.0 + self.deadband):
+            self.imgsz_level += 1
+            reason = 'resolution_down'
+        elif self.adaptive_resolution and self.imgsz_level > 0 and desired_fps > self.max_fps * 1.5 \
+                and (self.target_latency_ms is None or latency_ms is None or latency_ms < self.target_latency_ms * 0.5):
+            self.imgsz_level -= 1
+            reason = 'resolution_up'
+        else:
+            target = min(max(desired_fps, self.min_fps), self.max_fps)
+            if abs(target - self.fps) > self.fps * self.deadband:
+                self.fps += self.gain * (target - self.fps)
+                reason = 'rate_down' if self.fps < previous_fps else 'rate_up'
+        
+        if reason is None:
+            return None
+        
+        adjustment = {
+            'frame_id': frame_index,
+            'time': now - self.start_time,
+            'reason': reason,
+            'previous_fps': previous_fps,
+            'sample_fps': self.fps,
+            'previous_imgsz': previous_imgsz,
+            'imgsz': self.imgsz,
+            'throughput_fps': throughput,
+            'lag_seconds': lag,
+            'latency_ms': latency_ms
+        }
+        self.adjustments.append(adjustment)
+        return adjustment
+
+def format_rate_adjustment(adjustment):
+    """格式化调整记录为显示文本"""
+    reasons = {
+        'rate_down': '降低采样率',
+        'rate_up': '提高采样率',
+        'resolution_down': '降低推理分辨率',
+        'resolution_up': '提高推理分辨率'
+    }
+    text = (f"自适应调整(帧 {adjustment['frame_id'] + 1}): {reasons[adjustment['reason']]}, "
+            f"采样 {adjustment['previous_fps']:.1f}→{adjustment['sample_fps']:.1f}FPS, "
+            f"处理速度 {adjustment['throughput_fps']:.1f}FPS")
+    if adjustment['imgsz'] != adjustment['previous_imgsz']:
+        text += f", 分辨率 {adjustment['previous_imgsz']}→{adjustment['imgsz']}"
+    if adjustment['lag_seconds'] is not None:
+        text += f", 滞后 {adjustment['lag_seconds']:.1f}s"
+    if adjustment['latency_ms'] is not None:
+        text += f", 延迟 {adjustment['latency_ms']:.0f}ms"
+    return text
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+感兴趣区域(ROI)和排除区域
+固定机位的视频只需处理画面的一部分：推理只在ROI的外接矩形上进行，ROI外和排除区域的像素置零，
+检测框换算回整帧坐标后，中心不在有效区域内的检测被丢弃
+"""
+
+import json
+from pathlib import Path
+import cv2
+import numpy as np
+
+# 视频旁的区域文件后缀，如 video.mp4 -> video.roi.json
+REGION_FILE_SUFFIX = '.roi.json'
+
+# 推理尺寸按模型步长取整
+INFERENCE_STRIDE = 32
+
+def find_region_file(video_path):
+    """查找视频旁的同名区域文件，不存在时返回None"""
+    path = Path(str(video_path))
+    region_path = path.with_name(path.stem + REGION_FILE_SUFFIX)
+    return region_path if region_path.is_file() else None
+
+def offset_boxes(boxes, offset_x, offset_y):
+    """将 (N, 4) 的xyxy或 (N, 4, 2) 的旋转框坐标平移"""
+    points = boxes.reshape(len(boxes), -1, 2) + np.array([offset_x, offset_y], dtype=boxes.dtype)
+    return points.reshape(boxes.shape)
+
+class RegionMask:
+    """
+    ROI和排除区域多边形（原始视频坐标）
+    区域文件格式: {"roi": [[[x, y], ...], ...], "exclude": [[[x, y], ...], ...], "normalized": false}
+    roi为空表示整帧，normalized为true时坐标为0~1的比例
+    """
+    
+    def __init__(self, roi_polygons=None, exclude_polygons=None, normalized=False, path=None):
+        self.roi_polygons = [np.asarray(polygon, dtype=np.float32).reshape(-1, 2) for polygon in roi_polygons or []]
+        self.exclude_polygons = [np.asarray(polygon, dtype=np.float32).reshape(-1, 2) for polygon in exclude_polygons or []]
+        self.normalized = normalized
+        self.path = str(path) if path else None  # 来源文件，用于传给子进程
+        self.layouts = {}  # (帧尺寸, 原始尺寸) -> RegionLayout
+    
+    @classmethod
+    def load(cls, path):
+        """从区域文件加载"""
+        with open(path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        if not data.get('roi') and not data.get('exclude'):
+            raise ValueError(f"区域文件没有定义roi或exclude: {path}")
+        return cls(data.get('roi'), data.get('exclude'), data.get('normalized', False), path)
+    
+    def get_layout(self, frame_shape, source_shape=None):
+        """获取指定帧尺寸下的区域布局（帧按分辨率配置缩放时多边形按比例换算）"""
+        frame_shape = tuple(frame_shape[:2])
+        source_shape = tuple(source_shape[:2]) if source_shape else frame_shape
+        key = (frame_shape, source_shape)
+        if key not in self.layouts:
+            self.layouts[key] = RegionLayout(self.build_mask(frame_shape, source_shape))
+        return self.layouts[key]
+    
+    def build_mask(self, frame_shape, source_shape):
+        """生成有效区域掩码（255为有效）"""
+        height, width = frame_shape
+        if self.normalized:
+            scale = np.array([width, height], dtype=np.float32)
+        else:
+            scale = np.array([width / source_shape[1], height / source_shape[0]], dtype=np.float32)
+        
+        def to_points(polygons):
+            return [np.round(polygon * scale).astype(np.int32) for polygon in polygons]
+        
+        if self.roi_polygons:
+            mask = np.zeros((height, width), dtype=np.uint8)
+            cv2.fillPoly(mask, to_points(self.roi_polygons), 255)
+        else:
+            mask = np.full((height, width), 255, dtype=np.uint8)
+        if self.exclude_polygons:
+            cv2.fillPoly(mask, to_points(self.exclude_polygons), 0)
+        return mask
+
+class RegionLayout:
+    """某一帧尺寸下的有效区域掩码和推理裁剪矩形"""
+    
+    def __init__(self, mask):
+        self.mask = mask
+        self.frame_shape = mask.shape
+        
+        # 有效区域的外接矩形 (x0, y0, x1, y1)，有效区域为空时为None
+        points = cv2.findNonZero(mask)
+        if points is None:
+            self.crop = None
+            self.crop_mask = None
+            self.fully_valid = False
+            self.area_ratio = 0.0
+            return
+        
+        x, y, w, h = cv2.boundingRect(points)
+        self.crop = (x, y, x + w, y + h)
+        self.crop_mask = mask[y:y + h, x:x + w]
+        self.fully_valid = bool(self.crop_mask.min() > 0)  # 裁剪区域内没有需要置零的像素
+        self.area_ratio = (w * h) / float(mask.shape[0] * mask.shape[1])  # 推理像素占整帧的比例
+    
+    def crop_frame(self, frame):
+        """裁剪推理区域，裁剪区域内ROI外和排除区域的像素置零"""
+        x0, y0, x1, y1 = self.crop
+        cropped = frame[y0:y1, x0:x1]
+        if self.fully_valid:
+            return np.ascontiguousarray(cropped)
+        return cv2.bitwise_and(cropped, cropped, mask=self.crop_mask)
+    
+    def inference_size(self, imgsz):
+        """裁剪后的推理尺寸：保持与整帧推理相同的像素密度，推理计算量随裁剪面积下降"""
+        x0, y0, x1, y1 = self.crop
+        scale = imgsz / float(max(self.frame_shape))
+        size = int(np.ceil(max(x1 - x0, y1 - y0) * scale / INFERENCE_STRIDE)) * INFERENCE_STRIDE
+        return min(imgsz, max(INFERENCE_STRIDE, size))
+    
+    def contains(self, boxes):
+        """判断检测框（整帧坐标）中心是否在有效区域内，返回布尔数组"""
+        centers = boxes.reshape(len(boxes), -1, 2).mean(axis=1)
+        x = np.clip(centers[:, 0].astype(int), 0, self.frame_shape[1] - 1)
+        y = np.clip(centers[:, 1].astype(int), 0, self.frame_shape[0] - 1)
+        return self.mask[y, x] > 0
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+检测结果绘制
+按类别一次性绘制全部检测框，标签预先渲染为小图并缓存后直接拷贝到帧上，
+对象数量超过阈值时自动省略标签（细节层次）
+"""
+
+from collections import OrderedDict
+import cv2
+import numpy as np
+from core.detection_store import NO_TRACK_ID, detection_boxes, scale_detections
+
+# 类别颜色表
+CLASS_COLORS = [
+    (255, 0, 0),    # 红色
+    (0, 255, 0),    # 绿色
+    (0, 0, 255),    # 蓝色
+    (255, 255, 0),  # 黄色
+    (255, 0, 255),  # 紫色
+    (0, 255, 255),  # 青色
+    (128, 0, 128),  # 紫色
+    (255, 165, 0),  # 橙色
+    (255, 192, 203), # 粉色
+    (0, 128, 0),    # 深绿色
+]
+
+# 标签字体
+LABEL_FONT = cv2.FONT_HERSHEY_SIMPLEX
+LABEL_FONT_SCALE = 0.5
+LABEL_THICKNESS = 2
+
+# 超过该对象数量时不绘制标签
+DEFAULT_LABEL_LIMIT = 100
+
+def class_color(class_id):
+    """获取类别颜色"""
+    return CLASS_COLORS[int(class_id) % len(CLASS_COLORS)]
+
+def class_name_for(names, class_id):
+    """获取类别名称（names为列表或 类别ID -> 名称 的字典），没有该类别时返回 Class_<ID>"""
+    if isinstance(names, dict):
+        name = names.get(int(class_id))
+    else:
+        name = names[class_id] if names is not None and class_id < len(names) else None
+    return name if name is not None else f"Class_{class_id}"
+
+def label_text(class_name, confidence, track_id=None):
+    """生成标签文本"""
+    label = f"{class_name}: {confidence:.2f}"
+    if track_id is not None:
+        label = f"ID:{track_id} {label}"
+    return label
+
+def box_polygons(boxes):
+    """将 (N, 4) 的xyxy或 (N, 4, 2)/(N, 8) 的旋转框转换为 (N, 4, 2) 的整数角点"""
+    boxes = np.asarray(boxes)
+    if boxes.ndim == 2 and boxes.shape[1] == 4:
+        x1, y1, x2, y2 = boxes.astype(np.int32).T
+        return np.stack([np.stack([x1, y1], 1), np.stack([x2, y1], 1),
+                         np.stack([x2, y2], 1), np.stack([x1, y2], 1)], axis=1)
+    return boxes.reshape(len(boxes), -1, 2).astype(np.int32)
+
+class AnnotationRenderer:
+    """检测框和标签绘制器"""
+    
+    def __init__(self, label_limit=DEFAULT_LABEL_LIMIT, thickness=2, sprite_cache_size=4096):
+        """
+        label_limit: 对象数量超过该值时只绘制检测框，None表示始终绘制标签
+        sprite_cache_size: 缓存的标签小图数量
+        """
+        self.label_limit = label_limit
+        self.thickness = thickness
+        self.sprite_cache_size = sprite_cache_size
+        self.sprites = OrderedDict()  # (文本, 颜色) -> 标签小图，最近使用的在末尾
+    
+    def get_label_sprite(self, text, color):
+        """获取标签小图（背景为类别颜色，白色文字），未缓存时渲染"""
+        key = (text, color)
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.sprites.move_to_end(key)
+            return sprite
+        
+        (text_width, text_height), _ = cv2.getTextSize(text, LABEL_FONT, LABEL_FONT_SCALE, LABEL_THICKNESS)
+        sprite = np.empty((text_height + 10, text_width, 3), dtype=np.uint8)
+        sprite[:] = color
+        cv2.putText(sprite, text, (0, text_height + 5), LABEL_FONT, LABEL_FONT_SCALE, (255, 255, 255), LABEL_THICKNESS)
+        
+        self.sprites[key] = sprite
+        if len(self.sprites) > self.sprite_cache_size:
+            self.sprites.popitem(last=False)
+        return sprite
+    
+    @staticmethod
+    def blit(frame, sprite, x, bottom):
+        """把标签小图拷贝到帧上（左下角在 (x, bottom)），超出画面的部分裁掉"""
+        height, width = sprite.shape[:2]
+        top = bottom - height
+        x0, y0 = max(0, x), max(0, top)
+        x1, y1 = min(frame.shape[1], x + width), min(frame.shape[0], bottom)
+        if x0 < x1 and y0 < y1:
+            frame[y0:y1, x0:x1] = sprite[y0 - top:y1 - top, x0 - x:x1 - x]
+    
+    def render(self, frame, boxes, class_ids, confidences, track_ids=None, names=None):
+        """在帧上原地绘制检测框和标签，boxes为帧坐标"""
+        if boxes is None or len(boxes) == 0:
+            return frame
+        
+        polygons = box_polygons(boxes)
+        class_ids = np.asarray(class_ids).astype(int)
+        
+        # 每个类别一次绘制全部检测框
+        for class_id in np.unique(class_ids):
+            cv2.polylines(frame, list(polygons[class_ids == class_id]), True, class_color(class_id), self.thickness)
+        
+        # 细节层次：对象过多时标签互相遮挡且绘制开销大，只保留检测框
+        if self.label_limit is not None and len(polygons) > self.label_limit:
+            return frame
+        
+        anchors = polygons.min(axis=1)  # 标签位于外接矩形的左上角
+        for i, class_id in enumerate(class_ids):
+            track_id = track_ids[i] if track_ids is not None and i < len(track_ids) else None
+            text = label_text(class_name_for(names, class_id), confidences[i], track_id)
+            self.blit(frame, self.get_label_sprite(text, class_color(class_id)), int(anchors[i, 0]), int(anchors[i, 1]))
+        return frame
+    
+    def render_detections(self, frame, detections, bbox_type, names=None):
+        """按结构化检测数组在帧上原地绘制，检测框为帧坐标"""
+        if len(detections) == 0:
+            return frame
+        track_ids = detections['track_id']
+        if (track_ids == NO_TRACK_ID).all():
+            track_ids = None
+        return self.render(frame, detection_boxes(detections, bbox_type), detections['class_id'],
+                           detections['confidence'], track_ids, names)
+    
+    def render_detection_info(self, frame, detection_info, source_shape=None, names=None):
+        """
+        按检测信息在帧的副本上绘制（显示时按需绘制）。
+        检测信息为原始视频坐标，帧按分辨率配置缩放过时需要提供原始帧尺寸 (高, 宽)；names 为模型的类别名称
+        """
+        annotated = frame.copy()
+        detections = detection_info.get('detections')
+        if detections is None or len(detections) == 0:
+            return annotated
+        
+        bbox_type = detection_info['bbox_type']
+        if source_shape is not None and tuple(source_shape[:2]) != frame.shape[:2]:
+            detections = detections.copy()
+            scale_detections(detections, bbox_type, frame.shape[1] / source_shape[1], frame.shape[0] / source_shape[0])
+        return self.render_detections(annotated, detections, bbox_type, names)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+推理分辨率配置
+每个配置包括模型输入尺寸(imgsz)和可选的解码后缩放（限制长边），
+检测框只在生成检测信息时换算回原始视频坐标一次
+"""
+
+import cv2
+import numpy as np
+
+# 分辨率配置：imgsz为None时使用模型默认输入尺寸，max_side为None时不缩放解码帧
+RESOLUTION_PROFILES = {
+    'native': {
+        'imgsz': None,
+        'max_side': None,
+        'description': '原始（模型默认输入尺寸，不缩放）'
+    },
+    'high': {
+        'imgsz': 1024,
+        'max_side': None,
+        'description': '高精度（输入1024，不缩放）'
+    },
+    'balanced': {
+        'imgsz': 640,
+        'max_side': 1280,
+        'description': '均衡（解码后长边缩放到1280，输入640）'
+    },
+    'fast': {
+        'imgsz': 480,
+        'max_side': 960,
+        'description': '快速（解码后长边缩放到960，输入480）'
+    },
+    'fastest': {
+        'imgsz': 320,
+        'max_side': 640,
+        'description': '极速（解码后长边缩放到640，输入320）'
+    }
+}
+
+DEFAULT_RESOLUTION_PROFILE = 'native'
+
+def downscaled_size(frame_shape, max_side):
+    """计算长边不超过max_side的缩放尺寸 (宽, 高)，不需要缩放时返回None"""
+    height, width = frame_shape[:2]
+    if not max_side or max(height, width) <= max_side:
+        return None
+    
+    scale = max_side / max(height, width)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+def downscale_frame(frame, max_side):
+    """按长边限制缩放帧（区域插值），不需要缩放时原样返回"""
+    size = downscaled_size(frame.shape, max_side)
+    if size is None:
+        return frame
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+def scale_boxes(boxes, scale_x, scale_y):
+    """将 (N, 4) 的xyxy或 (N, 8)/(N, 4, 2) 的旋转框坐标按x/y比例缩放"""
+    boxes = np.asarray(boxes, dtype=np.float32)
+    points = boxes.reshape(len(boxes), -1, 2) * np.array([scale_x, scale_y], dtype=np.float32)
+    return points.reshape(boxes.shape)
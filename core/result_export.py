@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式结果导出
+处理过程中把每帧的检测结果写入固定大小的列缓冲区，写满一块后整块写出（JSON lines / CSV / Parquet），
+每个对象一行，OBB保留全部4个角点，内存占用只取决于块大小，与视频长度无关
+"""
+
+import abc
+import json
+import numpy as np
+from core.detection_store import BBOX_WIDTH, BBOX_OBB, BBOX_TYPES, BBOX_TYPE_NAMES, NO_TRACK_ID, name_mapping
+
+# 支持流式写出的格式
+STREAM_EXPORT_FORMATS = ('jsonl', 'csv', 'parquet')
+
+# 文件扩展名 -> 格式
+FORMAT_SUFFIXES = {'.jsonl': 'jsonl', '.ndjson': 'jsonl', '.csv': 'csv', '.parquet': 'parquet'}
+
+# 每块的行数（对象数）
+DEFAULT_CHUNK_ROWS = 65536
+
+# 输出列：xyxy框只使用前两个角点（左上、右下），其余角点为空
+BBOX_COLUMNS = ['bbox_x1', 'bbox_y1', 'bbox_x2', 'bbox_y2', 'bbox_x3', 'bbox_y3', 'bbox_x4', 'bbox_y4']
+COLUMNS = ['frame_id', 'object_id', 'class_id', 'class_name', 'confidence', 'bbox_type'] + BBOX_COLUMNS
+
+# 检测框类型编码 -> 名称
+BBOX_TYPE_LABELS = np.array([BBOX_TYPE_NAMES[code] for code in sorted(BBOX_TYPE_NAMES)], dtype=object)
+
+# 文本格式每次格式化的行数
+TEXT_BATCH_ROWS = 8192
+
+# 文本格式的数值精度
+COORDINATE_FORMAT = '%.2f'
+CONFIDENCE_FORMAT = '%.4f'
+
+def format_for_path(path):
+    """按扩展名判断导出格式，无法判断时返回None"""
+    suffix = str(path).lower()
+    for extension, format in FORMAT_SUFFIXES.items():
+        if suffix.endswith(extension):
+            return format
+    return None
+
+class TextChunkWriter(abc.ABC):
+    """文本格式写出：每种检测框类型一个行模板，整块格式化后一次写入（子类实现行模板和名称转义）"""
+    
+    encoding = 'utf-8'
+    missing = ''  # 缺失值（没有跟踪ID、xyxy框没有的角点）
+    
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding=self.encoding, newline='')
+        self.templates = {code: self.row_template(BBOX_TYPE_NAMES[code], 8 if code == BBOX_OBB else 4)
+                          for code in BBOX_TYPE_NAMES}
+    
+    @abc.abstractmethod
+    def row_template(self, bbox_type, coordinate_count):
+        """生成一行的格式模板（按 COLUMNS 的顺序）"""
+    
+    @abc.abstractmethod
+    def escape_name(self, name):
+        """类别名称的转义"""
+    
+    def write(self, chunk):
+        names = np.array([self.escape_name(name) for name in chunk['names']], dtype=object)
+        # 分批格式化，限制同时存在的Python字符串数量
+        for start in range(0, len(chunk['track_id']), TEXT_BATCH_ROWS):
+            rows = slice(start, start + TEXT_BATCH_ROWS)
+            self.write_rows({key: value[rows] for key, value in chunk.items() if key != 'names'}, names)
+    
+    def write_rows(self, columns, names):
+        """格式化并写出一批行"""
+        track_ids = columns['track_id']
+        object_ids = np.array([str(v) if v != NO_TRACK_ID else self.missing for v in track_ids.tolist()], dtype=object)
+        class_names = names[columns['class_id']]
+        
+        lines = np.empty(len(track_ids), dtype=object)
+        for code in np.unique(columns['bbox_type']):
+            rows = np.flatnonzero(columns['bbox_type'] == code)
+            coordinate_count = 8 if code == BBOX_OBB else 4
+            values = [columns['frame_id'][rows].tolist(), object_ids[rows].tolist(), columns['class_id'][rows].tolist(),
+                      class_names[rows].tolist(), columns['confidence'][rows].tolist()]
+            values += [columns['bbox'][rows, i].tolist() for i in range(coordinate_count)]
+            lines[rows] = list(map(self.templates[code].__mod__, zip(*values)))
+        self.file.write('\n'.join(lines.tolist()) + '\n')
+    
+    def close(self):
+        self.file.close()
+
+class CsvChunkWriter(TextChunkWriter):
+    """CSV写出，首行为表头（带BOM，Excel可直接打开）"""
+    
+    encoding = 'utf-8-sig'
+    
+    def __init__(self, path):
+        super().__init__(path)
+        self.file.write(','.join(COLUMNS) + '\n')
+    
+    def row_template(self, bbox_type, coordinate_count):
+        coordinates = [COORDINATE_FORMAT] * coordinate_count + [self.missing] * (len(BBOX_COLUMNS) - coordinate_count)
+        return ','.join(['%d', '%s', '%d', '%s', CONFIDENCE_FORMAT, bbox_type] + coordinates)
+    
+    def escape_name(self, name):
+        if any(char in name for char in ',"\r\n'):
+            return '"' + name.replace('"', '""') + '"'
+        return name
+
+class JsonLinesChunkWriter(TextChunkWriter):
+    """JSON lines写出，每个对象一行，缺失值写为null"""
+    
+    missing = 'null'
+    
+    def row_template(self, bbox_type, coordinate_count):
+        fields = ['"frame_id":%d', '"object_id":%s', '"class_id":%d', '"class_name":%s',
+                  f'"confidence":{CONFIDENCE_FORMAT}', f'"bbox_type":"{bbox_type}"']
+        fields += [f'"{name}":{COORDINATE_FORMAT if i < coordinate_count else self.missing}'
+                   for i, name in enumerate(BBOX_COLUMNS)]
+        return '{' + ','.join(fields) + '}'
+    
+    def escape_name(self, name):
+        return json.dumps(name, ensure_ascii=False)
+
+class ParquetChunkWriter:
+    """Parquet写出（pyarrow），每块一个行组"""
+    
+    def __init__(self, path):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise RuntimeError("导出Parquet需要安装pyarrow: pip install pyarrow")
+        self.path = path
+        self.writer = None
+    
+    def schema(self):
+        import pyarrow as pa
+        types = {'frame_id': pa.int64(), 'object_id': pa.int64(), 'class_id': pa.int32(),
+                 'class_name': pa.string(), 'confidence': pa.float32(), 'bbox_type': pa.string()}
+        return pa.schema([(name, types.get(name, pa.float32())) for name in COLUMNS])
+    
+    def write(self, chunk):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        track_ids = chunk['track_id']
+        xyxy = chunk['bbox_type'] != BBOX_OBB
+        arrays = [
+            pa.array(chunk['frame_id']),
+            pa.array(track_ids, mask=track_ids == NO_TRACK_ID),
+            pa.array(chunk['class_id']),
+            pa.array(chunk['names'][chunk['class_id']], type=pa.string()),
+            pa.array(chunk['confidence']),
+            pa.array(BBOX_TYPE_LABELS[chunk['bbox_type']], type=pa.string())
+        ]
+        arrays += [pa.array(np.ascontiguousarray(chunk['bbox'][:, i]), mask=xyxy if i >= 4 else None)
+                   for i in range(len(BBOX_COLUMNS))]
+        table = pa.Table.from_arrays(arrays, schema=self.schema())
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+    
+    def close(self):
+        import pyarrow.parquet as pq
+        if self.writer is None:
+            # 没有任何检测时也生成有效的空文件
+            self.writer = pq.ParquetWriter(self.path, self.schema())
+        self.writer.close()
+
+CHUNK_WRITERS = {
+    'csv': CsvChunkWriter,
+    'jsonl': JsonLinesChunkWriter,
+    'parquet': ParquetChunkWriter
+}
+
+class ResultExporter:
+    """按块写出检测结果的导出器"""
+    
+    def __init__(self, path, format=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+        """format 为 jsonl/csv/parquet，None时按扩展名判断"""
+        format = format or format_for_path(path)
+        if format not in CHUNK_WRITERS:
+            raise ValueError(f"不支持的流式导出格式: {format}（可选 {', '.join(STREAM_EXPORT_FORMATS)}）")
+        self.path = str(path)
+        self.format = format
+        self.chunk_rows = max(1, int(chunk_rows))
+        
+        # 固定大小的列缓冲区
+        self.frame_ids = np.zeros(self.chunk_rows, dtype=np.int64)
+        self.class_ids = np.zeros(self.chunk_rows, dtype=np.int32)
+        self.confidences = np.zeros(self.chunk_rows, dtype=np.float32)
+        self.track_ids = np.zeros(self.chunk_rows, dtype=np.int64)
+        self.bbox_types = np.zeros(self.chunk_rows, dtype=np.uint8)
+        self.bboxes = np.zeros((self.chunk_rows, BBOX_WIDTH), dtype=np.float32)
+        self.row_count = 0
+        
+        # 统计（导出结束后用于检测摘要）
+        self.frame_count = 0
+        self.written_rows = 0
+        self.chunk_count = 0
+        self.class_totals = np.zeros(0, dtype=np.int64)
+        self.class_names = {}
+        self.names_source = None  # 最近合并过的模型类别名称（相同对象不重复合并）
+        self.name_lookup = np.zeros(0, dtype=object)  # 类别ID -> 名称
+        self.names_changed = False
+        
+        self.writer = CHUNK_WRITERS[format](self.path)
+        self.closed = False
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+    
+    def add(self, detection_info, names=None):
+        """追加一帧的检测信息（含结构化数组 detections），names 为模型的类别名称"""
+        detections = detection_info['detections']
+        self.frame_count += 1
+        if len(detections) == 0:
+            return
+        if names is not None and names is not self.names_source:
+            self.names_source = names
+            self.update_class_names(name_mapping(names))
+        frame_ids = np.full(len(detections), detection_info['frame_id'], dtype=np.int64)
+        bbox_types = np.full(len(detections), BBOX_TYPES[detection_info['bbox_type']], dtype=np.uint8)
+        self.add_columns(frame_ids, detections['class_id'], detections['confidence'], detections['track_id'],
+                         bbox_types, detections['bbox'])
+    
+    def add_columns(self, frame_ids, class_ids, confidences, track_ids, bbox_types, bboxes):
+        """追加按对象的列，缓冲区写满时整块写出"""
+        total = len(class_ids)
+        if total:
+            class_totals = np.bincount(class_ids, minlength=len(self.class_totals))
+            class_totals[:len(self.class_totals)] += self.class_totals
+            self.class_totals = class_totals
+        
+        start = 0
+        while start < total:
+            count = min(total - start, self.chunk_rows - self.row_count)
+            rows = slice(self.row_count, self.row_count + count)
+            source = slice(start, start + count)
+            self.frame_ids[rows] = frame_ids[source]
+            self.class_ids[rows] = class_ids[source]
+            self.confidences[rows] = confidences[source]
+            self.track_ids[rows] = track_ids[source]
+            self.bbox_types[rows] = bbox_types[source]
+            self.bboxes[rows] = bboxes[source]
+            self.row_count += count
+            start += count
+            if self.row_count == self.chunk_rows:
+                self.flush()
+    
+    def update_class_names(self, class_names):
+        """合并 类别ID -> 名称 的映射"""
+        self.class_names.update(class_names)
+        self.names_changed = True
+    
+    def name_table(self):
+        """类别ID -> 名称 的查找表（覆盖缓冲区中出现的全部类别ID）"""
+        size = int(self.class_ids[:self.row_count].max()) + 1
+        if self.names_changed or len(self.name_lookup) < size:
+            size = max(size, max(self.class_names, default=-1) + 1)
+            self.name_lookup = np.array([self.class_names.get(i, f"Class_{i}") for i in range(size)], dtype=object)
+            self.names_changed = False
+        return self.name_lookup
+    
+    def chunk_columns(self):
+        """缓冲区中的行（按对象的列）和类别名称查找表"""
+        count = self.row_count
+        return {
+            'frame_id': self.frame_ids[:count],
+            'track_id': self.track_ids[:count],
+            'class_id': self.class_ids[:count],
+            'confidence': self.confidences[:count],
+            'bbox_type': self.bbox_types[:count],
+            'bbox': self.bboxes[:count],
+            'names': self.name_table()
+        }
+    
+    def flush(self):
+        """写出缓冲区中的行"""
+        if self.row_count == 0:
+            return
+        self.writer.write(self.chunk_columns())
+        self.written_rows += self.row_count
+        self.chunk_count += 1
+        self.row_count = 0
+    
+    def close(self):
+        """写出剩余的行并关闭文件（可重复调用）"""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.flush()
+        finally:
+            self.writer.close()
+    
+    def summary(self):
+        """获取检测摘要信息（与 DetectionStore.summary 格式一致）"""
+        if self.frame_count == 0:
+            return {}
+        total_detections = int(self.class_totals.sum())
+        class_counts = {}
+        for class_id in np.flatnonzero(self.class_totals):
+            name = self.class_names.get(int(class_id), f"Class_{class_id}")
+            class_counts[name] = class_counts.get(name, 0) + int(self.class_totals[class_id])
+        return {
+            'total_frames': self.frame_count,
+            'total_detections': total_detections,
+            'average_detections_per_frame': total_detections / self.frame_count,
+            'class_counts': class_counts
+        }
+
+def export_store(store, path, format=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """把 DetectionStore 中的全部结果按块导出，返回导出的行数"""
+    columns = store.columns()
+    with ResultExporter(path, format, chunk_rows) as exporter:
+        exporter.update_class_names(store.class_names)
+        exporter.frame_count = len(store)
+        for start in range(0, store.object_count, chunk_rows):
+            rows = slice(start, start + chunk_rows)
+            exporter.add_columns(columns['frame_id'][rows], columns['class_id'][rows], columns['confidence'][rows],
+                                 columns['track_id'][rows], columns['bbox_type'][rows], columns['bbox'][rows])
+    return exporter.written_rows
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分段并行处理
+将长视频按时间切分为多个片段，每个片段在独立进程中用独立的模型实例处理，
+再按帧顺序合并检测结果，并利用片段间的重叠窗口拼接跟踪ID
+"""
+
+import cv2
+import numpy as np
+from core.detection_store import NO_TRACK_ID, bounding_boxes
+
+# 子进程中的取消事件，由进程池的初始化函数设置
+_cancel_event = None
+
+def init_segment_worker(cancel_event):
+    """子进程初始化：保存主进程的取消事件（事件只能在创建进程时传入，不能随任务传递）"""
+    global _cancel_event
+    _cancel_event = cancel_event
+
+def segment_cancelled():
+    """主进程是否已取消处理"""
+    return _cancel_event is not None and _cancel_event.is_set()
+
+def split_segments(frame_indices, segment_count, overlap_count):
+    """将采样帧列表切分为片段，后续片段向前多处理 overlap_count 帧用于拼接跟踪ID"""
+    frame_total = len(frame_indices)
+    segment_count = max(1, min(int(segment_count), frame_total))
+    bounds = [round(i * frame_total / segment_count) for i in range(segment_count + 1)]
+    
+    segments = []
+    for segment_id in range(segment_count):
+        start, end = bounds[segment_id], bounds[segment_id + 1]
+        context_start = max(0, start - overlap_count) if segment_id > 0 else start
+        segments.append({
+            'segment_id': segment_id,
+            'frame_indices': frame_indices[context_start:end],
+            'overlap_count': start - context_start
+        })
+    return segments
+
+def process_segment(task):
+    """
+    子进程入口：用独立的模型实例处理一个片段，返回 (片段ID, 检测信息列表, 模型类别名称)
+    主进程取消时在下一个采样帧之前停止，返回已处理的部分结果
+    """
+    # 在子进程中导入，避免主进程导入时的循环依赖
+    from core.engine import YOLOEngine
+    from core.video_reader import SparseFrameReader
+    
+    # 限制每个进程的推理线程数，避免多个进程争抢CPU
+    try:
+        import torch
+        torch.set_num_threads(task['torch_threads'])
+    except ImportError:
+        pass
+    
+    engine = YOLOEngine()
+    engine.set_detection_enabled(task['detection_enabled'])
+    engine.set_tracking_enabled(task['tracking_enabled'])
+    engine.tracker_type = task['tracker_type']
+    engine.set_backend(task['backend'])
+    engine.set_resolution_profile(task['resolution_profile'])
+    engine.set_roi_path(task['roi_path'])
+    engine.load_region_mask(task['video_path'])
+    if task['motion_gate']:
+        engine.set_motion_gate(True, **task['motion_gate'])
+    if task['tiled']:
+        engine.set_tiled_inference(True, **task['tiled'])
+    engine.create_motion_gate()
+    engine.create_tiler()
+    engine.verbose = False
+    engine.set_render_annotations(False)  # 子进程只返回检测信息
+    if segment_cancelled():
+        return task['segment_id'], [], None
+    if not engine.load_model(task['model_path']):
+        raise RuntimeError(f"片段 {task['segment_id']} 模型加载失败: {task['model_path']}")
+    
+    capture = cv2.VideoCapture(task['video_path'])
+    if not capture.isOpened():
+        raise RuntimeError(f"片段 {task['segment_id']} 无法打开视频文件")
+    
+    try:
+        results = []
+        reader = SparseFrameReader(capture, task['frame_indices'], task['video_index'], mode=task['decode_mode'],
+                                   should_continue=lambda: not segment_cancelled())
+        for frame_index, frame in reader:
+            _, detection_info = engine.process_frame(engine.downscale_frame(frame), frame_index)
+            results.append(detection_info)
+        return task['segment_id'], results, engine.class_names()
+    finally:
+        capture.release()
+
+def box_iou(boxes_a, boxes_b):
+    """计算两组xyxy边界框的IoU矩阵"""
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+    area_a = (boxes_a[:, 2:] - boxes_a[:, :2]).prod(axis=1)
+    area_b = (boxes_b[:, 2:] - boxes_b[:, :2]).prod(axis=1)
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1e-9), 0.0)
+
+class TrackStitcher:
+    """按片段顺序合并检测结果，并在重叠窗口中匹配跟踪ID"""
+    
+    def __init__(self, iou_threshold=0.5, min_votes=2):
+        self.iou_threshold = iou_threshold
+        self.min_votes = min_votes  # 重叠窗口中至少匹配的帧数
+        self.next_track_id = 1
+        self.merged_results = []
+        self.frame_lookup = {}  # 帧索引 -> 已合并的检测信息
+    
+    def add_segment(self, segment_results, overlap_count):
+        """合并下一个片段的结果，重叠帧只用于匹配跟踪ID"""
+        overlap_results = segment_results[:overlap_count]
+        owned_results = segment_results[overlap_count:]
+        
+        id_map = self.match_tracks(overlap_results)
+        for detection_info in owned_results:
+            track_ids = detection_info['detections']['track_id']
+            tracked = track_ids != NO_TRACK_ID
+            if tracked.any():
+                segment_ids = track_ids[tracked].tolist()
+                for track_id in dict.fromkeys(segment_ids):  # 按首次出现的顺序分配新的全局ID
+                    if track_id not in id_map:
+                        id_map[track_id] = self.next_track_id
+                        self.next_track_id += 1
+                track_ids[tracked] = [id_map[track_id] for track_id in segment_ids]
+            
+            self.merged_results.append(detection_info)
+            self.frame_lookup[detection_info['frame_id']] = detection_info
+    
+    def match_tracks(self, overlap_results):
+        """在重叠帧中按IoU和类别投票，返回 片段内跟踪ID -> 全局跟踪ID 的映射"""
+        votes = {}
+        for detection_info in overlap_results:
+            previous_info = self.frame_lookup.get(detection_info['frame_id'])
+            if previous_info is None:
+                continue
+            
+            new_detections = detection_info['detections']
+            old_detections = previous_info['detections']
+            new_detections = new_detections[new_detections['track_id'] != NO_TRACK_ID]
+            old_detections = old_detections[old_detections['track_id'] != NO_TRACK_ID]
+            if len(new_detections) == 0 or len(old_detections) == 0:
+                continue
+            
+            iou = box_iou(bounding_boxes(new_detections, detection_info['bbox_type']),
+                          bounding_boxes(old_detections, previous_info['bbox_type']))
+            same_class = np.equal.outer(new_detections['class_id'], old_detections['class_id'])
+            iou[~same_class] = 0.0
+            
+            best = iou.argmax(axis=1)
+            for i, j in enumerate(best):
+                if iou[i, j] >= self.iou_threshold:
+                    key = (int(new_detections['track_id'][i]), int(old_detections['track_id'][j]))
+                    votes[key] = votes.get(key, 0) + 1
+        
+        # 按票数从高到低一对一分配
+        id_map = {}
+        used_ids = set()
+        for (new_id, old_id), count in sorted(votes.items(), key=lambda item: -item[1]):
+            if count < self.min_votes or new_id in id_map or old_id in used_ids:
+                continue
+            id_map[new_id] = old_id
+            used_ids.add(old_id)
+        return id_map
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分块推理
+超大画面（航拍图像等）切成相互重叠的小块推理：只有与上一次推理相比发生变化的块（或关键帧的全部块）
+组成一批送入模型，静止的块复用缓存的检测结果，各块的旋转框经旋转NMS在接缝处合并
+"""
+
+import cv2
+import numpy as np
+
+def make_tiles(frame_shape, tile_size, overlap):
+    """将画面切成相互重叠的块，返回 [(x0, y0, x1, y1)]，最后一行/列与画面边缘对齐"""
+    height, width = frame_shape[:2]
+    step = max(1, int(tile_size * (1.0 - overlap)))
+    
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        positions = list(range(0, length - tile_size, step))
+        return positions + [length - tile_size]
+    
+    return [(x, y, min(x + tile_size, width), min(y + tile_size, height))
+            for y in starts(height) for x in starts(width)]
+
+def xyxy_to_xywhr(boxes):
+    """将 (N, 4) 的xyxy框转换为角度为0的 (N, 5) xywhr框"""
+    xywhr = np.zeros((len(boxes), 5), dtype=np.float32)
+    xywhr[:, :2] = (boxes[:, :2] + boxes[:, 2:]) / 2
+    xywhr[:, 2:4] = boxes[:, 2:] - boxes[:, :2]
+    return xywhr
+
+def covariance_matrix(xywhr):
+    """旋转框对应二维高斯分布的协方差矩阵元素 (a, b, c)"""
+    a = xywhr[:, 2] ** 2 / 12
+    b = xywhr[:, 3] ** 2 / 12
+    cos, sin = np.cos(xywhr[:, 4]), np.sin(xywhr[:, 4])
+    return a * cos ** 2 + b * sin ** 2, a * sin ** 2 + b * cos ** 2, (a - b) * cos * sin
+
+def batch_probiou(boxes_a, boxes_b, eps=1e-7):
+    """计算两组xywhr旋转框的ProbIoU矩阵（按高斯分布的Bhattacharyya距离近似旋转IoU）"""
+    x1, y1 = boxes_a[:, 0:1], boxes_a[:, 1:2]
+    x2, y2 = boxes_b[None, :, 0], boxes_b[None, :, 1]
+    a1, b1, c1 = (value[:, None] for value in covariance_matrix(boxes_a))
+    a2, b2, c2 = (value[None, :] for value in covariance_matrix(boxes_b))
+    
+    denominator = (a1 + a2) * (b1 + b2) - (c1 + c2) ** 2
+    t1 = ((a1 + a2) * (y1 - y2) ** 2 + (b1 + b2) * (x1 - x2) ** 2) / (denominator + eps) * 0.25
+    t2 = ((c1 + c2) * (x2 - x1) * (y1 - y2)) / (denominator + eps) * 0.5
+    t3 = np.log(denominator / (4 * np.sqrt(np.clip(a1 * b1 - c1 ** 2, 0, None) *
+                                           np.clip(a2 * b2 - c2 ** 2, 0, None)) + eps) + eps) * 0.5
+    distance = np.clip(t1 + t2 + t3, eps, 100.0)
+    return 1.0 - np.sqrt(1.0 - np.exp(-distance) + eps)
+
+def rotated_nms(xywhr, scores, class_ids, iou_threshold):
+    """按类别的向量化旋转NMS（与所有更高置信度的框比较），返回保留的索引（按置信度从高到低）"""
+    if len(xywhr) == 0:
+        return np.zeros(0, dtype=int)
+    
+    order = np.argsort(-scores)
+    boxes = xywhr[order].copy()
+    # 不同类别的框平移到互不重叠的位置，一次计算完成按类别的NMS
+    span = boxes[:, :2].max() + boxes[:, 2:4].max() * 2 + 1.0
+    boxes[:, :2] += class_ids[order, None] * span
+    ious = np.triu(batch_probiou(boxes, boxes), k=1)
+    return order[ious.max(axis=0) < iou_threshold]
+
+class TiledResult:
+    """合并后的分块检测结果（整帧坐标）"""
+    
+    def __init__(self, boxes, confidences, class_ids, tiles_inferred, tile_count):
+        self.boxes = boxes  # OBB为 (N, 4, 2) 的角点，普通模型为 (N, 4) 的xyxy
+        self.confidences = confidences
+        self.class_ids = class_ids
+        self.tiles_inferred = tiles_inferred  # 本帧实际推理的块数
+        self.tile_count = tile_count
+
+class TiledInference:
+    """按块缓存检测结果的分块推理"""
+    
+    def __init__(self, tile_size=640, overlap=0.2, keyframe_interval=30, change_threshold=0.01,
+                 pixel_threshold=25, iou_threshold=0.5, gate_scale=0.25):
+        """
+        tile_size: 块边长（像素），也作为每块的推理尺寸
+        overlap: 相邻块的重叠比例，跨接缝的目标至少完整出现在一个块中
+        keyframe_interval: 每隔多少帧推理全部块
+        change_threshold: 块内变化像素比例不低于该值时重新推理该块
+        iou_threshold: 合并接缝处重复检测的旋转NMS阈值
+        gate_scale: 变化检测使用的灰度图缩放比例
+        """
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.keyframe_interval = max(1, int(keyframe_interval))
+        self.change_threshold = change_threshold
+        self.pixel_threshold = pixel_threshold
+        self.iou_threshold = iou_threshold
+        self.gate_scale = gate_scale
+        self.reset()
+    
+    def reset(self):
+        """开始新的处理过程"""
+        self.frame_shape = None
+        self.tiles = []
+        self.reference = None  # 每块最近一次推理时的灰度图（按块更新）
+        self.cache = {}  # 块索引 -> (框, xywhr, 置信度, 类别)，整帧坐标
+        self.frames_since_keyframe = 0
+        self.frame_count = 0
+        self.inferred_tile_count = 0
+    
+    def prepare(self, frame):
+        """生成缩小的灰度图用于变化检测"""
+        small = cv2.resize(frame, None, fx=self.gate_scale, fy=self.gate_scale, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+    
+    def select_tiles(self, frame, gray):
+        """选择需要推理的块：关键帧或尺寸变化时选择全部块，否则选择发生变化的块"""
+        if frame.shape[:2] != self.frame_shape:
+            self.frame_shape = frame.shape[:2]
+            self.tiles = make_tiles(self.frame_shape, self.tile_size, self.overlap)
+            self.reference = None
+            self.cache = {}
+        
+        if self.reference is None or self.frames_since_keyframe >= self.keyframe_interval:
+            self.frames_since_keyframe = 0
+            return list(range(len(self.tiles)))
+        
+        changed = cv2.absdiff(gray, self.reference) > self.pixel_threshold
+        return [index for index in range(len(self.tiles))
+                if changed[self.gate_region(index)].mean() >= self.change_threshold]
+    
+    def gate_region(self, index):
+        """块在变化检测灰度图中的切片（至少1个像素）"""
+        x0, y0, x1, y1 = (int(v * self.gate_scale) for v in self.tiles[index])
+        return slice(y0, max(y0 + 1, y1)), slice(x0, max(x0 + 1, x1))
+    
+    def update_reference(self, gray, tile_indices):
+        """将推理过的块写入参考灰度图"""
+        if self.reference is None or self.reference.shape != gray.shape:
+            self.reference = gray.copy()
+            return
+        for index in tile_indices:
+            region = self.gate_region(index)
+            self.reference[region] = gray[region]
+    
+    def infer(self, frame, predict, is_obb):
+        """
+        对一帧分块推理，predict(块图像列表) 返回与块一一对应的ultralytics结果。
+        返回合并后的TiledResult
+        """
+        gray = self.prepare(frame)
+        tile_indices = self.select_tiles(frame, gray)
+        self.frames_since_keyframe += 1
+        self.frame_count += 1
+        self.inferred_tile_count += len(tile_indices)
+        
+        if tile_indices:
+            crops = [frame[y0:y1, x0:x1] for x0, y0, x1, y1 in (self.tiles[index] for index in tile_indices)]
+            for index, result in zip(tile_indices, predict(crops)):
+                self.cache[index] = self.extract_tile(result, self.tiles[index], is_obb)
+            self.update_reference(gray, tile_indices)
+        
+        return self.merge(is_obb, len(tile_indices))
+    
+    def extract_tile(self, result, tile, is_obb):
+        """提取一块的检测结果并平移到整帧坐标"""
+        offset = np.array(tile[:2], dtype=np.float32)
+        if result is None:
+            return None
+        if is_obb and getattr(result, 'obb', None) is not None:
+            detections = result.obb
+            boxes = detections.xyxyxyxy.cpu().numpy().reshape(-1, 4, 2) + offset
+            xywhr = detections.xywhr.cpu().numpy().copy()
+            xywhr[:, :2] += offset
+        elif getattr(result, 'boxes', None) is not None:
+            detections = result.boxes
+            boxes = detections.xyxy.cpu().numpy() + np.tile(offset, 2)
+            xywhr = xyxy_to_xywhr(boxes)
+        else:
+            return None
+        if len(boxes) == 0:
+            return None
+        return boxes, xywhr, detections.conf.cpu().numpy(), detections.cls.cpu().numpy().astype(int)
+    
+    def merge(self, is_obb, tiles_inferred):
+        """合并全部块的缓存检测结果，旋转NMS去除接缝处的重复检测"""
+        entries = [entry for entry in self.cache.values() if entry is not None]
+        if not entries:
+            empty_boxes = np.zeros((0, 4, 2) if is_obb else (0, 4), dtype=np.float32)
+            return TiledResult(empty_boxes, np.zeros(0, dtype=np.float32), np.zeros(0, dtype=int),
+                               tiles_inferred, len(self.tiles))
+        
+        boxes = np.concatenate([entry[0] for entry in entries])
+        xywhr = np.concatenate([entry[1] for entry in entries])
+        confidences = np.concatenate([entry[2] for entry in entries])
+        class_ids = np.concatenate([entry[3] for entry in entries])
+        keep = rotated_nms(xywhr, confidences, class_ids, self.iou_threshold)
+        return TiledResult(boxes[keep], confidences[keep], class_ids[keep], tiles_inferred, len(self.tiles))
+    
+    def get_stats(self):
+        """获取分块推理统计"""
+        tile_count = len(self.tiles)
+        average = self.inferred_tile_count / self.frame_count if self.frame_count else 0.0
+        return {
+            'tile_count': tile_count,
+            'frame_count': self.frame_count,
+            'inferred_tile_count': self.inferred_tile_count,
+            'average_tiles_per_frame': average,
+            'tile_ratio': average / tile_count if tile_count else 0.0
+        }
+
+def format_tile_stats(stats):
+    """格式化分块推理统计为显示文本"""
+    return (f"分块推理: 每帧{stats['tile_count']}块, 平均推理{stats['average_tiles_per_frame']:.1f}块 "
+            f"({stats['tile_ratio'] * 100:.1f}%)")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+视频索引
+扫描视频数据包，记录每帧显示时间戳和关键帧位置（GOP结构）
+"""
+
+import bisect
+import cv2
+
+class VideoIndex:
+    """视频索引：每帧显示时间戳和关键帧位置"""
+    
+    def __init__(self, frame_count, timestamps=None, keyframes=None):
+        self.frame_count = frame_count
+        self.timestamps = timestamps  # 每帧显示时间戳（秒，按显示顺序），未知时为None
+        self.keyframes = sorted(keyframes) if keyframes else []  # 关键帧索引（按显示顺序）
+    
+    @property
+    def has_keyframes(self):
+        """是否包含关键帧信息"""
+        return len(self.keyframes) > 0
+    
+    def gop_size(self):
+        """关键帧间隔（中位数），未知时返回None"""
+        if len(self.keyframes) < 2:
+            return None
+        
+        intervals = sorted(b - a for a, b in zip(self.keyframes, self.keyframes[1:]))
+        return intervals[len(intervals) // 2]
+    
+    def keyframe_before(self, frame_index):
+        """获取不晚于指定帧的最近关键帧索引，未知时返回None"""
+        position = bisect.bisect_right(self.keyframes, frame_index)
+        if position == 0:
+            return None
+        return self.keyframes[position - 1]
+
+def build_video_index(video_path, decode_fallback=False):
+    """
+    扫描视频建立索引，无法打开时返回None
+    decode_fallback: 后端不支持原始数据模式时是否解码全部帧读取时间戳（没有关键帧信息），
+    False时直接返回None
+    """
+    capture = cv2.VideoCapture(video_path)
+    if not capture.isOpened():
+        return None
+    
+    try:
+        # 原始数据模式只解复用不解码，扫描速度快；数据包按解码顺序返回，需要按时间戳排序
+        raw_mode = capture.set(cv2.CAP_PROP_FORMAT, -1)
+        if not raw_mode and not decode_fallback:
+            return None
+        key_frame_prop = getattr(cv2, 'CAP_PROP_LRF_HAS_KEY_FRAME', None)
+        read_key_frames = raw_mode and key_frame_prop is not None
+        
+        packets = []
+        while capture.grab():
+            timestamp = capture.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            is_key_frame = bool(capture.get(key_frame_prop)) if read_key_frames else False
+            packets.append((timestamp, is_key_frame))
+        
+        # 时间戳缺失（大量重复）时无法使用，保持解码顺序
+        timestamps_valid = len(packets) >= 2 and len(set(p[0] for p in packets)) >= len(packets) * 0.9
+        if timestamps_valid and raw_mode:
+            packets.sort(key=lambda p: p[0])
+        
+        timestamps = [p[0] for p in packets] if timestamps_valid else None
+        keyframes = [index for index, p in enumerate(packets) if p[1]]
+        return VideoIndex(len(packets), timestamps, keyframes)
+    
+    except Exception as e:
+        print(f"建立视频索引失败: {e}")
+        return None
+    
+    finally:
+        capture.release()
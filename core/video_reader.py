@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+稀疏解码读取器
+只完整解码采样帧：未采样帧仅grab()跳过，采样间隔较大时直接跳转到目标帧
+"""
+
+import cv2
+
+# 一次跳转的额外开销（折算为顺序grab的帧数），由 benchmarks/bench_sparse_decode.py 测得
+SEEK_COST_FRAMES = 4
+
+# 没有关键帧信息时，采样间隔超过该帧数才跳转
+SEEK_GAP_WITHOUT_INDEX = 300
+
+class SparseFrameReader:
+    """按采样帧列表读取视频帧"""
+    
+    def __init__(self, video_capture, sampled_indices, video_index=None, mode='auto',
+                 seek_cost_frames=SEEK_COST_FRAMES, should_continue=None):
+        """
+        mode: 'auto' 根据GOP结构选择顺序跳过或跳转, 'grab' 只顺序跳过, 'seek' 间隔大于1时总是跳转,
+              'read' 逐帧完整解码（原始行为，用于对比）
+        """
+        self.video_capture = video_capture
+        self.sampled_indices = sampled_indices
+        self.video_index = video_index
+        self.mode = mode
+        self.seek_cost_frames = seek_cost_frames
+        self.should_continue = should_continue or (lambda: True)
+        
+        # 统计信息
+        self.position = 0  # 解码器下一次返回的帧索引
+        self.grabbed_count = 0  # 只grab未转换的帧数
+        self.decoded_count = 0  # 完整解码并转换的帧数
+        self.seek_count = 0  # 跳转次数
+    
+    def should_seek(self, target):
+        """判断从当前位置到目标帧是跳转更快还是顺序跳过更快"""
+        gap = target - self.position
+        if gap <= 1 or self.mode in ('grab', 'read'):
+            return False
+        if self.mode == 'seek':
+            return True
+        
+        # 没有关键帧信息时只在间隔很大时跳转
+        if self.video_index is None or not self.video_index.has_keyframes:
+            return gap > SEEK_GAP_WITHOUT_INDEX
+        
+        # 跳转后需要从目标帧之前的关键帧解码到目标帧；关键帧不在当前位置之后时跳转没有收益
+        keyframe = self.video_index.keyframe_before(target)
+        if keyframe is None or keyframe <= self.position:
+            return False
+        return (target - keyframe) + self.seek_cost_frames < gap
+    
+    def seek(self, target):
+        """跳转到目标帧，返回是否精确到达"""
+        self.video_capture.set(cv2.CAP_PROP_POS_FRAMES, target)
+        self.seek_count += 1
+        actual = int(self.video_capture.get(cv2.CAP_PROP_POS_FRAMES))
+        if actual != target:
+            # 容器不支持精确跳转，之后只顺序跳过
+            self.mode = 'grab'
+            self.position = actual
+            return False
+        self.position = target
+        return True
+    
+    def __iter__(self):
+        """按顺序产出 (帧索引, 帧)"""
+        for target in self.sampled_indices:
+            if not self.should_continue():
+                return
+            
+            if target < self.position:
+                continue
+            
+            # 不精确的跳转可能落在目标帧之后，此时跳过目标帧，产出的帧索引总是解码器的实际位置
+            if self.should_seek(target) and not self.seek(target) and target < self.position:
+                continue
+            
+            # 顺序跳过未采样的帧
+            while self.position < target:
+                if self.mode == 'read':
+                    ret, _ = self.video_capture.read()
+                    self.decoded_count += 1
+                else:
+                    ret = self.video_capture.grab()
+                    self.grabbed_count += 1
+                if not ret:
+                    return
+                self.position += 1
+            
+            ret, frame = self.video_capture.read()
+            if not ret:
+                return
+            self.decoded_count += 1
+            self.position += 1
+            yield target, frame
+    
+    def read_at(self, target):
+        """
+        读取指定帧（随机访问）：下一帧直接顺序读取，向前的帧按GOP结构选择顺序跳过或跳转，向后的帧跳转
+        （解码器从目标帧之前的关键帧解码到目标帧），无法读取时返回None
+        """
+        if target < self.position or self.should_seek(target):
+            self.seek(target)
+        
+        while self.position < target:
+            if not self.video_capture.grab():
+                return None
+            self.grabbed_count += 1
+            self.position += 1
+        
+        # 不支持精确跳转时可能已越过目标帧
+        if self.position != target:
+            return None
+        
+        ret, frame = self.video_capture.read()
+        if not ret:
+            return None
+        self.decoded_count += 1
+        self.position += 1
+        return frame
+    
+    def get_stats(self):
+        """获取解码统计"""
+        return {
+            'mode': self.mode,
+            'decoded_count': self.decoded_count,
+            'grabbed_count': self.grabbed_count,
+            'seek_count': self.seek_count
+        }
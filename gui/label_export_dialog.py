@@ -6,9 +6,10 @@
 """
 
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QCheckBox, 
-                            QPushButton, QLabel, QGroupBox, QLineEdit, QFileDialog)
+                            QPushButton, QLabel, QGroupBox, QLineEdit, QFileDialog, QComboBox)
 from PyQt6.QtCore import Qt
 import os
+from core.label_writer import LABEL_LAYOUTS, DEFAULT_LABEL_LAYOUT
 
 class LabelExportDialog(QDialog):
     """标签导出选项对话框"""
@@ -25,7 +26,7 @@ class LabelExportDialog(QDialog):
         """初始化用户界面"""
         self.setWindowTitle("标签导出选项")
         self.setModal(True)
-        self.setFixedSize(450, 280)
+        self.setFixedSize(450, 310)
         
         # 主布局
         main_layout = QVBoxLayout(self)
@@ -72,6 +73,18 @@ class LabelExportDialog(QDialog):
         
         dir_layout.addLayout(dir_select_layout)
         
+        # 标签输出方式：每帧一个txt文件，或写入单个tar/zip归档（附索引）
+        layout_select_layout = QHBoxLayout()
+        layout_select_layout.addWidget(QLabel("输出方式:"))
+        self.label_layout_combo = QComboBox()
+        for layout, description in LABEL_LAYOUTS.items():
+            self.label_layout_combo.addItem(description, layout)
+        self.label_layout_combo.setCurrentIndex(list(LABEL_LAYOUTS).index(DEFAULT_LABEL_LAYOUT))
+        self.label_layout_combo.setToolTip("大量帧时使用归档可避免生成大量小文件")
+        self.label_layout_combo.setEnabled(False)  # 初始状态禁用
+        layout_select_layout.addWidget(self.label_layout_combo)
+        dir_layout.addLayout(layout_select_layout)
+        
         main_layout.addWidget(dir_group)
         
         # 添加弹性空间
@@ -110,6 +123,7 @@ class LabelExportDialog(QDialog):
         self.save_conf_check.setEnabled(is_checked)
         self.output_dir_edit.setEnabled(is_checked)
         self.browse_btn.setEnabled(is_checked)
+        self.label_layout_combo.setEnabled(is_checked)
         
         # 如果取消勾选保存txt选项，同时取消勾选置信度选项，并清空输出目录
         if not is_checked:
@@ -135,7 +149,8 @@ class LabelExportDialog(QDialog):
         return {
             'save_txt': self.save_txt_check.isChecked(),
             'save_conf': self.save_conf_check.isChecked(),
-            'output_dir': self.output_dir if self.save_txt_check.isChecked() else None
+            'output_dir': self.output_dir if self.save_txt_check.isChecked() else None,
+            'label_layout': self.label_layout_combo.currentData()
         }
     
     def accept(self):
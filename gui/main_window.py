@@ -6,16 +6,40 @@
 """
 
 import os
+import time
+from collections import OrderedDict
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                             QMenuBar, QToolBar, QStatusBar, QLabel, QPushButton,
                             QComboBox, QCheckBox, QSlider, QTextEdit, QGroupBox,
-                            QFileDialog, QMessageBox, QProgressBar, QSplitter, QDialog)
+                            QFileDialog, QMessageBox, QProgressBar, QSplitter, QDialog,
+                            QInputDialog)
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QAction, QPixmap, QFont
 from gui.video_widget import VideoWidget
 from gui.progress_dialog import ProgressDialog
 from gui.label_export_dialog import LabelExportDialog
+from gui.model_settings_dialog import ModelSettingsDialog
 from core.yolo_processor import YOLOProcessor
+from core.frame_prefetcher import format_prefetch_stats
+from core.live_source import is_live_source, format_live_stats
+from core.rate_controller import format_rate_adjustment
+from core.resolution_profiles import RESOLUTION_PROFILES
+from core.motion_gate import format_motion_stats
+from core.label_writer import format_label_stats
+from core.renderer import AnnotationRenderer
+from core.frame_provider import FrameProvider, format_provider_stats
+from core.frame_store import FrameStore, format_frame_store_stats
+from core.model_cache import format_model_cache_stats
+
+# 缓存的已绘制帧数量（播放和拖动时复用）
+RENDER_CACHE_SIZE = 32
+
+# 原始帧缓存的内存上限（MB），原始帧按需从视频文件读取
+ORIGINAL_FRAME_CACHE_MB = 512
+
+# 处理帧的压缩方式（jpeg/png/lz4）和内存中压缩数据的预算（MB），超过预算的帧写入临时文件
+PROCESSED_FRAME_CODEC = 'jpeg'
+PROCESSED_FRAME_MEMORY_MB = 1024
 
 class MainWindow(QMainWindow):
     """主窗口类"""
@@ -24,16 +48,23 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.video_processor = None
         self.current_video_path = None
+        self.is_live_source = False  # 当前输入是否为摄像头/视频流
         self.progress_dialog = None
         
         # 播放相关状态
-        self.processed_frames = []  # 存储处理后的帧
-        self.original_frames = []   # 存储原始帧
+        # 压缩保存的处理帧（未绘制），显示时按检测信息绘制
+        self.processed_frames = FrameStore(PROCESSED_FRAME_CODEC, PROCESSED_FRAME_MEMORY_MB)
+        self.rendered_frames = OrderedDict()  # 处理帧位置 -> 已绘制的帧，最近显示的在末尾
+        self.renderer = AnnotationRenderer()
+        self.source_frame_shape = None  # 检测信息对应的原始帧尺寸 (高, 宽)
+        self.class_names = None  # 绘制标签使用的模型类别名称
+        self.original_frame_provider = None  # 按需读取原始帧（导入视频时创建）
         self.frame_detection_info = []  # 存储每帧的检测信息
         self.is_playing = False
         self.current_frame_index = 0
         self.total_frames = 0
-        self.skip_frames = 1  # 跳帧数量，从处理器获取
+        self.skip_frames = 1  # 平均采样间隔，从处理器获取
+        self.sampled_frame_indices = []  # 处理帧对应的原始帧索引，从处理器获取
         self.play_timer = QTimer()
         self.play_timer.timeout.connect(self.play_next_frame)
         
@@ -41,6 +72,12 @@ class MainWindow(QMainWindow):
         self.play_fps = 25  # 默认播放帧率
         self.target_fps = 25  # 处理帧率，从处理器获取
         
+        # 模型设置
+        self.auto_model_size = False  # 是否按校准结果自动选择模型尺寸
+        
+        # 区域设置
+        self.roi_path = None  # 区域文件（ROI和排除区域），None表示使用视频旁的同名.roi.json文件
+        
         self.init_ui()
         self.init_connections()
     
@@ -74,6 +111,12 @@ class MainWindow(QMainWindow):
         import_action.triggered.connect(self.import_video)
         file_menu.addAction(import_action)
         
+        # 打开摄像头或视频流
+        live_action = QAction('打开视频流', self)
+        live_action.setShortcut('Ctrl+L')
+        live_action.triggered.connect(self.open_live_source)
+        file_menu.addAction(live_action)
+        
         file_menu.addSeparator()
         
         # 导出结果
@@ -101,6 +144,15 @@ class MainWindow(QMainWindow):
         model_action.triggered.connect(self.show_model_settings)
         settings_menu.addAction(model_action)
         
+        # 区域设置（ROI和排除区域）
+        roi_action = QAction('加载区域文件', self)
+        roi_action.triggered.connect(self.load_roi_file)
+        settings_menu.addAction(roi_action)
+        
+        clear_roi_action = QAction('清除区域文件', self)
+        clear_roi_action.triggered.connect(self.clear_roi_file)
+        settings_menu.addAction(clear_roi_action)
+        
         # 帮助菜单
         help_menu = menubar.addMenu('帮助(&H)')
         
@@ -152,10 +204,61 @@ class MainWindow(QMainWindow):
         
         toolbar.addSeparator()
         
+        # 批量推理大小选择（仅在关闭跟踪时生效）
+        toolbar.addWidget(QLabel('批大小:'))
+        self.batch_combo = QComboBox()
+        self.batch_combo.addItems(['1', '2', '4', '8', '自动'])
+        self.batch_combo.setCurrentText('1')
+        self.batch_combo.setToolTip('关闭跟踪时每次模型调用处理的帧数，"自动"将测量吞吐量后选择')
+        toolbar.addWidget(self.batch_combo)
+        
+        toolbar.addSeparator()
+        
+        # 推理后端选择（导出后端首次使用时自动导出并缓存）
+        toolbar.addWidget(QLabel('推理后端:'))
+        self.backend_combo = QComboBox()
+        self.backend_combo.addItem('PyTorch', 'pytorch')
+        self.backend_combo.addItem('ONNX Runtime', 'onnx')
+        self.backend_combo.addItem('OpenVINO', 'openvino')
+        self.backend_combo.setToolTip('CPU推理时ONNX Runtime/OpenVINO通常更快，首次使用需要导出模型')
+        toolbar.addWidget(self.backend_combo)
+        
+        # 推理分辨率配置（模型输入尺寸和解码后缩放）
+        toolbar.addWidget(QLabel('分辨率:'))
+        self.resolution_combo = QComboBox()
+        for index, (name, profile) in enumerate(RESOLUTION_PROFILES.items()):
+            self.resolution_combo.addItem(name, name)
+            self.resolution_combo.setItemData(index, profile['description'], Qt.ItemDataRole.ToolTipRole)
+        self.resolution_combo.setToolTip('降低分辨率可提高处理速度，检测框和标签始终按原始视频分辨率输出')
+        toolbar.addWidget(self.resolution_combo)
+        
+        toolbar.addSeparator()
+        
         # 跟踪开关（识别默认启用，不可修改）
         self.tracking_check = QCheckBox('启用跟踪')
         self.tracking_check.setChecked(True)
         toolbar.addWidget(self.tracking_check)
+        
+        # 自适应采样：处理跟不上实时时自动降低采样率（处理帧率作为上限）
+        self.adaptive_check = QCheckBox('自适应采样')
+        self.adaptive_check.setToolTip('根据实际处理速度调整采样率，使处理与视频实时同步；处理帧率作为上限')
+        toolbar.addWidget(self.adaptive_check)
+        
+        self.adaptive_resolution_check = QCheckBox('自适应分辨率')
+        self.adaptive_resolution_check.setToolTip('采样率降到下限仍跟不上时降低推理分辨率')
+        self.adaptive_resolution_check.setEnabled(False)
+        self.adaptive_check.toggled.connect(self.adaptive_resolution_check.setEnabled)
+        toolbar.addWidget(self.adaptive_resolution_check)
+        
+        # 运动门控：画面静止时跳过推理
+        self.motion_gate_check = QCheckBox('跳过静止帧')
+        self.motion_gate_check.setToolTip('画面与上一次推理的帧相比基本没有变化时不推理，复用上一次的检测结果（最多连续跳过10帧）')
+        toolbar.addWidget(self.motion_gate_check)
+        
+        # 分块推理：超大画面（航拍图像）切块推理
+        self.tiled_check = QCheckBox('分块推理')
+        self.tiled_check.setToolTip('将超大画面切成640像素的重叠块推理，只推理发生变化的块（只检测，不跟踪）')
+        toolbar.addWidget(self.tiled_check)
     
     def create_central_widget(self):
         """创建中央窗口部件"""
@@ -219,6 +322,10 @@ class MainWindow(QMainWindow):
         self.detection_count_label = QLabel('检测数量: 0')
         control_layout.addWidget(self.detection_count_label)
         
+        # 实时视频流延迟显示（采集到显示）
+        self.latency_label = QLabel('延迟: -')
+        control_layout.addWidget(self.latency_label)
+        
         parent_layout.addWidget(control_group)
     
     def create_log_panel(self, parent_layout):
@@ -238,6 +345,10 @@ class MainWindow(QMainWindow):
         self.status_bar = QStatusBar()
         self.setStatusBar(self.status_bar)
         
+        # 处理帧存储的内存占用和命中统计
+        self.frame_store_label = QLabel('')
+        self.status_bar.addPermanentWidget(self.frame_store_label)
+        
         # 添加进度条
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
@@ -263,35 +374,34 @@ class MainWindow(QMainWindow):
         from datetime import datetime
         return datetime.now().strftime("%H:%M:%S")
     
-    def load_original_frames(self, video_path):
-        """加载原始视频帧"""
-        try:
-            import cv2
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
-                self.log_message("无法打开视频文件加载原始帧")
-                return
-            
-            self.log_message("正在加载原始视频帧...")
-            frame_count = 0
-            
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                self.original_frames.append(frame.copy())
-                frame_count += 1
-                
-                # 每100帧显示一次进度
-                if frame_count % 100 == 0:
-                    self.log_message(f"已加载 {frame_count} 帧...")
-            
-            cap.release()
-            self.log_message(f"原始视频帧加载完成，共 {frame_count} 帧")
-            
-        except Exception as e:
-            self.log_message(f"加载原始视频帧失败: {str(e)}")
+    def open_original_frames(self, video_path):
+        """打开原始帧提供器（不预先解码，显示时按需读取并在后台预读）"""
+        self.close_original_frames()
+        self.original_frame_provider = FrameProvider(video_path, ORIGINAL_FRAME_CACHE_MB)
+        if not self.original_frame_provider.is_opened():
+            self.log_message("无法打开视频文件读取原始帧")
+            return
+        self.log_message(f"原始视频帧按需读取（缓存上限 {ORIGINAL_FRAME_CACHE_MB}MB）")
+    
+    def close_original_frames(self):
+        """关闭原始帧提供器并释放缓存"""
+        if self.original_frame_provider is not None:
+            self.original_frame_provider.close()
+            self.original_frame_provider = None
+    
+    def show_original_frame(self, position, direction=1):
+        """显示处理帧位置对应的原始帧，并按播放方向预读之后的采样帧"""
+        provider = self.original_frame_provider
+        if provider is None:
+            return
+        
+        frame = provider.get(self.get_original_frame_index(position))
+        if frame is not None:
+            self.original_video.set_frame(frame)
+        
+        # 只预读处理帧位置对应的原始帧
+        positions = range(position + direction, self.total_frames if direction > 0 else -1, direction)
+        provider.prefetch([self.get_original_frame_index(p) for p in positions[:provider.read_ahead]])
     
     # 槽函数
     def import_video(self):
@@ -305,19 +415,20 @@ class MainWindow(QMainWindow):
         
         if file_path:
             self.current_video_path = file_path
+            self.is_live_source = False
             self.log_message(f"导入视频: {os.path.basename(file_path)}")
             
             # 清空之前的帧数据
             self.processed_frames.clear()
-            self.original_frames.clear()
+            self.rendered_frames.clear()
             self.frame_detection_info.clear()
             self.is_playing = False
             self.current_frame_index = 0
             self.play_timer.stop()
             self.play_btn.setText('播放')
             
-            # 预加载原始视频帧
-            self.load_original_frames(file_path)
+            # 原始视频帧在播放和拖动时按需读取
+            self.open_original_frames(file_path)
             
             # 启用相关按钮
             self.start_btn.setEnabled(True)
@@ -328,6 +439,35 @@ class MainWindow(QMainWindow):
             
             self.status_bar.showMessage(f'已加载视频: {os.path.basename(file_path)}')
     
+    def open_live_source(self):
+        """打开摄像头或视频流"""
+        source, ok = QInputDialog.getText(self, '打开视频流', '摄像头编号或视频流地址（rtsp://、http://）:')
+        source = source.strip()
+        if not ok or not source:
+            return
+        if not is_live_source(source):
+            QMessageBox.warning(self, '警告', f'不是有效的摄像头编号或视频流地址: {source}')
+            return
+        
+        self.current_video_path = source
+        self.is_live_source = True
+        self.log_message(f"打开视频流: {source}")
+        
+        # 清空之前的帧数据
+        self.processed_frames.clear()
+        self.rendered_frames.clear()
+        self.close_original_frames()
+        self.frame_detection_info.clear()
+        self.is_playing = False
+        self.current_frame_index = 0
+        self.play_timer.stop()
+        self.play_btn.setText('播放')
+        self.play_btn.setEnabled(False)
+        self.progress_slider.setEnabled(False)
+        self.start_btn.setEnabled(True)
+        
+        self.status_bar.showMessage(f'视频流: {source}（实时处理，不保存帧用于回放）')
+    
     def start_detection(self):
         """开始检测"""
         if not self.current_video_path:
@@ -369,6 +509,7 @@ class MainWindow(QMainWindow):
         
         # 清空之前的处理结果
         self.processed_frames.clear()
+        self.rendered_frames.clear()
         self.frame_detection_info.clear()
         self.is_playing = False
         self.current_frame_index = 0
@@ -395,12 +536,29 @@ class MainWindow(QMainWindow):
         self.video_processor.set_tracking_enabled(self.tracking_check.isChecked())
         self.video_processor.set_tracker(self.tracker_combo.currentText())
         self.video_processor.set_target_fps(int(self.fps_combo.currentText()))
+        batch_text = self.batch_combo.currentText()
+        self.video_processor.set_batch_size('auto' if batch_text == '自动' else int(batch_text))
+        self.video_processor.set_backend(self.backend_combo.currentData())
+        self.video_processor.set_resolution_profile(self.resolution_combo.currentData())
+        self.video_processor.set_roi_path(self.roi_path)
+        self.video_processor.set_motion_gate(self.motion_gate_check.isChecked())
+        self.video_processor.set_tiled_inference(self.tiled_check.isChecked())
+        self.video_processor.set_render_annotations(False)  # 只在显示时绘制
+        self.video_processor.set_auto_model_size(self.auto_model_size)
+        target_fps = int(self.fps_combo.currentText())
+        self.video_processor.set_adaptive_rate(
+            self.adaptive_check.isChecked(),
+            min_fps=max(1.0, target_fps / 5),
+            max_fps=target_fps,
+            adaptive_resolution=self.adaptive_resolution_check.isChecked()
+        )
         
         # 设置导出选项
         self.video_processor.set_export_options(
             save_txt=export_options["save_txt"],
             save_conf=export_options["save_conf"],
-            output_dir=output_dir
+            output_dir=output_dir,
+            label_layout=export_options["label_layout"]
         )
         
         # 显示进度对话框
@@ -424,6 +582,12 @@ class MainWindow(QMainWindow):
                 self.video_processor.worker_thread.detection_info_updated.connect(self.on_detection_info_updated)
                 self.video_processor.worker_thread.model_loaded.connect(self.on_model_loaded)
                 self.video_processor.worker_thread.video_info_updated.connect(self.on_video_info_updated)
+                self.video_processor.worker_thread.prefetch_stats_updated.connect(self.on_prefetch_stats_updated)
+                self.video_processor.worker_thread.sampled_frames_updated.connect(self.on_sampled_frames_updated)
+                self.video_processor.worker_thread.live_stats_updated.connect(self.on_live_stats_updated)
+                self.video_processor.worker_thread.rate_adjusted.connect(self.on_rate_adjusted)
+                self.video_processor.worker_thread.motion_stats_updated.connect(self.on_motion_stats_updated)
+                self.video_processor.worker_thread.label_stats_updated.connect(self.on_label_stats_updated)
         else:
             self.progress_dialog.add_info("启动处理失败！")
             self.stop_detection()
@@ -460,6 +624,12 @@ class MainWindow(QMainWindow):
             self.video_processor.detection_info_updated.connect(self.on_detection_info_updated)
             self.video_processor.model_loaded.connect(self.on_model_loaded)
             self.video_processor.video_info_updated.connect(self.on_video_info_updated)
+            self.video_processor.prefetch_stats_updated.connect(self.on_prefetch_stats_updated)
+            self.video_processor.sampled_frames_updated.connect(self.on_sampled_frames_updated)
+            self.video_processor.live_stats_updated.connect(self.on_live_stats_updated)
+            self.video_processor.rate_adjusted.connect(self.on_rate_adjusted)
+            self.video_processor.motion_stats_updated.connect(self.on_motion_stats_updated)
+            self.video_processor.label_stats_updated.connect(self.on_label_stats_updated)
     
     def on_progress_updated(self, processed_frames, expected_frames, progress):
         """处理进度更新"""
@@ -475,14 +645,32 @@ class MainWindow(QMainWindow):
         if self.progress_dialog:
             self.progress_dialog.add_info(f"处理速度: {fps:.1f} FPS")
     
+    def on_prefetch_stats_updated(self, stats):
+        """处理解码预取队列统计更新"""
+        if self.progress_dialog:
+            self.progress_dialog.update_pipeline_stats(format_prefetch_stats(stats))
+    
     def on_frame_processed(self, processed_frame, detection_info):
         """处理帧处理完成"""
-        # 更新处理后的视频显示
-        self.processed_video.set_frame(processed_frame)
+        # 处理器只发送未绘制的帧，显示时按检测信息绘制
+        self.source_frame_shape = self.video_processor.source_frame_shape
+        self.class_names = self.video_processor.model.names if self.video_processor.model is not None else None
+        self.processed_video.set_frame(self.renderer.render_detection_info(
+            processed_frame, detection_info, self.source_frame_shape, self.class_names))
+        
+        # 实时视频流：显示从采集到显示的延迟，不保存帧（内存有界）
+        if 'capture_time' in detection_info:
+            latency_ms = (time.time() - detection_info['capture_time']) * 1000
+            self.latency_label.setText(f'延迟: {latency_ms:.0f}ms')
+            count = detection_info.get('count', 0)
+            self.detection_count_label.setText(f'检测数量: {count} (实时)')
+            return
         
-        # 存储处理后的帧和检测信息用于后续播放
-        self.processed_frames.append(processed_frame.copy())
+        # 存储帧（不绘制，后台压缩）和检测信息用于后续播放
+        self.processed_frames.append(processed_frame)
         self.frame_detection_info.append(detection_info.copy())
+        if len(self.processed_frames) % 10 == 0:
+            self.update_frame_store_status()
         
         # 在处理阶段，显示当前帧的检测数量
         count = detection_info.get('count', 0)
@@ -499,6 +687,7 @@ class MainWindow(QMainWindow):
         self.log_message(f"当前模型: {model_name}")
         if 'obb' in model_path.lower():
             self.log_message("支持旋转边界框检测")
+        self.log_message(format_model_cache_stats(self.video_processor.model_cache.get_stats()))
     
     def on_video_info_updated(self, total_frames, original_fps, skip_frames, target_fps):
         """处理视频信息更新"""
@@ -506,7 +695,36 @@ class MainWindow(QMainWindow):
         # 使用处理器传来的目标帧率作为播放帧率
         self.target_fps = target_fps
         self.play_fps = target_fps
-        self.log_message(f"视频播放设置: 跳帧={skip_frames}, 原始FPS={original_fps:.1f}, 目标帧率={target_fps}FPS")
+        self.log_message(f"视频播放设置: 平均采样间隔={skip_frames}, 原始FPS={original_fps:.1f}, 目标帧率={target_fps}FPS")
+    
+    def on_live_stats_updated(self, stats):
+        """处理实时视频流统计更新"""
+        if self.progress_dialog:
+            self.progress_dialog.update_pipeline_stats(format_live_stats(stats))
+    
+    def on_rate_adjusted(self, adjustment):
+        """处理自适应采样率调整"""
+        self.log_message(format_rate_adjustment(adjustment))
+    
+    def on_motion_stats_updated(self, stats):
+        """处理运动门控统计更新"""
+        if self.progress_dialog:
+            self.progress_dialog.update_motion_stats(format_motion_stats(stats))
+    
+    def on_label_stats_updated(self, stats):
+        """处理标签写出队列统计更新"""
+        if self.progress_dialog:
+            self.progress_dialog.update_label_stats(format_label_stats(stats))
+    
+    def on_sampled_frames_updated(self, sampled_frame_indices):
+        """处理采样帧列表更新"""
+        self.sampled_frame_indices = list(sampled_frame_indices)
+    
+    def get_original_frame_index(self, position):
+        """获取处理帧位置对应的原始帧索引"""
+        if position < len(self.sampled_frame_indices):
+            return self.sampled_frame_indices[position]
+        return position * self.skip_frames
     
     def on_processing_error(self, error_message):
         """处理错误"""
@@ -525,6 +743,7 @@ class MainWindow(QMainWindow):
         
         # 设置总帧数并启用播放控件
         self.total_frames = len(self.processed_frames)
+        self.update_frame_store_status()
         if self.total_frames > 0:
             self.progress_slider.setMaximum(self.total_frames - 1)
             self.progress_slider.setEnabled(True)
@@ -581,6 +800,8 @@ class MainWindow(QMainWindow):
         self.fps_label.setText(f'FPS: {self.play_fps:.1f} (暂停)')
         
         self.log_message('播放已暂停')
+        if self.original_frame_provider is not None:
+            self.log_message(format_provider_stats(self.original_frame_provider.get_stats()))
     
     def seek_video(self, position):
         """跳转视频位置"""
@@ -588,14 +809,15 @@ class MainWindow(QMainWindow):
             return
             
         if 0 <= position < len(self.processed_frames):
+            direction = -1 if position < self.current_frame_index else 1
             self.current_frame_index = position
             # 显示对应的处理后帧
-            self.processed_video.set_frame(self.processed_frames[position])
+            self.processed_video.set_frame(self.get_rendered_frame(position))
             
-            # 根据跳帧规则显示对应的原始帧
-            original_frame_index = position * self.skip_frames
-            if original_frame_index < len(self.original_frames):
-                self.original_video.set_frame(self.original_frames[original_frame_index])
+            # 根据采样帧列表显示对应的原始帧，按拖动方向预读
+            self.show_original_frame(position, direction)
+            self.prefetch_processed_frames(position, direction)
+            self.update_frame_store_status()
             
             # 显示当前帧的检测数量
             if position < len(self.frame_detection_info):
@@ -604,6 +826,31 @@ class MainWindow(QMainWindow):
             else:
                 self.detection_count_label.setText('检测数量: 0 (当前帧)')
     
+    def prefetch_processed_frames(self, position, direction=1):
+        """在后台提前解压播放方向上之后的处理帧（已绘制缓存中的帧除外）"""
+        end = len(self.processed_frames) if direction > 0 else -1
+        positions = range(position + direction, end, direction)[:self.processed_frames.decode_ahead]
+        self.processed_frames.prefetch([p for p in positions if p not in self.rendered_frames])
+    
+    def update_frame_store_status(self):
+        """在状态栏显示处理帧存储的内存占用和命中统计"""
+        self.frame_store_label.setText(format_frame_store_stats(self.processed_frames.get_stats()))
+    
+    def get_rendered_frame(self, position):
+        """获取绘制了检测结果的处理帧，未缓存时按检测信息绘制"""
+        rendered = self.rendered_frames.get(position)
+        if rendered is not None:
+            self.rendered_frames.move_to_end(position)
+            return rendered
+        
+        detection_info = self.frame_detection_info[position] if position < len(self.frame_detection_info) else {}
+        rendered = self.renderer.render_detection_info(self.processed_frames[position], detection_info,
+                                                       self.source_frame_shape, self.class_names)
+        self.rendered_frames[position] = rendered
+        if len(self.rendered_frames) > RENDER_CACHE_SIZE:
+            self.rendered_frames.popitem(last=False)
+        return rendered
+    
     def play_next_frame(self):
         """播放下一帧"""
         if not self.is_playing or not self.processed_frames:
@@ -611,12 +858,11 @@ class MainWindow(QMainWindow):
             
         # 显示当前处理后的帧
         if self.current_frame_index < len(self.processed_frames):
-            self.processed_video.set_frame(self.processed_frames[self.current_frame_index])
+            self.processed_video.set_frame(self.get_rendered_frame(self.current_frame_index))
             
-            # 根据跳帧规则显示对应的原始帧
-            original_frame_index = self.current_frame_index * self.skip_frames
-            if original_frame_index < len(self.original_frames):
-                self.original_video.set_frame(self.original_frames[original_frame_index])
+            # 根据采样帧列表显示对应的原始帧
+            self.show_original_frame(self.current_frame_index)
+            self.prefetch_processed_frames(self.current_frame_index)
             
             # 显示当前帧的检测数量
             if self.current_frame_index < len(self.frame_detection_info):
@@ -663,7 +909,27 @@ class MainWindow(QMainWindow):
     
     def show_model_settings(self):
         """显示模型设置对话框"""
-        QMessageBox.information(self, '模型设置', '模型设置功能待实现')
+        provider = self.original_frame_provider
+        video_shape = provider.frame_shape if provider is not None and provider.is_opened() else None
+        dialog = ModelSettingsDialog(self, backend=self.backend_combo.currentData(),
+                                     auto_model_size=self.auto_model_size, video_shape=video_shape,
+                                     target_fps=int(self.fps_combo.currentText()),
+                                     resolution_profile=self.resolution_combo.currentData())
+        if dialog.exec() == QDialog.DialogCode.Accepted:
+            self.auto_model_size = dialog.get_auto_model_size()
+            self.log_message(f"按目标帧率自动选择模型: {'开启' if self.auto_model_size else '关闭'}")
+    
+    def load_roi_file(self):
+        """选择区域文件（ROI和排除区域多边形）"""
+        file_path, _ = QFileDialog.getOpenFileName(self, '选择区域文件', '', 'Region Files (*.json)')
+        if file_path:
+            self.roi_path = file_path
+            self.log_message(f"区域文件: {os.path.basename(file_path)}（只在区域内推理）")
+    
+    def clear_roi_file(self):
+        """清除区域文件，恢复使用视频旁的同名区域文件"""
+        self.roi_path = None
+        self.log_message("已清除区域文件（视频旁有同名 .roi.json 文件时仍会使用）")
     
     def show_about(self):
         """显示关于对话框"""
@@ -680,6 +946,8 @@ class MainWindow(QMainWindow):
                                    QMessageBox.StandardButton.No)
         
         if reply == QMessageBox.StandardButton.Yes:
+            self.close_original_frames()
+            self.processed_frames.close()
             event.accept()
         else:
             event.ignore() 
\ No newline at end of file
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模型设置对话框
+显示各尺寸模型在本机上的吞吐量校准结果，可重新校准并设置是否按目标帧率自动选择模型
+"""
+
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QCheckBox, QPushButton, QLabel,
+                            QGroupBox, QComboBox, QTableWidget, QTableWidgetItem, QHeaderView)
+from PyQt6.QtCore import QThread, pyqtSignal
+from core.engine import YOLOEngine
+from core.model_calibration import ModelCalibration
+from core.resolution_profiles import RESOLUTION_PROFILES, DEFAULT_RESOLUTION_PROFILE
+
+# 可选的校准分辨率 (高, 宽)
+CALIBRATION_RESOLUTIONS = [(720, 1280), (1080, 1920), (640, 640)]
+
+class CalibrationThread(QThread):
+    """后台执行模型吞吐量校准"""
+    
+    message = pyqtSignal(str)
+    calibration_finished = pyqtSignal()
+    
+    def __init__(self, backend, frame_shape, download=False, resolution_profile=DEFAULT_RESOLUTION_PROFILE):
+        super().__init__()
+        self.backend = backend
+        self.frame_shape = frame_shape
+        self.resolution_profile = resolution_profile
+        self.download = download
+    
+    def run(self):
+        """执行校准"""
+        engine = YOLOEngine(event_callback=self.on_engine_event)
+        engine.set_backend(self.backend)
+        engine.set_resolution_profile(self.resolution_profile)
+        try:
+            engine.calibrate_models(self.frame_shape, download=self.download)
+        except Exception as e:
+            self.message.emit(f"❌ 校准失败: {str(e)}")
+        self.calibration_finished.emit()
+    
+    def on_engine_event(self, event, *args):
+        """转发引擎的文本信息"""
+        if event in ('detection_info_updated', 'error_occurred'):
+            self.message.emit(args[0])
+
+class ModelSettingsDialog(QDialog):
+    """模型设置对话框"""
+    
+    def __init__(self, parent=None, backend='pytorch', auto_model_size=False, video_shape=None, target_fps=25,
+                 resolution_profile=DEFAULT_RESOLUTION_PROFILE):
+        super().__init__(parent)
+        self.backend = backend
+        self.resolution_profile = resolution_profile  # 校准和自动选择按该配置的模型输入尺寸
+        self.auto_model_size = auto_model_size
+        self.video_shape = video_shape  # 当前视频分辨率 (高, 宽)，没有视频时为None
+        self.target_fps = target_fps
+        self.calibration_thread = None
+        self.init_ui()
+        self.init_connections()
+        self.refresh_results()
+    
+    def init_ui(self):
+        """初始化用户界面"""
+        self.setWindowTitle("模型设置")
+        self.setModal(True)
+        self.resize(620, 480)
+        
+        main_layout = QVBoxLayout(self)
+        
+        # 校准结果表格
+        results_group = QGroupBox("本机吞吐量校准结果")
+        results_layout = QVBoxLayout(results_group)
+        
+        self.results_table = QTableWidget(0, 7)
+        self.results_table.setHorizontalHeaderLabels(['后端', '分辨率', '输入尺寸', '模型', '帧率(FPS)', '延迟(ms)', '测量时间'])
+        self.results_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.results_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        results_layout.addWidget(self.results_table)
+        
+        self.selection_label = QLabel()
+        results_layout.addWidget(self.selection_label)
+        
+        main_layout.addWidget(results_group)
+        
+        # 校准设置
+        calibrate_group = QGroupBox("校准")
+        calibrate_layout = QHBoxLayout(calibrate_group)
+        
+        calibrate_layout.addWidget(QLabel("分辨率:"))
+        self.resolution_combo = QComboBox()
+        resolutions = list(CALIBRATION_RESOLUTIONS)
+        if self.video_shape and self.video_shape not in resolutions:
+            resolutions.insert(0, self.video_shape)
+        for height, width in resolutions:
+            label = f"{width}x{height}" + (" (当前视频)" if (height, width) == self.video_shape else "")
+            self.resolution_combo.addItem(label, (height, width))
+        calibrate_layout.addWidget(self.resolution_combo)
+        
+        self.download_check = QCheckBox("下载缺失的模型")
+        calibrate_layout.addWidget(self.download_check)
+        
+        self.calibrate_btn = QPushButton("开始校准")
+        calibrate_layout.addWidget(self.calibrate_btn)
+        
+        main_layout.addWidget(calibrate_group)
+        
+        self.status_label = QLabel(f"推理后端: {self.backend}, 分辨率配置: {self.resolution_profile}")
+        self.status_label.setWordWrap(True)
+        main_layout.addWidget(self.status_label)
+        
+        # 自动选择模型
+        self.auto_model_check = QCheckBox("按目标帧率自动选择模型（选择能达到目标帧率的最大模型）")
+        self.auto_model_check.setChecked(self.auto_model_size)
+        main_layout.addWidget(self.auto_model_check)
+        
+        # 按钮区域
+        button_layout = QHBoxLayout()
+        
+        self.confirm_btn = QPushButton("确认")
+        self.confirm_btn.setDefault(True)
+        button_layout.addWidget(self.confirm_btn)
+        
+        self.cancel_btn = QPushButton("取消")
+        button_layout.addWidget(self.cancel_btn)
+        
+        main_layout.addLayout(button_layout)
+    
+    def init_connections(self):
+        """初始化信号连接"""
+        self.calibrate_btn.clicked.connect(self.start_calibration)
+        self.confirm_btn.clicked.connect(self.accept)
+        self.cancel_btn.clicked.connect(self.reject)
+    
+    def refresh_results(self):
+        """重新加载并显示校准结果"""
+        calibration = ModelCalibration()
+        rows = calibration.get_all_results()
+        
+        self.results_table.setRowCount(len(rows))
+        for row, (backend, resolution, imgsz, size, result) in enumerate(rows):
+            values = [backend, resolution, str(imgsz) if imgsz else '默认', f"yolo11{size}", f"{result['fps']:.1f}",
+                      f"{result['latency_ms']:.1f}", result['measured_at']]
+            for column, value in enumerate(values):
+                self.results_table.setItem(row, column, QTableWidgetItem(value))
+        
+        # 显示当前设置下会自动选择的模型
+        size = calibration.select_size(self.target_fps, self.backend, self.video_shape,
+                                       RESOLUTION_PROFILES[self.resolution_profile]['imgsz'])
+        if size is None:
+            self.selection_label.setText(f"后端 {self.backend}、分辨率配置 {self.resolution_profile} 没有校准结果")
+        else:
+            self.selection_label.setText(f"目标 {self.target_fps} FPS 时自动选择: yolo11{size}")
+    
+    def start_calibration(self):
+        """开始校准"""
+        self.calibrate_btn.setEnabled(False)
+        self.confirm_btn.setEnabled(False)
+        self.calibration_thread = CalibrationThread(self.backend, self.resolution_combo.currentData(),
+                                                    self.download_check.isChecked(), self.resolution_profile)
+        self.calibration_thread.message.connect(self.status_label.setText)
+        self.calibration_thread.calibration_finished.connect(self.on_calibration_finished)
+        self.calibration_thread.start()
+    
+    def on_calibration_finished(self):
+        """校准完成"""
+        self.calibrate_btn.setEnabled(True)
+        self.confirm_btn.setEnabled(True)
+        self.refresh_results()
+    
+    def reject(self):
+        """校准进行中时不关闭对话框"""
+        if self.calibration_thread is not None and self.calibration_thread.isRunning():
+            return
+        super().reject()
+    
+    def get_auto_model_size(self):
+        """获取是否自动选择模型"""
+        return self.auto_model_check.isChecked()
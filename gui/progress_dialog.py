@@ -25,7 +25,7 @@ class ProgressDialog(QDialog):
         """初始化用户界面"""
         self.setWindowTitle("YOLO检测进度")
         self.setModal(True)  # 设置为模态对话框
-        self.setFixedSize(500, 300)
+        self.setFixedSize(500, 320)
         self.setWindowFlags(Qt.WindowType.Dialog | Qt.WindowType.WindowTitleHint)
         
         # 主布局
@@ -70,6 +70,24 @@ class ProgressDialog(QDialog):
         self.status_label.setFont(status_font)
         layout.addWidget(self.status_label)
         
+        # 流水线统计（解码队列占用等）
+        self.pipeline_label = QLabel("")
+        self.pipeline_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.pipeline_label.setStyleSheet("color: #666666; font-size: 10px;")
+        layout.addWidget(self.pipeline_label)
+        
+        # 运动门控统计（跳过推理的帧比例）
+        self.motion_label = QLabel("")
+        self.motion_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.motion_label.setStyleSheet("color: #666666; font-size: 10px;")
+        layout.addWidget(self.motion_label)
+        
+        # 标签写出统计（后台写出队列的积压）
+        self.label_stats_label = QLabel("")
+        self.label_stats_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.label_stats_label.setStyleSheet("color: #666666; font-size: 10px;")
+        layout.addWidget(self.label_stats_label)
+        
         # 详细信息区域
         info_label = QLabel("检测信息:")
         info_font = QFont()
@@ -150,6 +168,18 @@ class ProgressDialog(QDialog):
         """更新状态文本"""
         self.status_label.setText(status_text)
     
+    def update_pipeline_stats(self, stats_text):
+        """更新流水线统计文本"""
+        self.pipeline_label.setText(stats_text)
+    
+    def update_motion_stats(self, stats_text):
+        """更新运动门控统计文本"""
+        self.motion_label.setText(stats_text)
+    
+    def update_label_stats(self, stats_text):
+        """更新标签写出统计文本"""
+        self.label_stats_label.setText(stats_text)
+    
     def add_info(self, info_text):
         """添加信息到详细信息区域"""
         self.info_text.append(info_text)
@@ -161,6 +191,9 @@ class ProgressDialog(QDialog):
         """重置对话框状态"""
         self.progress_bar.setValue(0)
         self.status_label.setText("准备开始...")
+        self.pipeline_label.setText("")
+        self.motion_label.setText("")
+        self.label_stats_label.setText("")
         self.info_text.clear()
         self.cancel_btn.setText("取消检测")
         self.cancel_btn.setStyleSheet("""
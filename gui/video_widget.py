@@ -5,11 +5,14 @@
 用于显示视频帧的PyQt6组件
 """
 
+import threading
 import cv2
 import numpy as np
 from PyQt6.QtWidgets import QLabel, QVBoxLayout, QWidget
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QImage, QPixmap
+from core.video_index import build_video_index
+from core.video_reader import SparseFrameReader
 
 class VideoWidget(QWidget):
     """视频显示组件"""
@@ -20,6 +23,9 @@ class VideoWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.video_capture = None
+        self.reader = None  # 顺序读取，跳转时按关键帧索引选择跳转或顺序跳过
+        self.video_path = None
+        self.index_requested = False  # 是否已开始建立关键帧索引（第一次跳转时才建立）
         self.current_frame = None
         self.total_frames = 0
         self.current_frame_index = 0
@@ -67,6 +73,11 @@ class VideoWidget(QWidget):
             if not self.video_capture.isOpened():
                 raise Exception("无法打开视频文件")
             
+            # 播放时顺序读取下一帧；关键帧索引在第一次跳转时才在后台建立，完成前按帧间隔判断是否跳转
+            self.reader = SparseFrameReader(self.video_capture, [])
+            self.video_path = video_path
+            self.index_requested = False
+            
             # 获取视频信息
             self.total_frames = int(self.video_capture.get(cv2.CAP_PROP_FRAME_COUNT))
             self.fps = int(self.video_capture.get(cv2.CAP_PROP_FPS))
@@ -86,17 +97,28 @@ class VideoWidget(QWidget):
         if self.video_capture is None or not self.video_capture.isOpened():
             return
         
-        # 设置帧位置
-        self.video_capture.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
-        
-        # 读取帧
-        ret, frame = self.video_capture.read()
-        if ret:
+        # 读取帧（下一帧不跳转）
+        if frame_index != self.reader.position and not self.index_requested:
+            self.request_index()
+        frame = self.reader.read_at(frame_index)
+        if frame is not None:
             self.current_frame = frame
             self.current_frame_index = frame_index
             self.display_frame(frame)
             self.frame_changed.emit(frame_index)
     
+    def request_index(self):
+        """在后台建立关键帧索引（只显示和顺序播放时不扫描视频）"""
+        self.index_requested = True
+        threading.Thread(target=self.load_index, args=(self.video_path, self.reader),
+                         name='VideoWidgetIndex', daemon=True).start()
+    
+    def load_index(self, video_path, reader):
+        """建立关键帧索引（后台线程），只用于建立时的读取器"""
+        video_index = build_video_index(video_path)
+        if video_index is not None and video_index.has_keyframes:
+            reader.video_index = video_index
+    
     def display_frame(self, frame):
         """显示帧到标签"""
         if frame is None:
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列式检测结果存储测试
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from core.detection_store import DetectionStore, make_detections, NO_TRACK_ID
+
+class DetectionStoreSaveTest(unittest.TestCase):
+    """保存为 .npz 后加载"""
+    
+    def make_store(self):
+        """xyxy帧、OBB帧和空帧，部分帧带附加字段"""
+        store = DetectionStore(frame_capacity=1, object_capacity=1)  # 追加时需要扩容
+        names = ['plane', 'ship', 'vehicle']
+        store.append({
+            'frame_id': 0, 'bbox_type': 'xyxy',
+            'detections': make_detections([[10, 20, 110, 220], [5, 6, 7, 8]], [0, 2], [0.9, 0.4], [3, 4])
+        }, names)
+        store.append({
+            'frame_id': 5, 'bbox_type': 'obb', 'reused': True, 'latency': 0.125,
+            'detections': make_detections([[[1.5, 2.5], [30.25, 2.5], [30.25, 40.75], [1.5, 40.75]]], [1], [0.75])
+        }, names)
+        store.append({
+            'frame_id': 10, 'bbox_type': 'obb', 'reused': False,
+            'detections': make_detections(None, [], [])
+        }, names)
+        return store
+    
+    def round_trip(self, store):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'detections.npz')
+            store.save(path)
+            return DetectionStore.load(path)
+    
+    def test_frames_round_trip(self):
+        store = self.make_store()
+        loaded = self.round_trip(store)
+        self.assertEqual(len(loaded), 3)
+        self.assertEqual(list(loaded), list(store))
+        self.assertEqual(loaded.summary(), store.summary())
+    
+    def test_frame_extras_round_trip(self):
+        loaded = self.round_trip(self.make_store())
+        self.assertEqual(loaded.frame_extras, {1: {'reused': True, 'latency': 0.125}, 2: {'reused': False}})
+        self.assertNotIn('reused', loaded[0])
+        self.assertTrue(loaded[1]['reused'])
+        self.assertEqual(loaded[1]['latency'], 0.125)
+    
+    def test_obb_rows_round_trip(self):
+        loaded = self.round_trip(self.make_store())
+        detections, bbox_type = loaded.frame_detections(1)
+        self.assertEqual(bbox_type, 'obb')
+        np.testing.assert_array_equal(detections['bbox'][0], [1.5, 2.5, 30.25, 2.5, 30.25, 40.75, 1.5, 40.75])
+        self.assertEqual(detections['track_id'][0], NO_TRACK_ID)
+        
+        obj = loaded[1]['objects'][0]
+        self.assertEqual(obj['bbox'], [[1.5, 2.5], [30.25, 2.5], [30.25, 40.75], [1.5, 40.75]])
+        self.assertEqual(obj['class_name'], 'ship')
+        self.assertIsNone(obj['track_id'])
+    
+    def test_xyxy_rows_round_trip(self):
+        loaded = self.round_trip(self.make_store())
+        detections, bbox_type = loaded.frame_detections(0)
+        self.assertEqual(bbox_type, 'xyxy')
+        self.assertEqual(detections['track_id'].tolist(), [3, 4])
+        self.assertEqual([obj['bbox'] for obj in loaded[0]['objects']], [[10, 20, 110, 220], [5, 6, 7, 8]])
+        self.assertEqual([obj['class_name'] for obj in loaded[0]['objects']], ['plane', 'vehicle'])
+    
+    def test_loaded_store_can_append(self):
+        loaded = self.round_trip(self.make_store())
+        loaded.append({'frame_id': 15, 'bbox_type': 'xyxy', 'detections': make_detections([[0, 0, 4, 4]], [0], [0.5])})
+        self.assertEqual(len(loaded), 4)
+        self.assertEqual(loaded[3]['objects'][0]['bbox'], [0, 0, 4, 4])
+        self.assertEqual(loaded[1]['objects'][0]['class_id'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
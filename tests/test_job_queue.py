@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+视频任务队列测试
+"""
+
+import unittest
+from unittest import mock
+
+from core.engine import (YOLOEngine, DEFAULT_MODEL_PATH, DEFAULT_ADAPTIVE_OPTIONS, DEFAULT_MOTION_OPTIONS,
+                         DEFAULT_TILE_OPTIONS)
+from core.job_queue import JobScheduler, VideoJob, JOB_DONE, JOB_CANCELLED
+
+class ModelSwitchTest(unittest.TestCase):
+    """任务之间的模型切换"""
+    
+    def run_jobs(self, *model_paths):
+        """在同一个引擎上依次处理任务，返回每个任务处理时使用的模型"""
+        scheduler = JobScheduler()
+        engine = YOLOEngine()
+        used_models = []
+        
+        def process_video(video_path):
+            # 代替加载模型：模型记录加载时的路径
+            if engine.model is None:
+                engine.model = ('model', engine.model_path or DEFAULT_MODEL_PATH)
+            used_models.append(engine.model)
+            return True
+        
+        with mock.patch.object(engine, 'process_video', side_effect=process_video):
+            for job_id, model_path in enumerate(model_paths):
+                job = VideoJob(job_id, 'video.mp4', settings={'model_path': model_path})
+                scheduler._run_job(0, engine, job)
+                self.assertEqual(job.status, JOB_DONE)
+        return used_models
+    
+    def test_default_job_after_named_model(self):
+        used_models = self.run_jobs('weights/yolo11n-obb.pt', None)
+        self.assertEqual(used_models, [('model', 'weights/yolo11n-obb.pt'), ('model', DEFAULT_MODEL_PATH)])
+    
+    def test_same_model_is_kept(self):
+        used_models = self.run_jobs(None, DEFAULT_MODEL_PATH, None)
+        self.assertEqual(used_models, [('model', DEFAULT_MODEL_PATH)] * 3)
+
+class JobSettingsTest(unittest.TestCase):
+    """每个任务完整应用一次参数"""
+    
+    def test_options_not_carried_to_next_job(self):
+        scheduler = JobScheduler()
+        engine = YOLOEngine()
+        used_options = []
+        
+        def process_video(video_path):
+            used_options.append((dict(engine.adaptive_options), dict(engine.motion_options), dict(engine.tile_options)))
+            return True
+        
+        custom = {
+            'adaptive_options': {'min_fps': 5.0, 'target_rtf': 2.0},
+            'motion_options': {'threshold': 0.05},
+            'tile_options': {'tile_size': 1024, 'overlap': 0.1}
+        }
+        with mock.patch.object(engine, 'process_video', side_effect=process_video):
+            for job_id, settings in enumerate((custom, {})):
+                scheduler._run_job(0, engine, VideoJob(job_id, 'video.mp4', settings=settings))
+        
+        self.assertEqual(used_options[0][0]['min_fps'], 5.0)
+        self.assertEqual(used_options[0][2]['tile_size'], 1024)
+        self.assertEqual(used_options[1], (DEFAULT_ADAPTIVE_OPTIONS, DEFAULT_MOTION_OPTIONS, DEFAULT_TILE_OPTIONS))
+
+class AutoModelSizeTest(unittest.TestCase):
+    """自动选择模型尺寸只作用于本次处理"""
+    
+    def test_auto_model_not_kept_after_disabled(self):
+        scheduler = JobScheduler()
+        engine = YOLOEngine()
+        used_paths = []
+        
+        def load_model(model_path):
+            engine.model = ('model', model_path)
+            engine.loaded_model_path = model_path
+            return True
+        
+        def select_model_for_video(video_path):
+            engine.auto_model_path = 'weights/yolo11n-obb.pt'
+        
+        def prepare_video(video_path):
+            # 只检查使用的模型，不打开视频
+            used_paths.append(engine.loaded_model_path)
+            return None
+        
+        with mock.patch.object(engine, 'load_model', side_effect=load_model), \
+                mock.patch.object(engine, 'select_model_for_video', side_effect=select_model_for_video), \
+                mock.patch.object(engine, 'prepare_video', side_effect=prepare_video):
+            for job_id, auto_model_size in enumerate((True, False)):
+                job = VideoJob(job_id, 'video.mp4', settings={'auto_model_size': auto_model_size})
+                scheduler._run_job(0, engine, job)
+        
+        self.assertEqual(used_paths, ['weights/yolo11n-obb.pt', DEFAULT_MODEL_PATH])
+        self.assertIsNone(engine.model_path)
+
+class CancelTest(unittest.TestCase):
+    """取消任务"""
+    
+    def test_cancel_pending_job_reports_finished(self):
+        events = []
+        scheduler = JobScheduler(event_callback=lambda event, job, *args: events.append((event, job.job_id)))
+        job = scheduler.submit('video.mp4')
+        self.assertTrue(scheduler.cancel(job.job_id))
+        self.assertEqual(job.status, JOB_CANCELLED)
+        self.assertEqual(events, [('job_finished', job.job_id)])
+    
+    def test_cancel_before_processing_starts(self):
+        scheduler = JobScheduler()
+        engine = YOLOEngine()
+        scheduler.engines[0] = engine
+        job = scheduler.submit('video.mp4')
+        started = []
+        
+        def process_video(video_path):
+            # 加载模型期间取消，之后开始的处理不再进行
+            scheduler.cancel(job.job_id)
+            started.append(engine.prepare_video(video_path) is not None)
+            return False
+        
+        with mock.patch.object(engine, 'process_video', side_effect=process_video):
+            scheduler._run_job(0, engine, job)
+        self.assertEqual(started, [False])
+        self.assertEqual(job.status, JOB_CANCELLED)
+        
+        # 下一个任务不受上一次取消的影响
+        next_job = scheduler.submit('video.mp4')
+        with mock.patch.object(engine, 'process_video', side_effect=lambda video_path: not engine.cancel_requested):
+            scheduler._run_job(0, engine, next_job)
+        self.assertEqual(next_job.status, JOB_DONE)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+标签写出测试
+"""
+
+import os
+import csv
+import zlib
+import struct
+import tempfile
+import unittest
+
+from core.detection_store import make_detections
+from core.label_writer import LabelWriter, format_labels, label_filename, ARCHIVE_NAME
+
+# 帧尺寸 (高, 宽)
+FRAME_SHAPE = (100, 200, 3)
+
+class FormatLabelsTest(unittest.TestCase):
+    """YOLO格式标签文本"""
+    
+    def xyxy_detections(self):
+        # 小数坐标按整数像素截断
+        return make_detections([[10, 20, 110, 70], [40.7, 0.9, 80.2, 100.5]], [2, 0], [0.5, 0.25])
+    
+    def obb_detections(self):
+        return make_detections([[[20, 10], [60, 10], [60, 50], [20, 50]]], [1], [0.75])
+    
+    def test_xyxy(self):
+        text = format_labels(self.xyxy_detections(), 'xyxy', FRAME_SHAPE)
+        self.assertEqual(text, "2 0.300000 0.450000 0.500000 0.500000\n"
+                               "0 0.300000 0.500000 0.200000 1.000000\n")
+    
+    def test_xyxy_with_confidence(self):
+        text = format_labels(self.xyxy_detections(), 'xyxy', FRAME_SHAPE, save_conf=True)
+        self.assertEqual(text, "2 0.300000 0.450000 0.500000 0.500000 0.500000\n"
+                               "0 0.300000 0.500000 0.200000 1.000000 0.250000\n")
+    
+    def test_obb(self):
+        text = format_labels(self.obb_detections(), 'obb', FRAME_SHAPE)
+        self.assertEqual(text, "1 0.100000 0.100000 0.300000 0.100000 0.300000 0.500000 0.100000 0.500000\n")
+    
+    def test_obb_with_confidence(self):
+        text = format_labels(self.obb_detections(), 'obb', FRAME_SHAPE, save_conf=True)
+        self.assertEqual(text, "1 0.100000 0.100000 0.300000 0.100000 0.300000 0.500000 0.100000 0.500000 0.750000\n")
+
+class ArchiveIndexTest(unittest.TestCase):
+    """tar/zip归档的索引偏移"""
+    
+    def write_archive(self, layout, tmp):
+        """写出若干帧标签，返回 (归档内容, 索引行, 帧号 -> 标签文本)"""
+        writer = LabelWriter(tmp, layout)
+        texts = {}
+        for frame_index in range(0, 60, 3):
+            # 各帧对象数不同，标签长度跨越tar的块边界
+            count = frame_index % 40
+            detections = make_detections([[frame_index, 1, frame_index + 10, 20]] * count, [1] * count, [0.5] * count)
+            writer.put(frame_index, {'detections': detections, 'bbox_type': 'xyxy'}, FRAME_SHAPE)
+            texts[frame_index] = format_labels(detections, 'xyxy', FRAME_SHAPE).encode('utf-8')
+        writer.close()
+        self.assertIsNone(writer.error)
+        
+        with open(os.path.join(tmp, f"{ARCHIVE_NAME}.{layout}"), 'rb') as f:
+            data = f.read()
+        with open(os.path.join(tmp, f"{ARCHIVE_NAME}.{layout}.index.csv"), encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([int(row['frame_id']) for row in rows], sorted(texts))
+        return data, rows, texts
+    
+    def test_tar_offsets_point_at_member_data(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            data, rows, texts = self.write_archive('tar', tmp)
+        for row in rows:
+            frame_index, offset, size = int(row['frame_id']), int(row['offset']), int(row['size'])
+            self.assertEqual(row['name'], label_filename(frame_index))
+            self.assertEqual(size, len(texts[frame_index]))
+            self.assertEqual(data[offset:offset + size], texts[frame_index])
+    
+    def test_zip_offsets_point_at_local_headers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            data, rows, texts = self.write_archive('zip', tmp)
+        for row in rows:
+            frame_index, offset, size = int(row['frame_id']), int(row['offset']), int(row['size'])
+            self.assertEqual(size, len(texts[frame_index]))
+            
+            # 本地文件头之后依次为成员名、扩展字段和压缩数据
+            header = struct.unpack('<4s5HL2L2H', data[offset:offset + 30])
+            self.assertEqual(header[0], b'PK\x03\x04')
+            compressed_size, name_length, extra_length = header[7], header[9], header[10]
+            name_start = offset + 30
+            self.assertEqual(data[name_start:name_start + name_length].decode('utf-8'), row['name'])
+            data_start = name_start + name_length + extra_length
+            member = zlib.decompress(data[data_start:data_start + compressed_size], -zlib.MAX_WBITS)
+            self.assertEqual(member, texts[frame_index])
+
+if __name__ == '__main__':
+    unittest.main()
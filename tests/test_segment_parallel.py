@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分段并行处理测试
+"""
+
+import unittest
+
+from core.detection_store import make_detections, NO_TRACK_ID
+from core.segment_parallel import TrackStitcher, split_segments
+
+def frame_info(frame_id, objects):
+    """objects: [(片段内跟踪ID, 类别, 左上角x)]，检测框为 40x40 的xyxy框"""
+    boxes = [[x, 50, x + 40, 90] for _, _, x in objects]
+    return {
+        'frame_id': frame_id,
+        'bbox_type': 'xyxy',
+        'detections': make_detections(boxes, [class_id for _, class_id, _ in objects], [0.9] * len(objects),
+                                      [track_id for track_id, _, _ in objects])
+    }
+
+def track_ids(results):
+    """每帧的 {检测框左上角x: 跟踪ID}"""
+    return [dict(zip(info['detections']['bbox'][:, 0].astype(int).tolist(), info['detections']['track_id'].tolist()))
+            for info in results]
+
+class TrackStitcherTest(unittest.TestCase):
+    """重叠窗口中的跟踪ID拼接"""
+    
+    def stitch(self, second_segment, overlap_count=3):
+        """第一个片段为帧0~9（对象A、B），第二个片段由 second_segment(帧号) 生成，返回第二个片段合并后的结果"""
+        segments = split_segments(list(range(20)), 2, overlap_count)
+        self.assertEqual(segments[1]['frame_indices'][0], 10 - overlap_count)
+        
+        stitcher = TrackStitcher()
+        stitcher.add_segment([frame_info(f, [(7, 0, 10 + f), (8, 0, 200 + f)]) for f in segments[0]['frame_indices']],
+                             segments[0]['overlap_count'])
+        self.assertEqual(track_ids(stitcher.merged_results)[0], {10: 1, 200: 2})
+        
+        stitcher.add_segment([frame_info(f, second_segment(f)) for f in segments[1]['frame_indices']],
+                             segments[1]['overlap_count'])
+        self.assertEqual([info['frame_id'] for info in stitcher.merged_results], list(range(20)))
+        return stitcher.merged_results[10:]
+    
+    def test_ids_continue_across_segments(self):
+        # 第二个片段内的ID与第一个片段相反，对象C只出现在第二个片段
+        results = self.stitch(lambda f: [(1, 0, 200 + f), (2, 0, 10 + f)] + ([(3, 1, 400)] if f >= 12 else []))
+        ids = track_ids(results)
+        self.assertEqual(ids[0], {20: 1, 210: 2})
+        self.assertEqual(ids[-1], {29: 1, 219: 2, 400: 3})
+    
+    def test_untracked_detections_keep_placeholder(self):
+        results = self.stitch(lambda f: [(2, 0, 10 + f), (NO_TRACK_ID, 0, 400)])
+        self.assertEqual(track_ids(results)[0], {20: 1, 400: NO_TRACK_ID})
+    
+    def test_too_few_votes_starts_new_track(self):
+        # 重叠窗口只有1帧，不足 min_votes
+        results = self.stitch(lambda f: [(1, 0, 10 + f)], overlap_count=1)
+        self.assertEqual(track_ids(results)[0], {20: 3})
+    
+    def test_class_mismatch_starts_new_track(self):
+        results = self.stitch(lambda f: [(1, 1, 10 + f), (2, 0, 200 + f)])
+        self.assertEqual(track_ids(results)[0], {20: 3, 210: 2})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+稀疏解码读取器测试
+"""
+
+import unittest
+
+from core.video_index import VideoIndex
+from core.video_reader import SparseFrameReader
+
+class FakeCapture:
+    """模拟视频：帧内容为帧索引，跳转落在目标帧之后的下一个关键帧"""
+    
+    def __init__(self, frame_count, keyframe_interval):
+        self.frame_count = frame_count
+        self.keyframe_interval = keyframe_interval
+        self.position = 0
+    
+    def set(self, prop, value):
+        self.position = min(self.frame_count, -(-int(value) // self.keyframe_interval) * self.keyframe_interval)
+        return True
+    
+    def get(self, prop):
+        return self.position
+    
+    def grab(self):
+        if self.position >= self.frame_count:
+            return False
+        self.position += 1
+        return True
+    
+    def read(self):
+        if self.position >= self.frame_count:
+            return False, None
+        self.position += 1
+        return True, self.position - 1
+
+class SparseFrameReaderTest(unittest.TestCase):
+    """采样帧读取"""
+    
+    def test_inexact_seek_never_mislabels_frames(self):
+        capture = FakeCapture(1000, 10)
+        video_index = VideoIndex(1000, keyframes=range(0, 1000, 50))
+        reader = SparseFrameReader(capture, [0, 505, 515], video_index, mode='seek')
+        frames = list(reader)
+        
+        # 跳转到505落在510，505被跳过，之后按解码器的实际位置读取
+        self.assertEqual(frames, [(0, 0), (515, 515)])
+        self.assertEqual(reader.mode, 'grab')
+    
+    def test_exact_positions_with_grab(self):
+        capture = FakeCapture(100, 1)
+        reader = SparseFrameReader(capture, [0, 3, 4, 50, 99], mode='grab')
+        self.assertEqual([(index, frame) for index, frame in reader], [(0, 0), (3, 3), (4, 4), (50, 50), (99, 99)])
+    
+    def test_read_at_rejects_overshoot(self):
+        capture = FakeCapture(1000, 10)
+        reader = SparseFrameReader(capture, [], mode='seek')
+        self.assertIsNone(reader.read_at(505))
+        self.assertEqual(reader.read_at(512), 512)
+
+if __name__ == '__main__':
+    unittest.main()